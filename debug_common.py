@@ -0,0 +1,147 @@
+"""Outils partagés par les scripts de diagnostic (debug_detailed, test_parsing).
+
+Sortie bufferisée, résumé des exceptions et cache disque des métadonnées
+yt-dlp. L'import n'a pas d'effet de bord sur l'environnement: yt-dlp n'est
+importé qu'au premier besoin.
+"""
+
+import logging
+import logging.handlers
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+from ytsplit.utils.jsonio import json_dumps, json_loads
+
+
+# Toute la sortie passe par un tampon mémoire, vidé d'un bloc en fin de diagnostic
+logger = logging.getLogger("ytsplit.debug")
+output_buffer = logging.handlers.MemoryHandler(
+    10_000, flushLevel=logging.CRITICAL, target=logging.StreamHandler(sys.stdout)
+)
+logger.addHandler(output_buffer)
+logger.setLevel(logging.INFO)
+logger.propagate = False
+
+# Traces complètes des exceptions (peuvent contenir toute la sortie capturée)
+VERBOSE = os.environ.get('YTSPLIT_DEBUG_VERBOSE') == '1'
+
+# Cache disque des métadonnées, partagé par les scripts de diagnostic (clé: ID vidéo)
+INFO_CACHE_DIR = Path("~/.cache/ytsplit-debug").expanduser()
+INFO_CACHE_TTL_S = 3600
+
+# Options communes à toutes les instances YoutubeDL du diagnostic
+BASE_OPTS = {
+    'quiet': True,
+    'no_warnings': True,
+    'skip_download': True,
+    'socket_timeout': 30,
+}
+
+
+def log_traceback(e):
+    """Trace complète si YTSPLIT_DEBUG_VERBOSE=1, sinon un résumé tronqué de l'erreur."""
+    if VERBOSE:
+        logger.info("%s", traceback.format_exc().rstrip())
+    else:
+        logger.info("%s", f"  {type(e).__name__}: {str(e)[:500]}")
+
+
+def run_cli(cmd, timeout, text=True):
+    """Repli CLI: exécute yt-dlp dans un sous-processus et retourne (code, stdout, stderr).
+
+    La sortie standard (plus de 100 Ko pour les vidéos aux nombreuses langues
+    auto) est lue ligne à ligne, sans la double copie de ``capture_output``;
+    stderr passe par un fichier temporaire pour ne jamais bloquer le processus.
+    """
+    timed_out = threading.Event()
+    with tempfile.TemporaryFile() as err_file, subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=err_file, text=text
+    ) as proc:
+        def _kill():
+            timed_out.set()
+            proc.kill()
+
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        try:
+            stdout = ("" if text else b"").join(proc.stdout)  # Itération ligne à ligne
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
+
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+
+        err_file.seek(0)
+        stderr = err_file.read()
+
+    if text:
+        stderr = stderr.decode("utf-8", errors="replace")
+    return returncode, stdout, stderr
+
+
+def _video_id(url):
+    """Extrait l'ID vidéo d'une URL YouTube (clé du cache disque)."""
+    parsed = urlparse(url)
+    if parsed.netloc in {"youtu.be", "www.youtu.be"}:
+        return parsed.path.lstrip("/")
+    return parse_qs(parsed.query).get("v", [url])[0]
+
+
+def _extract_info(ydl, url):
+    """Extrait les métadonnées de la vidéo (en process, ou via la CLI en repli)."""
+    if ydl is not None:
+        logger.info("%s", "Extraction: YoutubeDL.extract_info (en process)")
+        return ydl.sanitize_info(ydl.extract_info(url, download=False))
+
+    cmd = ["yt-dlp", "--dump-json", "--no-warnings", url]
+    logger.info("%s", f"Commande: {' '.join(cmd)}")
+    # Sortie brute (bytes): évite le décodage UTF-8 puis ré-encodage pour orjson
+    returncode, stdout, stderr = run_cli(cmd, 60, text=False)
+    if returncode != 0:
+        raise RuntimeError(f"Erreur récupération JSON: {stderr.decode('utf-8', errors='replace')}")
+    return json_loads(stdout)
+
+
+def cached_info(url, ydl=None, ttl=INFO_CACHE_TTL_S):
+    """Métadonnées yt-dlp de la vidéo, via le cache disque partagé.
+
+    Le fichier ``<INFO_CACHE_DIR>/<id>.json`` est réutilisé tant qu'il a moins
+    de ``ttl`` secondes: les relances des scripts de diagnostic évitent alors
+    tout accès réseau pour les métadonnées.
+    """
+    cache_file = INFO_CACHE_DIR / f"{_video_id(url)}.json"
+    try:
+        if time.time() - cache_file.stat().st_mtime < ttl:
+            info = json_loads(cache_file.read_bytes())
+            logger.info("%s", f"Métadonnées lues depuis le cache: {cache_file}")
+            return info
+    except (OSError, ValueError):
+        pass  # Absent, expiré ou corrompu: ré-extraire
+
+    if ydl is None:
+        try:
+            from yt_dlp import YoutubeDL
+        except ImportError:  # Module yt_dlp absent: repli sur la CLI
+            YoutubeDL = None
+        if YoutubeDL is not None:
+            with YoutubeDL(BASE_OPTS) as own_ydl:
+                info = _extract_info(own_ydl, url)
+        else:
+            info = _extract_info(None, url)
+    else:
+        info = _extract_info(ydl, url)
+
+    try:
+        INFO_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        cache_file.write_bytes(json_dumps(info))
+    except OSError as e:
+        logger.info("%s", f"! Cache des métadonnées non écrit: {e}")
+    return info
@@ -1,188 +1,351 @@
 #!/usr/bin/env python3
-"""Script de diagnostic ultra-détaillé pour les sous-titres."""
+"""Script de diagnostic ultra-détaillé pour les sous-titres.
 
-import subprocess
-import sys
-import traceback
+Nécessite yt-dlp >= 2023.06 pour profiter des extracteurs paresseux (lazy
+extractors): seul l'extracteur YouTube est alors importé au démarrage.
+"""
+
+import copy
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
 from pathlib import Path
 
+# Toute valeur non vide de YTDLP_NO_LAZY_EXTRACTORS (même "0") désactive les
+# extracteurs paresseux: la retirer avant l'import en process et pour la CLI
+os.environ.pop("YTDLP_NO_LAZY_EXTRACTORS", None)
+
+try:
+    from yt_dlp import YoutubeDL
+except ImportError:  # Module yt_dlp absent: repli sur la CLI
+    YoutubeDL = None
+
+from debug_common import BASE_OPTS, cached_info, log_traceback, logger, output_buffer, run_cli
+
+WORK_DIR = Path("./debug_work")
+
+# Tests de téléchargement (2 et 3): (titre, préfixe, options YoutubeDL, args CLI, chars affichés)
+_DOWNLOAD_TESTS = (
+    (
+        "TEST TELECHARGEMENT SOUS-TITRES MANUELS",
+        "test_manual",
+        {
+            'writesubtitles': True,  # SEULEMENT sous-titres manuels
+            # Une langue suffit à prouver la présence de sous-titres manuels;
+            # la liste complète est déjà donnée par le test 1
+            'subtitleslangs': ['en.*', 'fr.*', 'en-orig'],
+            'subtitlesformat': 'srt/vtt/best',  # Tous les formats
+            'verbose': True,  # Mode verbeux
+        },
+        ["--write-subs", "--skip-download", "--sub-langs", "en.*,fr.*,en-orig",
+         "--sub-format", "srt/vtt/best", "--verbose"],
+        2000,
+    ),
+    (
+        "TEST TELECHARGEMENT SOUS-TITRES AUTO",
+        "test_auto",
+        {
+            'writeautomaticsub': True,  # SEULEMENT sous-titres auto
+            'subtitleslangs': ['en', 'fr'],
+            'subtitlesformat': 'srt/vtt/best',
+            'verbose': True,
+        },
+        ["--write-auto-subs", "--skip-download", "--sub-langs", "en,fr",
+         "--sub-format", "srt/vtt/best", "--verbose"],
+        1500,
+    ),
+)
+
+
+class _CaptureLogger:
+    """Logger yt-dlp qui capture la sortie au lieu de l'écrire sur la console."""
+
+    def __init__(self):
+        self.stdout = []
+        self.stderr = []
+
+    def debug(self, msg):
+        self.stdout.append(msg)
+
+    def info(self, msg):
+        self.stdout.append(msg)
+
+    def warning(self, msg):
+        self.stderr.append(msg)
+
+    def error(self, msg):
+        self.stderr.append(msg)
+
+
+@functools.lru_cache(maxsize=None)
+def _get_info(ydl, url):
+    """Métadonnées de la vidéo, extraites une seule fois par exécution."""
+    return cached_info(url, ydl)
+
+
+def _download_subs(info, url, opts, cli_args, timeout):
+    """Télécharge les sous-titres en réutilisant l'info dict (ou via la CLI en repli).
+
+    N'écrit rien sur la console: peut tourner dans un thread en parallèle
+    d'autres tests. Retourne (code, stdout, stderr).
+    """
+    if YoutubeDL is None:
+        return run_cli(["yt-dlp", *cli_args, url], timeout)
+
+    logger = _CaptureLogger()
+    returncode = 0
+    with YoutubeDL({**BASE_OPTS, **opts, 'logger': logger}) as ydl:
+        try:
+            # process_ie_result modifie le dict: travailler sur une copie
+            ydl.process_ie_result(copy.deepcopy(info), download=True)
+        except Exception as e:
+            logger.error(str(e))
+            returncode = 1
+    return returncode, "\n".join(logger.stdout), "\n".join(logger.stderr)
+
+
+def _print_created_files(work_dir, prefix):
+    """Liste les fichiers créés par un test avec un aperçu du contenu."""
+    logger.info("%s", "\nFichiers créés:")
+    for f in work_dir.glob(f"{prefix}.*"):
+        logger.info("%s", f"  {f.name} ({f.stat().st_size} bytes)")
+        if f.suffix in ['.srt', '.vtt']:
+            # Lecture bornée: inutile de charger tout le fichier pour un aperçu
+            with f.open('rb') as fh:
+                head = fh.read(256)
+            logger.info("%s", f"    Contenu (200 premiers chars): {repr(head.decode('utf-8', errors='ignore')[:200])}")
+
+
+def _render_subs_table(ydl, video_id, subs):
+    """Tableau des sous-titres disponibles, au format de ``yt-dlp --list-subs``."""
+    if ydl is not None:
+        return ydl.render_subtitles_table(video_id, subs)
+    if not subs:
+        return None
+    lines = ["Language Formats"]
+    for lang, formats in subs.items():
+        lines.append(f"{lang} {', '.join(f.get('ext', 'unknown') for f in formats)}")
+    return "\n".join(lines)
+
+
+def _test_list_subs(ydl, info):
+    """Test 1: liste complète des sous-titres disponibles (depuis les métadonnées)."""
+    if info is None:
+        raise RuntimeError("Métadonnées indisponibles")
+
+    parts = []
+    for name, key in (("subtitles", 'subtitles'), ("automatic captions", 'automatic_captions')):
+        table = _render_subs_table(ydl, info['id'], info.get(key))
+        if table:
+            parts.append(f"[info] Available {name} for {info['id']}:\n{table}")
+        else:
+            parts.append(f"{info['id']} has no {name}")
+    output = "\n".join(parts)
+
+    logger.info("%s", f"Sortie complète ({len(output)} chars):")
+    logger.info("%s", ">" * 40)
+    # Un seul enregistrement pour toute la liste plutôt qu'un par ligne
+    logger.info("%s", "\n".join(f"{i:3d}: {line!r}" for i, line in enumerate(output.splitlines())))
+    logger.info("%s", "<" * 40)
+
+
+def _download_skip_reason(info, opts):
+    """Raison de sauter un test de téléchargement voué à l'échec (None sinon).
+
+    Les métadonnées indiquent déjà si des sous-titres en/fr du type demandé
+    existent: inutile de lancer un téléchargement qui ne produira aucun fichier.
+    """
+    if info is None:
+        return None  # L'erreur sera remontée par le test lui-même
+    key, kind = (
+        ('subtitles', "manuel") if opts.get('writesubtitles') else ('automatic_captions', "automatique")
+    )
+    if not any(lang.startswith(('en', 'fr')) for lang in info.get(key) or {}):
+        return f"aucun sous-titre {kind} en/fr dans les métadonnées"
+    return None
+
+
+def _fetch_auto_captions(info, work_dir, prefix, langs):
+    """Récupère les sous-titres auto directement depuis les URLs des métadonnées.
+
+    Une requête HTTP par langue (via ``YoutubeDL.urlopen``, qui applique les
+    en-têtes et cookies de yt-dlp) au lieu d'un nouveau passage de l'extracteur.
+    Retourne (code, stdout, stderr) comme ``_download_subs``.
+    """
+    auto_captions = info.get('automatic_captions') or {}
+    lines = []
+    returncode = 1
+    with YoutubeDL(BASE_OPTS) as ydl:
+        for lang in langs:
+            fmt = next((f for f in auto_captions.get(lang, []) if f.get('ext') in ('srt', 'vtt')), None)
+            if fmt is None:
+                lines.append(f"[auto] {lang}: aucun format srt/vtt")
+                continue
+            target = work_dir / f"{prefix}.{lang}.{fmt['ext']}"
+            with ydl.urlopen(fmt['url']) as resp:
+                target.write_bytes(resp.read())
+            lines.append(f"[auto] {lang}: {fmt['ext']} -> {target}")
+            returncode = 0
+    return returncode, "\n".join(lines), ""
+
+
+def _run_download_test(info, url, work_dir, prefix, opts, cli_args):
+    """Lance un test de téléchargement (2 ou 3) sans rien afficher."""
+    if info is None:
+        raise RuntimeError("Métadonnées indisponibles")
+    if YoutubeDL is not None and opts.get('writeautomaticsub'):
+        return _fetch_auto_captions(info, work_dir, prefix, opts['subtitleslangs'])
+    output = str(work_dir / f"{prefix}.%(ext)s")
+    return _download_subs(info, url, {**opts, 'outtmpl': output}, [*cli_args, "--output", output], timeout=120)
+
+
+def _print_download_test(result, url, work_dir, prefix, opts, cli_args, max_chars):
+    """Affiche le résultat d'un test de téléchargement (2 ou 3)."""
+    if YoutubeDL is None:
+        logger.info("%s", f"Commande: {' '.join(['yt-dlp', *cli_args, url])}")
+    elif opts.get('writeautomaticsub'):
+        logger.info("%s", f"Requêtes directes (YoutubeDL.urlopen): {', '.join(opts['subtitleslangs'])}")
+    else:
+        logger.info("%s", f"Options YoutubeDL: {opts}")
+
+    returncode, stdout, stderr = result
+
+    logger.info("%s", f"Return code: {returncode}")
+
+    if stdout:
+        logger.info("%s", f"STDOUT ({len(stdout)} chars - premiers {max_chars}):")
+        logger.info("%s", stdout[:max_chars])
+
+    if stderr:
+        logger.info("%s", f"STDERR ({len(stderr)} chars - premiers {max_chars}):")
+        logger.info("%s", stderr[:max_chars])
+
+    _print_created_files(work_dir, prefix)
+
+
+def _test_video_info(data):
+    """Test 4: informations sur la vidéo depuis les métadonnées."""
+    logger.info("%s", f"Titre: {data.get('title', 'N/A')}")
+    logger.info("%s", f"Durée: {data.get('duration', 'N/A')} secondes")
+    logger.info("%s", f"Uploader: {data.get('uploader', 'N/A')}")
+
+    # Informations sur les sous-titres dans les métadonnées
+    subtitles = data.get('subtitles', {})
+    auto_captions = data.get('automatic_captions', {})
+
+    logger.info("%s", f"\nSubtitles manuels dans JSON: {list(subtitles.keys())}")
+    for lang, subs in subtitles.items():
+        logger.info("%s", f"  {lang}: {len(subs)} formats - {[s.get('ext', 'unknown') for s in subs]}")
+
+    logger.info("%s", f"\nAutomatic captions dans JSON: {list(auto_captions.keys())}")
+    if auto_captions:
+        # Juste les 3 premières langues pour pas surcharger
+        for i, (lang, subs) in enumerate(auto_captions.items()):
+            if i < 3:
+                logger.info("%s", f"  {lang}: {len(subs)} formats - {[s.get('ext', 'unknown') for s in subs]}")
+        if len(auto_captions) > 3:
+            logger.info("%s", f"  ... et {len(auto_captions) - 3} autres langues")
+
+
 def debug_detailed_subtitles(url="https://www.youtube.com/watch?v=8JFMiIlSdlg"):
     """Debug ultra-détaillé des sous-titres."""
-    
-    print("="*80)
-    print(f"DIAGNOSTIC ULTRA-DETAILLE pour: {url}")
-    print("="*80)
-    
-    # Test 1: yt-dlp --list-subs COMPLET
-    print("\n1. YT-DLP --LIST-SUBS (SORTIE COMPLETE)")
-    print("-" * 50)
-    
     try:
-        cmd = ["yt-dlp", "--list-subs", "--no-warnings", url]
-        print(f"Commande: {' '.join(cmd)}")
-        
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-        
-        print(f"Return code: {result.returncode}")
-        print(f"STDOUT complet ({len(result.stdout)} chars):")
-        print(">" * 40)
-        for i, line in enumerate(result.stdout.split('\n')):
-            print(f"{i:3d}: {repr(line)}")
-        print("<" * 40)
-        
-        if result.stderr:
-            print(f"STDERR complet ({len(result.stderr)} chars):")
-            print(">" * 40)
-            for i, line in enumerate(result.stderr.split('\n')):
-                print(f"{i:3d}: {repr(line)}")
-            print("<" * 40)
-            
-    except Exception as e:
-        print(f"ERREUR dans test 1: {e}")
-        traceback.print_exc()
-    
-    # Test 2: Téléchargement SUBS MANUELS seulement
-    print("\n2. TEST TELECHARGEMENT SOUS-TITRES MANUELS")
-    print("-" * 50)
-    
-    work_dir = Path("./debug_work")
+        _debug_detailed_subtitles(url)
+    finally:
+        output_buffer.flush()
+
+
+def _debug_detailed_subtitles(url):
+    """Corps du diagnostic (sortie bufferisée par ``logger``)."""
+
+    logger.info("%s", "="*80)
+    logger.info("%s", f"DIAGNOSTIC ULTRA-DETAILLE pour: {url}")
+    logger.info("%s", "="*80)
+
+    if YoutubeDL is None:
+        logger.info("%s", "! Module yt_dlp introuvable: repli sur la CLI yt-dlp")
+
+    work_dir = WORK_DIR
     work_dir.mkdir(exist_ok=True)
-    
-    try:
-        cmd_manual = [
-            "yt-dlp",
-            "--write-subs",  # SEULEMENT sous-titres manuels
-            "--skip-download",
-            "--sub-langs", "all",  # Toutes les langues
-            "--sub-format", "srt/vtt/best",  # Tous les formats
-            "--output", str(work_dir / "test_manual.%(ext)s"),
-            "--verbose",  # Mode verbeux
-            url
-        ]
-        
-        print(f"Commande: {' '.join(cmd_manual)}")
-        
-        result_manual = subprocess.run(cmd_manual, capture_output=True, text=True, timeout=120)
-        
-        print(f"Return code: {result_manual.returncode}")
-        
-        if result_manual.stdout:
-            print(f"STDOUT ({len(result_manual.stdout)} chars - premiers 2000):")
-            print(result_manual.stdout[:2000])
-        
-        if result_manual.stderr:
-            print(f"STDERR ({len(result_manual.stderr)} chars - premiers 2000):")  
-            print(result_manual.stderr[:2000])
-            
-        print("\nFichiers créés:")
-        for f in work_dir.iterdir():
-            if f.name.startswith("test_manual"):
-                print(f"  {f.name} ({f.stat().st_size} bytes)")
-                if f.suffix in ['.srt', '.vtt']:
-                    content = f.read_text(encoding='utf-8', errors='ignore')
-                    print(f"    Contenu (200 premiers chars): {repr(content[:200])}")
-    
-    except Exception as e:
-        print(f"ERREUR dans test 2: {e}")
-        traceback.print_exc()
-    
-    # Test 3: Téléchargement AUTO-SUBS seulement  
-    print("\n3. TEST TELECHARGEMENT SOUS-TITRES AUTO")
-    print("-" * 50)
-    
-    try:
-        cmd_auto = [
-            "yt-dlp", 
-            "--write-auto-subs",  # SEULEMENT sous-titres auto
-            "--skip-download",
-            "--sub-langs", "en,fr",
-            "--sub-format", "srt/vtt/best",
-            "--output", str(work_dir / "test_auto.%(ext)s"),
-            "--verbose",
-            url
+
+    # Purger les fichiers des exécutions précédentes
+    for _, prefix, _, _, _ in _DOWNLOAD_TESTS:
+        for f in work_dir.glob(f"{prefix}.*"):
+            f.unlink(missing_ok=True)
+
+    # Une seule instance YoutubeDL (extracteurs + session HTTP) pour tout le diagnostic
+    with (YoutubeDL(BASE_OPTS) if YoutubeDL is not None else nullcontext()) as ydl:
+        # Extraction unique des métadonnées, réutilisée par tous les tests
+        info = None
+        info_error = None
+        try:
+            info = _get_info(ydl, url)
+        except Exception as e:
+            info_error = e
+            logger.info("%s", f"ERREUR extraction des métadonnées: {e}")
+
+        # Test 1: yt-dlp --list-subs COMPLET
+        logger.info("%s", "\n1. YT-DLP --LIST-SUBS (SORTIE COMPLETE)")
+        logger.info("%s", "-" * 50)
+
+        try:
+            _test_list_subs(ydl, info)
+        except Exception as e:
+            logger.info("%s", f"ERREUR dans test 1: {e}")
+            log_traceback(e)
+
+    # Tests 2 et 3: téléchargements SUBS MANUELS puis AUTO, indépendants et
+    # limités par le réseau: lancés en parallèle, affichés dans l'ordre
+    with ThreadPoolExecutor(max_workers=len(_DOWNLOAD_TESTS)) as executor:
+        skip_reasons = [_download_skip_reason(info, opts) for _, _, opts, _, _ in _DOWNLOAD_TESTS]
+        futures = [
+            None if reason else executor.submit(_run_download_test, info, url, work_dir, prefix, opts, cli_args)
+            for (_, prefix, opts, cli_args, _), reason in zip(_DOWNLOAD_TESTS, skip_reasons)
         ]
-        
-        print(f"Commande: {' '.join(cmd_auto)}")
-        
-        result_auto = subprocess.run(cmd_auto, capture_output=True, text=True, timeout=120)
-        
-        print(f"Return code: {result_auto.returncode}")
-        
-        if result_auto.stdout:
-            print(f"STDOUT ({len(result_auto.stdout)} chars - premiers 1500):")
-            print(result_auto.stdout[:1500])
-            
-        if result_auto.stderr:
-            print(f"STDERR ({len(result_auto.stderr)} chars - premiers 1500):")
-            print(result_auto.stderr[:1500])
-            
-        print("\nFichiers créés:")
-        for f in work_dir.iterdir():
-            if f.name.startswith("test_auto"):
-                print(f"  {f.name} ({f.stat().st_size} bytes)")
-                if f.suffix in ['.srt', '.vtt']:
-                    content = f.read_text(encoding='utf-8', errors='ignore')
-                    print(f"    Contenu (200 premiers chars): {repr(content[:200])}")
-                    
-    except Exception as e:
-        print(f"ERREUR dans test 3: {e}")
-        traceback.print_exc()
-    
+
+        for number, (title, prefix, opts, cli_args, max_chars), reason, future in zip(
+            (2, 3), _DOWNLOAD_TESTS, skip_reasons, futures
+        ):
+            logger.info("%s", f"\n{number}. {title}")
+            logger.info("%s", "-" * 50)
+
+            if reason:
+                logger.info("%s", f"SKIP: {reason}")
+                continue
+
+            try:
+                _print_download_test(future.result(), url, work_dir, prefix, opts, cli_args, max_chars)
+            except Exception as e:
+                logger.info("%s", f"ERREUR dans test {number}: {e}")
+                log_traceback(e)
+
     # Test 4: Information sur la vidéo
-    print("\n4. INFORMATIONS SUR LA VIDÉO")
-    print("-" * 50)
-    
+    logger.info("%s", "\n4. INFORMATIONS SUR LA VIDÉO")
+    logger.info("%s", "-" * 50)
+
     try:
-        cmd_info = ["yt-dlp", "--dump-json", "--no-warnings", url]
-        print(f"Commande: {' '.join(cmd_info)}")
-        
-        result_info = subprocess.run(cmd_info, capture_output=True, text=True, timeout=60)
-        
-        if result_info.returncode == 0:
-            import json
-            data = json.loads(result_info.stdout)
-            
-            print(f"Titre: {data.get('title', 'N/A')}")
-            print(f"Durée: {data.get('duration', 'N/A')} secondes")
-            print(f"Uploader: {data.get('uploader', 'N/A')}")
-            
-            # Informations sur les sous-titres dans les métadonnées
-            subtitles = data.get('subtitles', {})
-            auto_captions = data.get('automatic_captions', {})
-            
-            print(f"\nSubtitles manuels dans JSON: {list(subtitles.keys())}")
-            for lang, subs in subtitles.items():
-                print(f"  {lang}: {len(subs)} formats - {[s.get('ext', 'unknown') for s in subs]}")
-                
-            print(f"\nAutomatic captions dans JSON: {list(auto_captions.keys())}")
-            if auto_captions:
-                # Juste les 3 premières langues pour pas surcharger
-                for i, (lang, subs) in enumerate(auto_captions.items()):
-                    if i < 3:
-                        print(f"  {lang}: {len(subs)} formats - {[s.get('ext', 'unknown') for s in subs]}")
-                if len(auto_captions) > 3:
-                    print(f"  ... et {len(auto_captions) - 3} autres langues")
-        else:
-            print(f"Erreur récupération JSON: {result_info.stderr}")
-            
+        if info is None:
+            raise RuntimeError(f"Métadonnées indisponibles: {info_error}")
+        _test_video_info(info)
     except Exception as e:
-        print(f"ERREUR dans test 4: {e}")
-        traceback.print_exc()
-    
+        logger.info("%s", f"ERREUR dans test 4: {e}")
+        log_traceback(e)
+
     # Résumé des fichiers créés
-    print("\n5. RESUME DES FICHIERS CREES")
-    print("-" * 50)
-    
-    print("Contenu du répertoire debug_work:")
+    logger.info("%s", "\n5. RESUME DES FICHIERS CREES")
+    logger.info("%s", "-" * 50)
+
+    logger.info("%s", "Contenu du répertoire debug_work:")
     try:
         for f in sorted(work_dir.iterdir()):
-            print(f"  {f.name} ({f.stat().st_size} bytes)")
+            logger.info("%s", f"  {f.name} ({f.stat().st_size} bytes)")
     except Exception as e:
-        print(f"Erreur listing: {e}")
-    
-    print("\n" + "="*80)
-    print("FIN DU DIAGNOSTIC")
-    print("="*80)
+        logger.info("%s", f"Erreur listing: {e}")
+
+    logger.info("%s", "\n" + "="*80)
+    logger.info("%s", "FIN DU DIAGNOSTIC")
+    logger.info("%s", "="*80)
 
 if __name__ == "__main__":
-    debug_detailed_subtitles()
\ No newline at end of file
+    debug_detailed_subtitles()
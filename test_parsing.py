@@ -2,73 +2,100 @@
 """Test du parsing exact de get_available_subtitles."""
 
 import sys
+import tempfile
+from pathlib import Path
 sys.path.insert(0, '.')
 
 from ytsplit.providers.youtube import create_youtube_provider
 from ytsplit.config import Settings
 
-def test_parsing():
-    """Test le parsing exact."""
+# Sortie bufferisée et cache disque des métadonnées partagés avec debug_detailed
+from debug_common import cached_info, log_traceback, logger, output_buffer
+
+DEFAULT_URL = "https://www.youtube.com/watch?v=8JFMiIlSdlg"
+
+def test_parsing(urls=None):
+    """Test le parsing exact pour chaque URL (par défaut la vidéo de référence)."""
+    try:
+        _test_parsing(urls or [DEFAULT_URL])
+    finally:
+        output_buffer.flush()
+
+def _test_parsing(urls):
+    """Corps du test (sortie bufferisée par ``logger``).
+    
+    Settings, provider et répertoire temporaire sont créés une seule fois et
+    partagés par toutes les URLs: leurs caches servent d'une URL à l'autre.
+    """
     
-    print("="*60)
-    print("TEST DU PARSING get_available_subtitles")
-    print("="*60)
+    logger.info("%s", "="*60)
+    logger.info("%s", "TEST DU PARSING get_available_subtitles")
+    logger.info("%s", "="*60)
     
     settings = Settings()
     provider = create_youtube_provider(settings)
     
-    url = "https://www.youtube.com/watch?v=8JFMiIlSdlg"
+    with tempfile.TemporaryDirectory() as tmpdir:
+        work_dir = Path(tmpdir)
+        for url in urls:
+            logger.info("%s", f"\n--- {url} ---")
+            _test_url(provider, url, work_dir)
+
+def _test_url(provider, url, work_dir):
+    """Liste puis télécharge les sous-titres d'une URL."""
     
-    print("1. Test avec notre fonction get_available_subtitles:")
+    # Métadonnées depuis le cache disque partagé: le provider ne les ré-extrait pas
+    try:
+        provider._info_cache.setdefault(url, cached_info(url))
+    except Exception as e:
+        logger.info("%s", f"   ! Métadonnées indisponibles: {e}")
+    
+    logger.info("%s", "1. Test avec notre fonction get_available_subtitles:")
     try:
         result = provider.get_available_subtitles(url)
-        print(f"   Résultat: {result}")
-        print(f"   Nombre de langues: {len(result)}")
+        logger.info("%s", f"   Résultat: {result}")
+        logger.info("%s", f"   Nombre de langues: {len(result)}")
         
         if 'en-US' in result:
-            print(f"   en-US trouvé: {result['en-US']}")
+            logger.info("%s", f"   en-US trouvé: {result['en-US']}")
         if 'en' in result:
-            print(f"   en trouvé: {result['en']}")
+            logger.info("%s", f"   en trouvé: {result['en']}")
+        
+        # download_subtitles réutilisera cette liste sans relancer yt-dlp
+        logger.info("%s", f"   Liste mémorisée par le provider: {url in provider._subtitles_cache}")
             
     except Exception as e:
-        print(f"   ERREUR: {e}")
-        import traceback
-        traceback.print_exc()
-    
-    print("\n2. Test direct du téléchargement avec notre fonction:")
+        logger.info("%s", f"   ERREUR: {e}")
+        log_traceback(e)
     
-    import tempfile
-    from pathlib import Path
+    logger.info("%s", "\n2. Test direct du téléchargement avec notre fonction:")
     
-    with tempfile.TemporaryDirectory() as tmpdir:
-        work_dir = Path(tmpdir)
+    try:
+        # Test avec notre fonction modifiée
+        subtitle_path = provider.download_subtitles(
+            url=url, 
+            languages=["en", "en-US"], 
+            output_dir=work_dir
+        )
         
-        try:
-            # Test avec notre fonction modifiée
-            subtitle_path = provider.download_subtitles(
-                url=url, 
-                languages=["en", "en-US"], 
-                output_dir=work_dir
-            )
-            
-            print(f"   Résultat download_subtitles: {subtitle_path}")
+        logger.info("%s", f"   Résultat download_subtitles: {subtitle_path}")
+        
+        if subtitle_path and subtitle_path.exists():
+            logger.info("%s", f"   Fichier créé: {subtitle_path.name} ({subtitle_path.stat().st_size} bytes)")
+            with subtitle_path.open('rb') as fh:
+                head = fh.read(256)
+            logger.info("%s", f"   Extrait: {repr(head.decode('utf-8', errors='ignore')[:150])}")
+        else:
+            logger.info("%s", "   Aucun fichier créé")
             
-            if subtitle_path and subtitle_path.exists():
-                print(f"   Fichier créé: {subtitle_path.name} ({subtitle_path.stat().st_size} bytes)")
-                content = subtitle_path.read_text(encoding='utf-8', errors='ignore')
-                print(f"   Extrait: {repr(content[:150])}")
-            else:
-                print("   Aucun fichier créé")
+            # Lister ce qui a été créé
+            logger.info("%s", "   Fichiers dans le répertoire:")
+            for f in work_dir.iterdir():
+                logger.info("%s", f"     - {f.name} ({f.stat().st_size} bytes)")
                 
-                # Lister ce qui a été créé
-                print("   Fichiers dans le répertoire:")
-                for f in work_dir.iterdir():
-                    print(f"     - {f.name} ({f.stat().st_size} bytes)")
-                    
-        except Exception as e:
-            print(f"   ERREUR download_subtitles: {e}")
-            import traceback
-            traceback.print_exc()
+    except Exception as e:
+        logger.info("%s", f"   ERREUR download_subtitles: {e}")
+        log_traceback(e)
 
 if __name__ == "__main__":
-    test_parsing()
\ No newline at end of file
+    test_parsing(sys.argv[1:])
@@ -1,20 +1,28 @@
 ﻿"""Interface ligne de commande pour YouTube Chapter Splitter."""
 
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager, nullcontext
 from pathlib import Path
-from typing import List, Optional, Annotated
+from typing import TYPE_CHECKING, List, Optional, Annotated
+from urllib.parse import parse_qs, urlsplit
+import shutil
+import signal
 import subprocess
+import tempfile
+import threading
+import time
 import typer
 from rich.console import Console
-from rich.progress import Progress, SpinnerColumn, TextColumn
-from rich.panel import Panel
-from rich.table import Table
 
 from .config import Settings
-from .models import VideoMeta, ProcessingStats, SplitResult
-from .providers.youtube import create_youtube_provider, YouTubeError
-from .planning.plan import create_split_planner, PlanningError
-from .cutting.ffmpeg import create_ffmpeg_cutter, FFmpegError
-from .subtitles import SubtitleDownloader, SubtitleSlicer, create_subtitle_parser
+from .models import VideoMeta, ProcessingStats, SplitPlanItem, SplitResult
+
+if TYPE_CHECKING:
+    from rich.progress import Progress
+    from .providers.youtube import YouTubeProvider
+
+# rich.progress, rich.panel et rich.table sont importés dans les fonctions qui
+# les utilisent: --help et --version n'en paient pas le coût au démarrage
 
 # Configuration Typer
 app = typer.Typer(
@@ -26,6 +34,9 @@ app = typer.Typer(
 
 console = Console()
 
+# Hôtes YouTube acceptés (recherche par hash sur le nom d'hôte, sans regex)
+YOUTUBE_HOSTS = frozenset({"youtube.com", "www.youtube.com", "m.youtube.com", "youtu.be", "www.youtu.be"})
+
 
 def version_callback(show_version: bool):
     """Callback pour afficher la version."""
@@ -57,6 +68,15 @@ def split(
     
     # Options de traitement
     max_parallel: Annotated[Optional[int], typer.Option("--max-parallel", help="Nombre de processus FFmpeg parallÃ¨les")] = None,
+    max_videos: Annotated[Optional[int], typer.Option("--max-videos", help="Nombre de vidéos traitées simultanément")] = None,
+    ffmpeg_threads: Annotated[Optional[int], typer.Option(
+        "--ffmpeg-threads", envvar="YTSPLIT_FFMPEG_THREADS",
+        help="Threads FFmpeg par découpage (défaut: cœurs CPU répartis entre les découpages)"
+    )] = None,
+    single_pass: Annotated[Optional[bool], typer.Option(
+        "--single-pass/--no-single-pass",
+        help="Découper tous les chapitres en une seule passe FFmpeg (source lue une fois)"
+    )] = None,
     tolerance: Annotated[Optional[float], typer.Option("--tolerance", help="TolÃ©rance de durÃ©e en secondes")] = None,
     
     # Options de recadrage
@@ -67,7 +87,7 @@ def split(
     
     # Options GPU NVIDIA
     gpu: Annotated[bool, typer.Option("--gpu", help="Activer l'accÃ©lÃ©ration GPU NVIDIA (NVENC)")] = False,
-    gpu_encoder: Annotated[Optional[str], typer.Option("--gpu-encoder", help="Encodeur GPU (h264_nvenc, hevc_nvenc)")] = None,
+    gpu_encoder: Annotated[Optional[str], typer.Option("--gpu-encoder", help="Encodeur GPU (h264_nvenc, hevc_nvenc, h264_qsv, h264_videotoolbox, h264_amf, ... ou auto)")] = None,
     gpu_preset: Annotated[Optional[str], typer.Option("--gpu-preset", help="Preset GPU (p1=rapide, p7=qualitÃ©, dÃ©faut p7)")] = None,
     gpu_cq: Annotated[Optional[int], typer.Option("--gpu-cq", help="Constant Quality GPU (0-51, dÃ©faut 18)")] = None,
     
@@ -90,7 +110,7 @@ def split(
     verbose: Annotated[bool, typer.Option("--verbose", "-v", help="Mode verbeux")] = False,
     
     # Version
-    version: Annotated[bool, typer.Option("--version", callback=version_callback, help="Afficher la version")] = False,
+    version: Annotated[bool, typer.Option("--version", callback=version_callback, is_eager=True, help="Afficher la version")] = False,
 ):
     """
     DÃ©coupe une ou plusieurs vidÃ©os YouTube en chapitres individuels.
@@ -133,82 +153,67 @@ def split(
         'work_dir': work,
         'quality': quality,
         'dry_run': dry_run,
+        'single_pass': single_pass,
         'keep_source': keep_source,
         'skip_existing': skip_existing,
         'verbose': verbose,
     })
     
-    # Appliquer les overrides depuis la ligne de commande
-    if crf is not None:
-        settings.x264.crf = crf
-    if preset is not None:
-        settings.x264.preset = preset
-    if audio_bitrate is not None:
-        settings.audio.bitrate = audio_bitrate
-    if template is not None:
-        settings.naming.template = template
-    if max_parallel is not None:
-        settings.parallel.max_workers = max_parallel
-    if tolerance is not None:
-        settings.validation.tolerance_seconds = tolerance
-    if export_manifest is not None:
-        settings.manifest.export = export_manifest.split(',')
-    
-    # Appliquer les options de crop
+    # Appliquer les overrides depuis la ligne de commande: chaque section est
+    # revalidée en une passe (bornes crf/cq, template, fichier SRT...)
     crop_options_provided = any([crop_top, crop_bottom, crop_left, crop_right])
-    if crop_options_provided:
-        settings.crop.enabled = True
-        if crop_top is not None:
-            settings.crop.top = crop_top
-        if crop_bottom is not None:
-            settings.crop.bottom = crop_bottom
-        if crop_left is not None:
-            settings.crop.left = crop_left
-        if crop_right is not None:
-            settings.crop.right = crop_right
-    
-    # Appliquer les options GPU
-    if gpu:
-        settings.gpu.enabled = True
-        if gpu_encoder is not None:
-            settings.gpu.encoder = gpu_encoder
-        if gpu_preset is not None:
-            settings.gpu.preset = gpu_preset
-        if gpu_cq is not None:
-            settings.gpu.cq = gpu_cq
-    
-    # Appliquer les options de sous-titres
+    nested_overrides = {
+        'x264': {'crf': crf, 'preset': preset},
+        # Un bitrate explicite n'a de sens qu'avec ré-encodage de l'audio
+        'audio': {'bitrate': audio_bitrate, 'reencode': True if audio_bitrate is not None else None},
+        'naming': {'template': template},
+        'parallel': {'max_workers': max_parallel, 'max_videos': max_videos, 'threads_per_job': ffmpeg_threads},
+        'validation': {'tolerance_seconds': tolerance},
+        'manifest': {'export': export_manifest.split(',') if export_manifest is not None else None},
+        # Options de crop
+        'crop': {
+            'enabled': True, 'top': crop_top, 'bottom': crop_bottom,
+            'left': crop_left, 'right': crop_right,
+        } if crop_options_provided else {},
+        # Options GPU
+        'gpu': {
+            'enabled': True, 'encoder': gpu_encoder, 'preset': gpu_preset, 'cq': gpu_cq,
+        } if gpu else {},
+    }
+    
+    # Options de sous-titres
     if no_subtitles:
         # DÃ©sactiver complÃ¨tement les sous-titres si demandÃ©
-        settings.subtitles.enabled = False
+        nested_overrides['subtitles'] = {'enabled': False}
     else:
         # Activer par dÃ©faut les sous-titres
-        settings.subtitles.enabled = True
-        
-        # Si un fichier SRT externe est fourni, l'utiliser
-        if subtitles_file is not None:
-            settings.subtitles.external_srt_path = subtitles_file
-            settings.subtitles.auto_download = False  # Utilise fichier externe au lieu du tÃ©lÃ©chargement
-        else:
-            # Utiliser le tÃ©lÃ©chargement automatique des sous-titres YouTube
-            settings.subtitles.auto_download = False
-        
-        # Appliquer les autres options de sous-titres
-        if subtitles_languages is not None:
-            settings.subtitles.languages = [lang.strip() for lang in subtitles_languages.split(',')]
-        if subtitles_offset is not None:
-            settings.subtitles.offset_s = subtitles_offset
-        if subtitles_min_duration is not None:
-            settings.subtitles.min_duration_ms = subtitles_min_duration
-        if subtitles_encoding is not None:
-            settings.subtitles.encoding = subtitles_encoding
+        nested_overrides['subtitles'] = {
+            'enabled': True,
+            # Fichier SRT externe éventuel; pas de téléchargement automatique yt-dlp
+            'external_srt_path': subtitles_file,
+            'auto_download': False,
+            'languages': [lang.strip() for lang in subtitles_languages.split(',')] if subtitles_languages is not None else None,
+            'offset_s': subtitles_offset,
+            'min_duration_ms': subtitles_min_duration,
+            'encoding': subtitles_encoding,
+        }
+    
+    try:
+        settings = apply_nested_overrides(settings, nested_overrides)
+    except ValueError as e:
+        console.print(f"[bold red]Option invalide:[/bold red] {e}")
+        raise typer.Exit(1)
     
     # Affichage de la configuration si mode verbeux
     if settings.verbose:
         show_configuration(settings)
     
+    # Outils externes vérifiés une fois pour tout le lot, avant tout téléchargement
+    check_external_tools(settings)
+    
     # Validation des URLs
-    validated_urls = validate_youtube_urls(urls)
+    validated_urls = validate_youtube_urls(urls, verbose=settings.verbose)
+    settings.ensure_dirs()
     
     console.print(f"\n[bold blue]>>> Traitement de {len(validated_urls)} vidÃ©o(s)[/bold blue]\n")
     
@@ -221,22 +226,64 @@ def split(
         total_processing_time_s=0.0
     )
     
-    for i, url in enumerate(validated_urls, 1):
-        console.print(f"[bold cyan]Video {i}/{len(validated_urls)}:[/bold cyan] {url}")
-        
-        try:
-            stats = process_single_video(url, settings)
+    # Vidéos traitées simultanément (sessions NVENC limitées en GPU)
+    max_videos = min(settings.parallel.max_videos, len(validated_urls))
+    if settings.gpu.enabled:
+        from .cutting.ffmpeg import NVENC_MAX_SESSIONS
+        max_videos = min(max_videos, NVENC_MAX_SESSIONS)
+    
+    # Un seul provider pour tout le lot: ses caches (métadonnées, listes de
+    # sous-titres) servent d'une vidéo à l'autre
+    from .providers.youtube import create_youtube_provider
+    provider = create_youtube_provider(settings)
+    
+    # Une seule barre de progression pour tout le lot (une tâche par vidéo)
+    # Ctrl-C : statistiques partielles affichées avant de quitter
+    with report_stats_on_interrupt(all_stats), create_progress() as progress:
+        if max_videos > 1:
+            # Plusieurs vidéos en vol: le téléchargement de l'une recouvre le
+            # découpage FFmpeg d'une autre (process_single_video ne modifie pas settings)
+            stop = threading.Event()
+            
+            def run_video(index: int, url: str) -> ProcessingStats:
+                console.print(f"[bold cyan]Video {index}/{len(validated_urls)}:[/bold cyan] {url}")
+                return process_single_video(
+                    url, settings, progress, provider, label=youtube_video_id(url) or url, stop=stop
+                )
             
-            # Mise Ã  jour des statistiques globales
-            all_stats.total_chapters += stats.total_chapters
-            all_stats.successful_chapters += stats.successful_chapters
-            all_stats.failed_chapters += stats.failed_chapters
-            all_stats.total_duration_s += stats.total_duration_s
-            all_stats.total_processing_time_s += stats.total_processing_time_s
+            # Ctrl-C: les vidéos pas encore commencées sont annulées; celles en cours
+            # voient ``stop`` et s'arrêtent au plus tôt (téléchargement tué, chapitres
+            # pas encore lancés abandonnés). L'interpréteur attend encore la fin des
+            # découpages FFmpeg déjà lancés avant de quitter.
+            executor = ThreadPoolExecutor(max_workers=max_videos)
+            try:
+                futures = {
+                    executor.submit(run_video, i, url): url
+                    for i, url in enumerate(validated_urls, 1)
+                }
+                for future in as_completed(futures):
+                    try:
+                        all_stats += future.result()
+                    except Exception as e:
+                        console.print(f"[bold red]>>> Erreur lors du traitement de {futures[future]}:[/bold red] {str(e)}")
+            except KeyboardInterrupt:
+                stop.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            executor.shutdown()
+        else:
+            for i, url in enumerate(validated_urls, 1):
+                console.print(f"[bold cyan]Video {i}/{len(validated_urls)}:[/bold cyan] {url}")
             
-        except Exception as e:
-            console.print(f"[bold red]>>> Erreur lors du traitement:[/bold red] {str(e)}")
-            continue
+                try:
+                    stats = process_single_video(url, settings, progress, provider)
+                
+                    # Mise Ã  jour des statistiques globales
+                    all_stats += stats
+                
+                except Exception as e:
+                    console.print(f"[bold red]>>> Erreur lors du traitement:[/bold red] {str(e)}")
+                    continue
     
     # Affichage des statistiques finales
     show_final_stats(all_stats)
@@ -277,30 +324,96 @@ def load_settings(config_path: Optional[Path], overrides: dict) -> Settings:
     else:
         settings = Settings()
     
-    # Appliquer les overrides de la ligne de commande
-    for key, value in overrides.items():
-        if value is not None:
-            setattr(settings, key, value)
+    # Appliquer en une fois les overrides fournis en ligne de commande
+    provided = {key: value for key, value in overrides.items() if value is not None}
+    if provided:
+        settings = settings.model_copy(update=provided)
     
     return settings
 
 
-def validate_youtube_urls(urls: List[str]) -> List[str]:
-    """Valide que les URLs sont bien des URLs YouTube."""
-    import re
+def apply_nested_overrides(settings: Settings, nested: dict) -> Settings:
+    """Applique des overrides par section (``{'x264': {'crf': 20}}``), None ignorés.
+    
+    Chaque section modifiée est revalidée une seule fois, puis les sections
+    sont remplacées ensemble par un unique ``model_copy``.
+    
+    Raises:
+        ValueError: Si une valeur est refusée par la validation de sa section
+    """
+    updates = {}
+    for section, values in nested.items():
+        provided = {key: value for key, value in values.items() if value is not None}
+        if provided:
+            current = getattr(settings, section)
+            updates[section] = type(current).model_validate({**current.model_dump(), **provided})
+    
+    return settings.model_copy(update=updates) if updates else settings
+
+
+def check_external_tools(settings: Settings) -> None:
+    """Vérifie que les outils externes nécessaires sont dans le PATH."""
+    required = ["yt-dlp"] if settings.dry_run else ["yt-dlp", "ffmpeg", "ffprobe"]
+    missing = [tool for tool in required if shutil.which(tool) is None]
+    
+    if missing:
+        console.print(f"[bold red]❌ Outil(s) introuvable(s) dans le PATH: {', '.join(missing)}[/bold red]")
+        raise typer.Exit(2)
+    
+    settings._tools_checked = True
+
+
+def youtube_video_id(url: str) -> Optional[str]:
+    """Identifiant de la vidéo désignée par une URL YouTube (watch, embed ou youtu.be).
     
-    youtube_patterns = [
-        r'https?://(www\.)?youtube\.com/watch\?v=[\w-]+',
-        r'https?://youtu\.be/[\w-]+',
-        r'https?://(www\.)?youtube\.com/embed/[\w-]+',
-    ]
+    Returns:
+        Optional[str]: L'identifiant, ou None si l'URL n'est pas une URL de vidéo YouTube
+    """
+    try:
+        parts = urlsplit(url)
+    except ValueError:
+        return None
+    
+    if parts.scheme not in ("http", "https") or parts.hostname not in YOUTUBE_HOSTS:
+        return None
+    
+    if parts.hostname.endswith("youtu.be"):
+        video_id = parts.path[1:]
+    elif parts.path.startswith("/embed/"):
+        video_id = parts.path[len("/embed/"):]
+    elif parts.path == "/watch":
+        video_id = (parse_qs(parts.query).get("v") or [""])[0]
+    else:
+        return None
+    return video_id or None
+
+
+def is_youtube_url(url: str) -> bool:
+    """Vérifie qu'une URL désigne une vidéo YouTube (watch, embed ou youtu.be)."""
+    return youtube_video_id(url) is not None
+
+
+def validate_youtube_urls(urls: List[str], verbose: bool = False) -> List[str]:
+    """Valide que les URLs sont bien des URLs YouTube.
     
+    Les doublons (même vidéo, quelle que soit la forme de l'URL ou ses
+    paramètres, ex: ``&t=30``) sont écartés en conservant l'ordre.
+    """
     validated = []
+    seen_ids = set()
+    duplicates = 0
     for url in urls:
-        if any(re.match(pattern, url) for pattern in youtube_patterns):
-            validated.append(url)
-        else:
+        video_id = youtube_video_id(url)
+        if video_id is None:
             console.print(f"[yellow]! URL ignorÃ©e (pas YouTube): {url}[/yellow]")
+        elif video_id in seen_ids:
+            duplicates += 1
+        else:
+            seen_ids.add(video_id)
+            validated.append(url)
+    
+    if duplicates and verbose:
+        console.print(f"[dim]> {duplicates} URL(s) en double ignorée(s)[/dim]")
     
     if not validated:
         console.print("[bold red]âŒ Aucune URL YouTube valide fournie[/bold red]")
@@ -309,32 +422,125 @@ def validate_youtube_urls(urls: List[str]) -> List[str]:
     return validated
 
 
-def process_single_video(url: str, settings: Settings) -> ProcessingStats:
-    """Traite une seule vidÃ©o et retourne les statistiques."""
-    import time
-    start_time = time.time()
+def create_progress() -> "Progress":
+    """Crée la barre de progression du découpage."""
+    from rich.progress import Progress, TextColumn
+    
+    return Progress(
+        TextColumn("[progress.description]{task.description}"),
+        console=console,
+        expand=True
+    )
+
+
+@contextmanager
+def report_stats_on_interrupt(stats: ProcessingStats):
+    """Affiche les statistiques partielles puis quitte (code 130) sur Ctrl-C.
+
+    Les chapitres déjà écrits sont conservés : une relance avec skip_existing
+    reprend là où le traitement s'est arrêté.
+    """
+    def _handler(signum, frame):
+        console.print("\n[bold yellow]! Interruption demandée (Ctrl-C)[/bold yellow]")
+        show_final_stats(stats)
+        raise KeyboardInterrupt
+
+    # signal.signal n'est autorisé que depuis le thread principal
+    if threading.current_thread() is not threading.main_thread():
+        yield
+        return
+
+    previous = signal.signal(signal.SIGINT, _handler)
+    try:
+        yield
+    except KeyboardInterrupt:
+        raise typer.Exit(130)
+    finally:
+        signal.signal(signal.SIGINT, previous)
+
+
+class _VideoInterrupted(Exception):
+    """Arrêt demandé pendant le traitement d'une vidéo."""
+
+
+class _LabelledConsole:
+    """Console préfixant les messages texte par l'identifiant de la vidéo."""
+    
+    def __init__(self, label: str):
+        from rich.markup import escape
+        self._prefix = f"[dim]\\[{escape(label)}][/dim]"
+    
+    def print(self, *objects, **kwargs) -> None:
+        if objects and isinstance(objects[0], str):
+            objects = (f"{self._prefix}{objects[0]}", *objects[1:])
+        console.print(*objects, **kwargs)
+
+
+def process_single_video(
+    url: str,
+    settings: Settings,
+    progress: Optional["Progress"] = None,
+    provider: Optional["YouTubeProvider"] = None,
+    label: Optional[str] = None,
+    stop: Optional[threading.Event] = None
+) -> ProcessingStats:
+    """Traite une seule vidÃ©o et retourne les statistiques.
+    
+    ``progress`` permet de partager une barre de progression déjà affichée
+    entre plusieurs vidéos; à défaut, une barre propre à la vidéo est créée.
+    ``provider`` permet de même de réutiliser un provider YouTube entre vidéos.
+    ``label`` préfixe chaque message (vidéos traitées en parallèle).
+    ``stop`` demande l'arrêt (Ctrl-C): les étapes restantes sont abandonnées.
+    """
+    out = _LabelledConsole(label) if label else console
+    
+    def check_stop() -> None:
+        if stop is not None and stop.is_set():
+            raise _VideoInterrupted()
+    # Imports différés: inutiles pour --help, --version et config-init
+    from .providers.youtube import create_youtube_provider, YouTubeError
+    from .planning.plan import create_split_planner, PlanningError
+    from .cutting.ffmpeg import create_ffmpeg_cutter, FFmpegError, SINGLE_PASS_MIN_CHAPTERS
+    from .subtitles import SubtitleDownloader, SubtitleSlicer
+    from rich.console import Group
+    from rich.panel import Panel
+    from rich.table import Table
+    from rich.text import Text
+    
+    start_time = time.perf_counter()
+    settings.ensure_dirs()
     
     try:
-        # CrÃ©er le provider YouTube
-        provider = create_youtube_provider(settings)
+        # CrÃ©er le provider YouTube (sauf s'il est partagé par l'appelant)
+        if provider is None:
+            provider = create_youtube_provider(settings)
         
-        console.print("  > Extraction des mÃ©tadonnÃ©es...")
+        out.print("  > Extraction des mÃ©tadonnÃ©es...")
         
         # Extraire les mÃ©tadonnÃ©es
         meta = provider.get_video_info(url)
         
-        console.print(f"  > VidÃ©o: [bold]{meta.title}[/bold]")
-        console.print(f"  > DurÃ©e: {meta.duration_s / 60:.1f} minutes")
-        console.print(f"  > {len(meta.chapters)} chapitre(s) dÃ©tectÃ©(s)")
+        out.print(f"  > VidÃ©o: [bold]{meta.title}[/bold]")
+        out.print(f"  > DurÃ©e: {meta.duration_s / 60:.1f} minutes")
+        out.print(f"  > {len(meta.chapters)} chapitre(s) dÃ©tectÃ©(s)")
         
         # Afficher les chapitres
-        for chapter in meta.chapters:
-            duration = chapter.end_s - chapter.start_s
-            console.print(f"     {chapter.index:2d}. {chapter.title} ({duration:.1f}s)")
+        if meta.chapters:
+            chapters_table = Table(show_header=False, box=None, padding=(0, 1, 0, 5))
+            chapters_table.add_column()
+            chapters_table.add_column(justify="right")
+            # Cellules Text: pas d'analyse du balisage Rich, et un titre
+            # contenant des crochets ("[Live]") s'affiche tel quel
+            for chapter in meta.chapters:
+                chapters_table.add_row(
+                    Text(f"{chapter.index:2d}. {chapter.title}"),
+                    Text(f"{chapter.end_s - chapter.start_s:.1f}s")
+                )
+            out.print(chapters_table)
         
         if settings.dry_run:
-            console.print("  [yellow]> Mode simulation - pas de tÃ©lÃ©chargement ni de dÃ©coupage[/yellow]")
-            processing_time = time.time() - start_time
+            out.print("  [yellow]> Mode simulation - pas de tÃ©lÃ©chargement ni de dÃ©coupage[/yellow]")
+            processing_time = time.perf_counter() - start_time
             
             return ProcessingStats(
                 total_chapters=len(meta.chapters),
@@ -344,102 +550,131 @@ def process_single_video(url: str, settings: Settings) -> ProcessingStats:
                 total_processing_time_s=processing_time
             )
         
+        # Raccourci: si tous les fichiers de sortie existent (un seul parcours du
+        # répertoire), les valider sans télécharger la vidéo ni lancer FFmpeg
+        if settings.skip_existing:
+            planner = create_split_planner(settings)
+            if planner.outputs_present(meta):
+                try:
+                    to_process, _ = planner.filter_existing_files(planner.build_split_plan(meta))
+                except PlanningError:
+                    to_process = None
+                
+                if to_process == []:
+                    out.print("  > Tous les chapitres sont dÃ©jÃ  traitÃ©s")
+                    processing_time = time.perf_counter() - start_time
+                    
+                    return ProcessingStats(
+                        total_chapters=len(meta.chapters),
+                        successful_chapters=len(meta.chapters),
+                        failed_chapters=0,
+                        total_duration_s=meta.duration_s,
+                        total_processing_time_s=processing_time
+                    )
+        
+        # Sous-titres YouTube récupérés en parallèle du téléchargement vidéo
+        # (processus yt-dlp indépendants); le résultat est affiché plus bas
+        subtitle_downloader = None
+        subtitle_future = None
+        if settings.subtitles.enabled and not settings.subtitles.external_srt_path:
+            subtitle_downloader = SubtitleDownloader(settings.subtitles, provider)
+            subtitle_executor = ThreadPoolExecutor(max_workers=1)
+            subtitle_future = subtitle_executor.submit(
+                subtitle_downloader.get_subtitle_file, url, meta.video_id, settings.work_dir
+            )
+            subtitle_executor.shutdown(wait=False)
+        
         # TÃ©lÃ©chargement (si pas en mode dry_run)
-        console.print("  > VÃ©rification du cache...")
+        check_stop()
+        out.print("  > VÃ©rification du cache...")
         existing_file = provider.get_video_file_path(meta.video_id)
         
         if existing_file and settings.skip_existing:
-            console.print(f"  > Fichier dÃ©jÃ  en cache: {existing_file.name}")
+            out.print(f"  > Fichier dÃ©jÃ  en cache: {existing_file.name}")
             video_file = existing_file
         else:
-            console.print("  > TÃ©lÃ©chargement en cours... (cela peut prendre quelques minutes)")
-            video_file = provider.download_video(url)
-            console.print("  > TÃ©lÃ©chargement terminÃ©")
+            out.print("  > TÃ©lÃ©chargement en cours... (cela peut prendre quelques minutes)")
+            if progress is None:
+                video_file = provider.download_video(url)
+            else:
+                # Progression yt-dlp relayée dans la barre partagée (pas de rendu propre)
+                download_task = progress.add_task("Téléchargement", total=None)
+                
+                def _on_download_progress(downloaded: int, total: Optional[int]) -> None:
+                    check_stop()  # Lève l'arrêt dans le téléchargement: yt-dlp est tué
+                    done = f"{downloaded / 1024 / 1024:.1f} MB"
+                    if total:
+                        done += f" / {total / 1024 / 1024:.1f} MB ({100 * downloaded / total:.0f}%)"
+                    progress.update(download_task, description=f"Téléchargement: {done}")
+                
+                try:
+                    video_file = provider.download_video(url, progress_hook=_on_download_progress)
+                finally:
+                    progress.remove_task(download_task)
+            out.print("  > TÃ©lÃ©chargement terminÃ©")
             
-            console.print(f"  > Fichier tÃ©lÃ©chargÃ©: {video_file.name}")
-            console.print(f"    Taille: {video_file.stat().st_size / 1024 / 1024:.1f} MB")
+            out.print(f"  > Fichier tÃ©lÃ©chargÃ©: {video_file.name}")
+            out.print(f"    Taille: {video_file.stat().st_size / 1024 / 1024:.1f} MB")
         
         # Traitement des sous-titres
         subtitle_file = None
         if settings.subtitles.enabled:
-            console.print("  > Traitement des sous-titres...")
+            out.print("  > Traitement des sous-titres...")
             
             try:
-                # CrÃ©er le downloader de sous-titres
-                subtitle_downloader = SubtitleDownloader(settings.subtitles, provider)
-                
-                # RÃ©cupÃ©rer le fichier de sous-titres
-                subtitle_file = subtitle_downloader.get_subtitle_file(url, meta.video_id, settings.work_dir)
+                if subtitle_future is not None:
+                    # Récupération lancée avant le téléchargement de la vidéo
+                    subtitle_file = subtitle_future.result()
+                else:
+                    # CrÃ©er le downloader de sous-titres
+                    subtitle_downloader = SubtitleDownloader(settings.subtitles, provider)
+                    
+                    # RÃ©cupÃ©rer le fichier de sous-titres
+                    subtitle_file = subtitle_downloader.get_subtitle_file(url, meta.video_id, settings.work_dir)
                 
                 if subtitle_file:
-                    console.print(f"    > Sous-titres trouvÃ©s: {subtitle_file.language or 'langue inconnue'}")
-                    console.print(f"    Format: {subtitle_file.format}, {subtitle_file.entry_count} entrÃ©es")
+                    out.print(f"    > Sous-titres trouvÃ©s: {subtitle_file.language or 'langue inconnue'}")
+                    out.print(f"    Format: {subtitle_file.format}, {subtitle_file.entry_count} entrÃ©es")
                     
                     # Valider la synchronisation
                     if subtitle_downloader.validate_subtitle_sync(subtitle_file, meta.duration_s):
-                        console.print("    > Synchronisation validÃ©e")
+                        out.print("    > Synchronisation validÃ©e")
                     else:
-                        console.print("    [yellow]! Attention: synchronisation douteuse[/yellow]")
+                        out.print("    [yellow]! Attention: synchronisation douteuse[/yellow]")
                 else:
-                    console.print("    [yellow]! Aucun sous-titre disponible[/yellow]")
+                    out.print("    [yellow]! Aucun sous-titre disponible[/yellow]")
                     # Logs d'aide au diagnostic
                     try:
                         available = subtitle_downloader.list_available_subtitles(url)
                         if available:
                             langs = ", ".join(sorted(available.keys()))
-                            console.print(f"    > Sous-titres dÃ©tectÃ©s (yt-dlp): {langs}")
+                            out.print(f"    > Sous-titres dÃ©tectÃ©s (yt-dlp): {langs}")
                         # Afficher la derniÃ¨re erreur/commande yt-dlp si dispo (provider)
                         if hasattr(provider, 'last_ytdlp_error') and provider.last_ytdlp_error:
-                            console.print("    > DÃ©tail yt-dlp:")
-                            console.print(Panel(str(provider.last_ytdlp_error)[:2000], title="yt-dlp stderr", subtitle="tronquÃ©"))
+                            out.print("    > DÃ©tail yt-dlp:")
+                            out.print(Panel(str(provider.last_ytdlp_error)[:2000], title="yt-dlp stderr", subtitle="tronquÃ©"))
                         if hasattr(provider, 'last_ytdlp_command') and provider.last_ytdlp_command:
-                            console.print(f"    > DerniÃ¨re commande yt-dlp: {' '.join(provider.last_ytdlp_command)}")
-                        # Diagnostic direct: essayer `yt-dlp --list-subs` et afficher sortie
-                        console.print("    > Diagnostic list-subs (brut)")
-                        diag_cmds = []
-                        cookies_file = Path('cookies.txt')
-                        if cookies_file.exists():
-                            diag_cmds.append(["yt-dlp", "--list-subs", "--no-warnings", "--cookies", str(cookies_file), url])
-                        for b in ["firefox", "chrome", "edge"]:
-                            diag_cmds.append(["yt-dlp", "--list-subs", "--no-warnings", "--cookies-from-browser", b, url])
-                        diag_cmds.append(["yt-dlp", "--list-subs", "--no-warnings", url])
-                        shown = 0
-                        for dc in diag_cmds:
-                            try:
-                                r = subprocess.run(
-                                    dc,
-                                    capture_output=True,
-                                    text=True,
-                                    encoding="utf-8",
-                                    errors="replace",
-                                    timeout=30,
-                                )
-                                console.print(f"      $ {' '.join(dc)} -> rc={r.returncode}")
-                                if r.stdout:
-                                    console.print(Panel(r.stdout[:1200] if len(r.stdout) > 1200 else r.stdout, title="yt-dlp stdout", subtitle="tronquÃ©" if len(r.stdout) > 1200 else ""))
-                                if r.stderr:
-                                    console.print(Panel(r.stderr[:1200] if len(r.stderr) > 1200 else r.stderr, title="yt-dlp stderr", subtitle="tronquÃ©" if len(r.stderr) > 1200 else ""))
-                                shown += 1
-                                if shown >= 2:  # Ã©viter de trop inonder
-                                    break
-                            except Exception as _:
-                                continue
+                            out.print(f"    > DerniÃ¨re commande yt-dlp: {' '.join(provider.last_ytdlp_command)}")
+                        # Diagnostic direct (coûteux: plusieurs appels yt-dlp), en mode verbeux uniquement
+                        if settings.verbose:
+                            show_list_subs_diagnostic(url)
                     except Exception as _:
                         pass
                     
             except Exception as e:
-                console.print(f"    [yellow]! Erreur sous-titres (non critique): {e}[/yellow]")
+                out.print(f"    [yellow]! Erreur sous-titres (non critique): {e}[/yellow]")
                 subtitle_file = None
         
         # Planification du dÃ©coupage
-        console.print("  > Planification du dÃ©coupage...")
+        check_stop()
+        out.print("  > Planification du dÃ©coupage...")
         planner = create_split_planner(settings)
         
         try:
             split_plan = planner.build_split_plan(meta)
         except PlanningError as e:
-            console.print(f"  [red]> Erreur de planification: {e}[/red]")
-            processing_time = time.time() - start_time
+            out.print(f"  [red]> Erreur de planification: {e}[/red]")
+            processing_time = time.perf_counter() - start_time
             
             return ProcessingStats(
                 total_chapters=len(meta.chapters),
@@ -453,11 +688,11 @@ def process_single_video(url: str, settings: Settings) -> ProcessingStats:
         to_process, existing = planner.filter_existing_files(split_plan)
         
         if existing:
-            console.print(f"  > {len(existing)} chapitre(s) dÃ©jÃ  traitÃ©(s) et valide(s)")
+            out.print(f"  > {len(existing)} chapitre(s) dÃ©jÃ  traitÃ©(s) et valide(s)")
         
         if not to_process:
-            console.print("  > Tous les chapitres sont dÃ©jÃ  traitÃ©s")
-            processing_time = time.time() - start_time
+            out.print("  > Tous les chapitres sont dÃ©jÃ  traitÃ©s")
+            processing_time = time.perf_counter() - start_time
             
             return ProcessingStats(
                 total_chapters=len(meta.chapters),
@@ -467,57 +702,77 @@ def process_single_video(url: str, settings: Settings) -> ProcessingStats:
                 total_processing_time_s=processing_time
             )
         
-        console.print(f"  > {len(to_process)} chapitre(s) Ã  traiter")
+        out.print(f"  > {len(to_process)} chapitre(s) Ã  traiter")
+        
+        # Copie directe des chapitres débutant sur une keyframe (une sonde pour tout le plan)
+        if settings.stream_copy:
+            to_process = planner.assign_cut_modes(to_process, video_file)
+            copied = sum(item.mode == "copy" for item in to_process)
+            if copied:
+                out.print(f"  > {copied} chapitre(s) copié(s) sans ré-encodage (début sur keyframe)")
         
         # Estimation du temps de traitement
         estimates = planner.estimate_processing_time(to_process)
         estimated_minutes = estimates["estimated_processing_time"] / 60
-        console.print(f"  > Temps estimÃ©: {estimated_minutes:.1f} minutes")
+        out.print(f"  > Temps estimÃ©: {estimated_minutes:.1f} minutes")
         
         # DÃ©coupage avec FFmpeg
-        console.print("  > DÃ©coupage en cours...")
+        check_stop()
+        out.print("  > DÃ©coupage en cours...")
         cutter = create_ffmpeg_cutter(settings)
         
         results = []
         successful = 0
         failed = 0
         
-        # Progress bar pour le dÃ©coupage
-        with Progress(
-            TextColumn("[progress.description]{task.description}"),
-            console=console,
-            expand=True
-        ) as progress:
+        # Lignes par chapitre, affichées en un seul bloc (dans l'ordre des chapitres) à la fin
+        chapter_lines = []
+        
+        def record_result(plan_item: SplitPlanItem, result: SplitResult) -> None:
+            nonlocal successful, failed
+            results.append(result)
+            
+            if result.status == "OK":
+                successful += 1
+                if settings.verbose:
+                    duration = result.obtained_duration_s or 0
+                    chapter_lines.append((plan_item.chapter_index, f"    + Ch.{plan_item.chapter_index}: {duration:.1f}s"))
+            else:
+                failed += 1
+                chapter_lines.append((plan_item.chapter_index, f"    - Ch.{plan_item.chapter_index}: {result.message}"))
+        
+        # Progress bar pour le dÃ©coupage (mise à jour depuis le thread principal uniquement)
+        progress_context = create_progress() if progress is None else nullcontext(progress)
+        with progress_context as progress:
             task = progress.add_task("DÃ©coupage des chapitres", total=len(to_process))
             
-            for plan_item in to_process:
-                try:
-                    progress.update(task, description=f"Chapitre {plan_item.chapter_index}: {plan_item.chapter_title[:30]}...")
-                    
-                    result = cutter.cut_precise(video_file, plan_item)
-                    results.append(result)
-                    
-                    if result.status == "OK":
-                        successful += 1
-                        if settings.verbose:
-                            duration = result.obtained_duration_s or 0
-                            console.print(f"    + Ch.{plan_item.chapter_index}: {duration:.1f}s")
-                    else:
-                        failed += 1
-                        console.print(f"    - Ch.{plan_item.chapter_index}: {result.message}")
-                    
-                except Exception as e:
-                    failed += 1
-                    console.print(f"    - Ch.{plan_item.chapter_index}: Erreur inattendue - {e}")
-                
-                progress.advance(task)
+            def on_segment_done(done: int, total: int, title: str) -> None:
+                progress.update(task, completed=done, description=f"Chapitre {done}/{total}: {title[:30]}...")
+            
+            if settings.single_pass and len(to_process) > SINGLE_PASS_MIN_CHAPTERS:
+                # Une seule lecture de la source; la progression suit la position d'encodage
+                cut_results = cutter.cut_all_in_one(
+                    video_file, to_process, progress_callback=on_segment_done, stop_event=stop
+                )
+            else:
+                # Chapitres découpés en parallèle par le découpeur (workers, sessions
+                # NVENC, threads FFmpeg et mode copie gérés au même endroit)
+                cut_results = cutter.cut_batch(
+                    video_file, to_process, progress_callback=on_segment_done, stop_event=stop
+                )
+            for plan_item, result in zip(to_process, cut_results):
+                record_result(plan_item, result)
+            
+            if chapter_lines:
+                out.print(Group(*(line for _, line in sorted(chapter_lines))))
         
         # Ajouter les fichiers existants aux stats
         successful += len(existing)
         
         # DÃ©coupage des sous-titres
+        check_stop()
         if settings.subtitles.enabled and subtitle_file:
-            console.print("  > DÃ©coupage des sous-titres par chapitre...")
+            out.print("  > DÃ©coupage des sous-titres par chapitre...")
             
             try:
                 # CrÃ©er le slicer de sous-titres
@@ -539,24 +794,24 @@ def process_single_video(url: str, settings: Settings) -> ProcessingStats:
                 empty_subs = sum(1 for r in subtitle_results if r.status == "EMPTY")
                 failed_subs = sum(1 for r in subtitle_results if r.status == "ERROR")
                 
-                console.print(f"    > {successful_subs} fichier(s) SRT crÃ©Ã©s")
+                out.print(f"    > {successful_subs} fichier(s) SRT crÃ©Ã©s")
                 if empty_subs > 0:
-                    console.print(f"    - {empty_subs} chapitre(s) sans sous-titres")
+                    out.print(f"    - {empty_subs} chapitre(s) sans sous-titres")
                 if failed_subs > 0:
-                    console.print(f"    [yellow]- {failed_subs} chapitre(s) en erreur[/yellow]")
+                    out.print(f"    [yellow]- {failed_subs} chapitre(s) en erreur[/yellow]")
                     
             except Exception as e:
-                console.print(f"    [yellow]! Erreur dÃ©coupage sous-titres (non critique): {e}[/yellow]")
+                out.print(f"    [yellow]! Erreur dÃ©coupage sous-titres (non critique): {e}[/yellow]")
         
         # Nettoyage du fichier source si demandÃ©
         if not settings.keep_source:
             try:
                 video_file.unlink()
-                console.print("  > Fichier source supprimÃ©")
+                out.print("  > Fichier source supprimÃ©")
             except Exception as e:
-                console.print(f"  [yellow]> Impossible de supprimer le fichier source: {e}[/yellow]")
+                out.print(f"  [yellow]> Impossible de supprimer le fichier source: {e}[/yellow]")
         
-        processing_time = time.time() - start_time
+        processing_time = time.perf_counter() - start_time
         
         return ProcessingStats(
             total_chapters=len(meta.chapters),
@@ -566,45 +821,119 @@ def process_single_video(url: str, settings: Settings) -> ProcessingStats:
             total_processing_time_s=processing_time
         )
         
-    except YouTubeError as e:
-        console.print(f"  [red]> Erreur YouTube: {e}[/red]")
-        processing_time = time.time() - start_time
-        
-        return ProcessingStats(
-            total_chapters=0,
-            successful_chapters=0,
-            failed_chapters=1,
-            total_duration_s=0.0,
-            total_processing_time_s=processing_time
-        )
+    except Exception as e:
+        if stop is not None and stop.is_set():
+            # Arrêt demandé: l'erreur éventuelle (yt-dlp tué...) en est la conséquence
+            out.print("  [yellow]> Interrompu[/yellow]")
+            return _failed_video_stats(time.perf_counter() - start_time)
+        if isinstance(e, YouTubeError):
+            kind = "Erreur YouTube"
+        elif isinstance(e, (FFmpegError, PlanningError)):
+            kind = "Erreur de traitement"
+        else:
+            kind = "Erreur inattendue"
+        out.print(f"  [red]> {kind}: {e}[/red]")
+        return _failed_video_stats(time.perf_counter() - start_time)
+
+
+def _failed_video_stats(processing_time: float) -> ProcessingStats:
+    """Statistiques d'une vidéo en échec (comptée comme un chapitre échoué)."""
+    return ProcessingStats(
+        total_chapters=1,
+        successful_chapters=0,
+        failed_chapters=1,
+        total_duration_s=0.0,
+        total_processing_time_s=processing_time
+    )
+
+def _run_head(cmd: List[str], limit: int, timeout: float) -> tuple[int, str, str]:
+    """Exécute ``cmd`` en ne lisant que le début de stdout et de stderr.
     
-    except (FFmpegError, PlanningError) as e:
-        console.print(f"  [red]> Erreur de traitement: {e}[/red]")
-        processing_time = time.time() - start_time
-        
-        return ProcessingStats(
-            total_chapters=0,
-            successful_chapters=0,
-            failed_chapters=1,
-            total_duration_s=0.0,
-            total_processing_time_s=processing_time
-        )
+    Au plus ``limit + 1`` caractères sont lus par flux (le caractère en trop
+    signale une troncature); le processus est arrêté dès que stdout dépasse la
+    limite au lieu de bufferiser une sortie qui serait jetée. stderr passe par
+    un fichier temporaire: un stderr abondant ne bloque jamais le processus
+    pendant la lecture de stdout.
     
-    except Exception as e:
-        console.print(f"  [red]> Erreur inattendue: {e}[/red]")
-        processing_time = time.time() - start_time
+    Returns:
+        tuple[int, str, str]: (code de retour, début de stdout, début de stderr)
+    """
+    timed_out = threading.Event()
+    with tempfile.TemporaryFile() as err_file, subprocess.Popen(
+        cmd,
+        stdout=subprocess.PIPE,
+        stderr=err_file,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    ) as proc:
+        def _kill():
+            timed_out.set()
+            proc.kill()
+        
+        # Le minuteur borne toute l'exécution, lecture de stdout comprise
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        try:
+            stdout = proc.stdout.read(limit + 1)
+            if len(stdout) > limit:
+                proc.terminate()
+            returncode = proc.wait()
+        finally:
+            timer.cancel()
         
-        return ProcessingStats(
-            total_chapters=0,
-            successful_chapters=0,
-            failed_chapters=1,
-            total_duration_s=0.0,
-            total_processing_time_s=processing_time
-        )
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        
+        err_file.seek(0)
+        # limit + 1 caractères tiennent dans au plus 4 octets chacun (UTF-8)
+        stderr = err_file.read(4 * (limit + 1)).decode("utf-8", errors="replace")[:limit + 1]
+    
+    return returncode, stdout, stderr
+
+
+def show_list_subs_diagnostic(url: str, max_shown: int = 2) -> None:
+    """Affiche la sortie brute de `yt-dlp --list-subs` (avec et sans cookies).
+    
+    Les variantes sont lancées en parallèle; l'affichage s'arrête dès que
+    ``max_shown`` d'entre elles ont répondu, sans attendre les autres.
+    """
+    from rich.panel import Panel
+    
+    console.print("    > Diagnostic list-subs (brut)")
+    diag_cmds = []
+    cookies_file = Path('cookies.txt')
+    if cookies_file.exists():
+        diag_cmds.append(["yt-dlp", "--list-subs", "--no-warnings", "--cookies", str(cookies_file), url])
+    for b in ["firefox", "chrome", "edge"]:
+        diag_cmds.append(["yt-dlp", "--list-subs", "--no-warnings", "--cookies-from-browser", b, url])
+    diag_cmds.append(["yt-dlp", "--list-subs", "--no-warnings", url])
+    
+    executor = ThreadPoolExecutor(max_workers=4)
+    try:
+        futures = {executor.submit(_run_head, dc, 1200, 30): dc for dc in diag_cmds}
+        shown = 0
+        for future in as_completed(futures):
+            dc = futures[future]
+            try:
+                returncode, stdout, stderr = future.result()
+            except Exception:
+                continue
+            console.print(f"      $ {' '.join(dc)} -> rc={returncode}")
+            if stdout:
+                console.print(Panel(stdout[:1200], title="yt-dlp stdout", subtitle="tronqué" if len(stdout) > 1200 else ""))
+            if stderr:
+                console.print(Panel(stderr[:1200], title="yt-dlp stderr", subtitle="tronqué" if len(stderr) > 1200 else ""))
+            shown += 1
+            if shown >= max_shown:  # éviter de trop inonder
+                break
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
 
 
 def show_configuration(settings: Settings, show_title: bool = True) -> None:
     """Affiche la configuration actuelle."""
+    from rich.table import Table
     
     if show_title:
         console.print("\n[bold blue]>>> Configuration:[/bold blue]")
@@ -621,6 +950,8 @@ def show_configuration(settings: Settings, show_title: bool = True) -> None:
     table.add_row("Preset", settings.x264.preset)
     table.add_row("Bitrate audio", settings.audio.bitrate)
     table.add_row("Processus parallÃ¨les", str(settings.parallel.max_workers))
+    table.add_row("Vidéos simultanées", str(settings.parallel.max_videos))
+    table.add_row("Threads FFmpeg par processus", str(settings.parallel.effective_threads_per_job))
     table.add_row("TolÃ©rance durÃ©e", f"{settings.validation.tolerance_seconds}s")
     
     console.print(table)
@@ -628,17 +959,19 @@ def show_configuration(settings: Settings, show_title: bool = True) -> None:
 
 def show_final_stats(stats: ProcessingStats) -> None:
     """Affiche les statistiques finales."""
+    from rich.panel import Panel
+    from rich.text import Text
     
     console.print(f"\n[bold blue]>>> RÃ©sultats finaux:[/bold blue]")
     
-    # Panneau principal avec les stats
-    stats_content = f"""
-[green]OK  Chapitres rÃ©ussis:[/green] {stats.successful_chapters}
-[red]ERR Chapitres Ã©chouÃ©s:[/red] {stats.failed_chapters}
-[blue]%   Taux de rÃ©ussite:[/blue] {stats.success_rate:.1f}%
-[yellow]T   DurÃ©e totale:[/yellow] {stats.total_duration_s:.1f}s
-[cyan]P   Temps de traitement:[/cyan] {stats.total_processing_time_s:.1f}s
-    """.strip()
+    # Panneau principal avec les stats (Text construit directement, sans balisage à analyser)
+    stats_content = Text.assemble(
+        ("OK  Chapitres rÃ©ussis: ", "green"), f"{stats.successful_chapters}\n",
+        ("ERR Chapitres Ã©chouÃ©s: ", "red"), f"{stats.failed_chapters}\n",
+        ("%   Taux de rÃ©ussite: ", "blue"), f"{stats.success_rate:.1f}%\n",
+        ("T   DurÃ©e totale: ", "yellow"), f"{stats.total_duration_s:.1f}s\n",
+        ("P   Temps de traitement: ", "cyan"), f"{stats.total_processing_time_s:.1f}s",
+    )
     
     console.print(Panel(stats_content, title="Statistiques", border_style="blue"))
     
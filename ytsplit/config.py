@@ -1,10 +1,16 @@
 ﻿"""Configuration de l'application avec pydantic-settings."""
 
+import functools
+import os
+import tempfile
 from pathlib import Path
 from typing import Literal, List, Optional
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, PrivateAttr, validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
+from .io.naming import DEFAULT_REPLACE_CHARS, compile_template
+from .utils.jsonio import json_dumps, json_loads
+
 
 class X264Settings(BaseModel):
     """Configuration pour l'encodage vidÃ©o x264."""
@@ -18,6 +24,7 @@ class AudioSettings(BaseModel):
     """Configuration pour l'encodage audio."""
     codec: Literal["aac", "mp3", "opus"] = Field(default="aac", description="Codec audio")
     bitrate: str = Field(default="192k", description="Bitrate audio (ex: 192k, 256k)")
+    reencode: bool = Field(default=False, description="Ré-encoder l'audio (sinon copie du flux source)")
 
 
 class ManifestSettings(BaseModel):
@@ -30,11 +37,39 @@ class ValidationSettings(BaseModel):
     """Configuration pour la validation des rÃ©sultats."""
     tolerance_seconds: float = Field(default=0.15, gt=0, description="TolÃ©rance d'erreur de durÃ©e en secondes")
     max_retries: int = Field(default=1, ge=0, description="Nombre maximum de tentatives en cas d'Ã©chec")
+    probe_outputs: bool = Field(
+        default=True,
+        description="Mesurer la durée de chaque chapitre produit avec ffprobe (sinon FFmpeg en succès fait foi)"
+    )
+    trust_existing_by_size: bool = Field(
+        default=True,
+        description="Ignorer sans ffprobe les sorties existantes validées par un précédent découpage "
+                    "(marqueur .ytsplit-ok.json, taille et date inchangées)"
+    )
 
 
 class ParallelSettings(BaseModel):
     """Configuration pour le traitement parallÃ¨le."""
     max_workers: int = Field(default=2, ge=1, le=8, description="Nombre maximum de processus FFmpeg simultanÃ©s")
+    threads_per_job: Optional[int] = Field(
+        default=None, ge=1,
+        description="Threads FFmpeg par découpage (défaut: cœurs CPU répartis entre les workers)"
+    )
+    max_videos: int = Field(
+        default=1, ge=1, le=4,
+        description="Nombre de vidéos traitées simultanément (téléchargement de l'une pendant le découpage d'une autre)"
+    )
+    
+    @property
+    def effective_threads_per_job(self) -> int:
+        """Threads FFmpeg par découpage, sans sursouscrire le CPU."""
+        return self.threads_for(self.max_workers * self.max_videos)
+    
+    def threads_for(self, concurrent_jobs: int) -> int:
+        """Threads FFmpeg par découpage pour ``concurrent_jobs`` découpages simultanés."""
+        if self.threads_per_job is not None:
+            return self.threads_per_job
+        return max(1, (os.cpu_count() or 1) // max(1, concurrent_jobs))
 
 
 class NamingSettings(BaseModel):
@@ -42,12 +77,15 @@ class NamingSettings(BaseModel):
     template: str = Field(default="{n:02d} - {title}", description="Template de nommage des fichiers")
     sanitize_maxlen: int = Field(default=120, gt=0, description="Longueur maximum des noms de fichier")
     replace_chars: dict[str, str] = Field(
-        default_factory=lambda: {
-            "<": "ï¼œ", ">": "ï¼ž", ":": "ï¼š", "\"": "ï¼‚", "/": "ï¼", "\\": "ï¼¼", 
-            "|": "ï½œ", "?": "ï¼Ÿ", "*": "ï¼Š"
-        },
+        default_factory=lambda: dict(DEFAULT_REPLACE_CHARS),
         description="CaractÃ¨res Ã  remplacer pour Windows"
     )
+    
+    @validator('template')
+    def validate_template(cls, v):
+        """Valide le template de nommage (syntaxe et variables connues)."""
+        compile_template(v)
+        return v
 
 
 class CropSettings(BaseModel):
@@ -119,9 +157,15 @@ class SubtitleSettings(BaseModel):
 class GPUSettings(BaseModel):
     """Configuration pour l'accÃ©lÃ©ration GPU NVIDIA."""
     enabled: bool = Field(default=False, description="Activer l'accÃ©lÃ©ration GPU NVIDIA")
-    encoder: Literal["h264_nvenc", "hevc_nvenc"] = Field(
+    encoder: Literal[
+        "auto",
+        "h264_nvenc", "hevc_nvenc",
+        "h264_qsv", "hevc_qsv",
+        "h264_videotoolbox", "hevc_videotoolbox",
+        "h264_amf", "hevc_amf",
+    ] = Field(
         default="h264_nvenc", 
-        description="Encodeur GPU Ã  utiliser"
+        description="Encodeur matériel (auto: premier H.264 disponible parmi NVENC, QSV, VideoToolbox, AMF)"
     )
     preset: Literal["p1", "p2", "p3", "p4", "p5", "p6", "p7"] = Field(
         default="p7", 
@@ -172,58 +216,151 @@ class Settings(BaseSettings):
     # Options avancÃ©es
     keep_source: bool = Field(default=False, description="Conserver le fichier source aprÃ¨s dÃ©coupage")
     skip_existing: bool = Field(default=True, description="Ignorer les fichiers dÃ©jÃ  existants et valides")
+    stream_copy: bool = Field(
+        default=False,
+        description="Copie sans ré-encodage des chapitres débutant sur une keyframe (à la tolérance près, sans crop)"
+    )
+    single_pass: bool = Field(
+        default=False,
+        description="Découper tous les chapitres en une seule passe FFmpeg (source lue une fois, au-delà de 4 chapitres)"
+    )
     dry_run: bool = Field(default=False, description="Mode simulation (ne dÃ©coupe pas rÃ©ellement)")
     verbose: bool = Field(default=False, description="Mode verbeux")
     
+    # Outils externes (ffmpeg, yt-dlp) déjà vérifiés par la CLI: les modules
+    # sautent alors leur propre vérification (non sérialisé)
+    _tools_checked: bool = PrivateAttr(default=False)
+    # Répertoires de sortie/travail créés à la première utilisation (ensure_dirs)
+    _dirs_ready: bool = PrivateAttr(default=False)
+    
     def model_post_init(self, __context) -> None:
-        """Validation et crÃ©ation des rÃ©pertoires nÃ©cessaires."""
-        # CrÃ©er les rÃ©pertoires s'ils n'existent pas
-        self.out_dir.mkdir(parents=True, exist_ok=True)
-        self.work_dir.mkdir(parents=True, exist_ok=True)
-        
+        """Validation post-initialisation (les répertoires sont créés par ``ensure_dirs``)."""
         # Validation de la qualitÃ©
         if self.quality not in ["2160p", "1440p", "1080p", "720p", "480p", "360p"]:
             raise ValueError(f"QualitÃ© non supportÃ©e: {self.quality}")
     
+    def ensure_dirs(self) -> None:
+        """Crée les répertoires de sortie et de travail (une seule fois par instance).
+        
+        Différé jusqu'au traitement: ``--help``, ``config-init`` ou un simple
+        chargement de configuration ne créent pas ``./output`` ni ``./cache``.
+        """
+        if self._dirs_ready:
+            return
+        self.out_dir.mkdir(parents=True, exist_ok=True)
+        self.work_dir.mkdir(parents=True, exist_ok=True)
+        self._dirs_ready = True
+    
     @classmethod
     def load_from_file(cls, config_path: Path) -> "Settings":
-        """Charge la configuration depuis un fichier YAML."""
-        import yaml
+        """Charge la configuration depuis un fichier YAML.
         
+        Le YAML n'est reparsé que si le fichier a changé (cache par chemin et
+        mtime); une copie est retournée pour que les overrides restent locaux.
+        """
         if not config_path.exists():
             return cls()
         
-        try:
-            with open(config_path, 'r', encoding='utf-8') as f:
-                config_data = yaml.safe_load(f) or {}
-            return cls(**config_data)
-        except Exception as e:
-            raise ValueError(f"Erreur lors du chargement de la configuration: {e}")
+        stat = config_path.stat()
+        settings = _parse_settings_file(cls, str(config_path.resolve()), stat.st_mtime_ns, stat.st_size)
+        return settings.model_copy(deep=True)
     
     def save_to_file(self, config_path: Path) -> None:
         """Sauvegarde la configuration dans un fichier YAML."""
         import yaml
         
-        config_dict = self.model_dump(mode='python', exclude={'config_file'})
-        
-        # Convertir les Path en string pour YAML
-        def convert_paths(obj):
-            if isinstance(obj, dict):
-                return {k: convert_paths(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [convert_paths(item) for item in obj]
-            elif isinstance(obj, Path):
-                return str(obj)
-            return obj
-        
-        config_dict = convert_paths(config_dict)
+        # mode='json': les Path sont déjà convertis en chaînes par pydantic
+        config_dict = self.model_dump(mode='json', exclude={'config_file'})
+        dumper = getattr(yaml, "CSafeDumper", yaml.SafeDumper)
         
         with open(config_path, 'w', encoding='utf-8') as f:
-            yaml.dump(config_dict, f, default_flow_style=False, allow_unicode=True, indent=2)
+            yaml.dump(config_dict, f, Dumper=dumper, default_flow_style=False, allow_unicode=True, indent=2)
+        
+        # Cache JSON prérempli: le prochain chargement n'a pas besoin de PyYAML
+        stat = config_path.stat()
+        _store_cached_settings_data(config_path, [stat.st_mtime_ns, stat.st_size], config_dict)
+
+
+def _settings_cache_path(config_path: Path) -> Path:
+    """Chemin du cache JSON voisin du YAML (ex: settings.yaml.cache.json)."""
+    return config_path.with_name(config_path.name + ".cache.json")
+
+
+def _yaml_safe_load(stream):
+    """Équivalent de ``yaml.safe_load`` utilisant le chargeur C (libyaml) si disponible."""
+    import yaml
+    
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    return yaml.load(stream, Loader=loader)
 
 
+def _load_cached_settings_data(config_path: Path, key: list) -> Optional[dict]:
+    """Relit les données YAML déjà parsées si le fichier n'a pas changé (mtime et taille)."""
+    try:
+        raw = _settings_cache_path(config_path).read_bytes()
+        cached = json_loads(raw)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(cached, dict) or cached.get("key") != key:
+        return None
+    return cached.get("data")
+
+
+def _store_cached_settings_data(config_path: Path, key: list, config_data: dict) -> None:
+    """Écrit le cache JSON de façon atomique; un échec (lecture seule...) est ignoré."""
+    cache_path = _settings_cache_path(config_path)
+    try:
+        payload = json_dumps({"key": key, "data": config_data})
+    except (TypeError, ValueError):
+        # Types YAML sans équivalent JSON (dates...): pas de cache
+        return
+    
+    tmp_name = None
+    try:
+        fd, tmp_name = tempfile.mkstemp(dir=cache_path.parent, suffix=".tmp")
+        with os.fdopen(fd, 'wb') as f:
+            f.write(payload)
+        os.replace(tmp_name, cache_path)
+    except OSError:
+        if tmp_name is not None and os.path.exists(tmp_name):
+            os.unlink(tmp_name)
+
+
+@functools.lru_cache(maxsize=8)
+def _parse_settings_file(cls: type, config_path: str, mtime_ns: int, size: int) -> Settings:
+    """Parse un fichier de configuration YAML (mis en cache par ``load_from_file``).
+    
+    Le résultat du parsing YAML est conservé dans un fichier JSON voisin, clé
+    (mtime, taille), pour éviter PyYAML aux invocations suivantes de la CLI.
+    """
+    path = Path(config_path)
+    key = [mtime_ns, size]
+    
+    try:
+        config_data = _load_cached_settings_data(path, key)
+        from_cache = config_data is not None
+        if not from_cache:
+            with open(path, 'r', encoding='utf-8') as f:
+                config_data = _yaml_safe_load(f) or {}
+        settings = cls(**config_data)
+        # Mis en cache seulement une fois validé: un YAML invalide est toujours relu
+        if not from_cache:
+            _store_cached_settings_data(path, key, config_data)
+        return settings
+    except Exception as e:
+        raise ValueError(f"Erreur lors du chargement de la configuration: {e}")
+
+
+@functools.lru_cache(maxsize=1)
 def get_default_settings() -> Settings:
-    """Retourne une instance de configuration par dÃ©faut."""
+    """Retourne l'instance de configuration par défaut, partagée par les factories.
+    
+    Construite une seule fois (lecture de l'environnement et du .env, validation);
+    ``clear_settings_cache`` force une reconstruction.
+    """
     return Settings()
 
 
+def clear_settings_cache() -> None:
+    """Oublie la configuration par défaut mise en cache (tests, changement d'environnement)."""
+    get_default_settings.cache_clear()
@@ -1,13 +1,69 @@
 ﻿"""Module de dÃ©coupage vidÃ©o avec FFmpeg."""
 
+import csv
+import functools
+import os
 import subprocess
+import tempfile
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Optional, Dict, Any
 
 from ..models import SplitPlanItem, SplitResult
 from ..config import Settings
-from ..parsing.timecode import seconds_to_timecode
+from ..io import markers
+from ..utils import ffprobe
+
+
+# Sessions NVENC simultanées supportées par les GPU grand public
+# (appliqué aussi aux autres encodeurs matériels, qui partagent un seul moteur)
+NVENC_MAX_SESSIONS = 2
+
+# Encodeurs H.264 matériels essayés dans cet ordre avec ``gpu.encoder: auto``
+AUTO_HW_ENCODERS = ("h264_nvenc", "h264_qsv", "h264_videotoolbox", "h264_amf")
+_HW_ENCODERS = AUTO_HW_ENCODERS + ("hevc_nvenc", "hevc_qsv", "hevc_videotoolbox", "hevc_amf")
+
+# Preset x264 plus lent utilisé pour la nouvelle tentative d'un découpage échoué
+SLOWER_PRESETS = {
+    "ultrafast": "veryfast",
+    "superfast": "veryfast",
+    "veryfast": "faster",
+    "faster": "fast",
+    "fast": "medium",
+    "medium": "slow",
+    "slow": "slower",
+    "slower": "veryslow",
+}
+
+# Presets NVENC (p1..p7) transposés pour QSV et AMF
+QSV_PRESETS = {
+    "p1": "veryfast", "p2": "faster", "p3": "fast", "p4": "medium",
+    "p5": "slow", "p6": "slower", "p7": "veryslow",
+}
+AMF_QUALITY = {
+    "p1": "speed", "p2": "speed", "p3": "balanced", "p4": "balanced",
+    "p5": "balanced", "p6": "quality", "p7": "quality",
+}
+
+# En dessous, la passe unique n'amortit pas assez le démarrage de FFmpeg
+# face au découpage parallèle chapitre par chapitre
+SINGLE_PASS_MIN_CHAPTERS = 4
+
+# Recul du saut rapide (avant -i) sur le début du chapitre: le reste est
+# décodé puis écarté par un second -ss, précis à l'image
+INPUT_SEEK_PREROLL_S = 2.0
+
+# Fin de stderr conservée dans le message d'erreur d'un découpage
+STDERR_TAIL_BYTES = 32 * 1024
+
+
+def _ffmpeg_timestamp(seconds: float) -> str:
+    """Horodatage FFmpeg ``HH:MM:SS.mmm`` (formatage direct, appelé à chaque chapitre)."""
+    minutes, secs = divmod(round(seconds, 3), 60)
+    hours, minutes = divmod(int(minutes), 60)
+    return f"{hours:02d}:{minutes:02d}:{secs:06.3f}"
 
 
 class FFmpegError(Exception):
@@ -29,22 +85,97 @@ def check_nvenc_availability() -> bool:
                 "-hide_banner",
                 "-encoders",
             ],
-            capture_output=True,
-            text=True,
-            encoding="utf-8",
-            errors="replace",
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
             timeout=10,
         )
         
         if result.returncode != 0:
             return False
             
-        return "h264_nvenc" in result.stdout
+        # Recherche directe dans les octets: pas de décodage de la liste complète
+        return b"h264_nvenc" in result.stdout
         
     except (subprocess.TimeoutExpired, FileNotFoundError):
         return False
 
 
+@functools.lru_cache(maxsize=1)
+def list_hw_encoders() -> frozenset[str]:
+    """
+    Encodeurs matériels connus compilés dans FFmpeg (un seul ``ffmpeg -encoders`` par processus).
+    
+    Returns:
+        frozenset[str]: Noms des encodeurs (ex: {"h264_qsv", "hevc_qsv"}), vide si FFmpeg échoue
+    """
+    try:
+        result = subprocess.run(
+            ["ffmpeg", "-hide_banner", "-encoders"],
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            timeout=10,
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return frozenset()
+    
+    if result.returncode != 0:
+        return frozenset()
+    
+    return frozenset(
+        encoder for encoder in _HW_ENCODERS if encoder.encode() in result.stdout
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def hw_encoder_works(encoder: str) -> bool:
+    """
+    Vérifie qu'un encodeur matériel fonctionne réellement (encodage d'une image de test).
+    
+    Les builds statiques de FFmpeg embarquent NVENC, QSV et AMF même sans le
+    matériel correspondant: la présence dans ``ffmpeg -encoders`` ne suffit pas.
+    Le résultat est mémorisé pour tout le processus.
+    
+    Args:
+        encoder: Nom de l'encodeur FFmpeg (ex: "h264_qsv")
+        
+    Returns:
+        bool: True si FFmpeg encode une image avec cet encodeur
+    """
+    try:
+        result = subprocess.run(
+            [
+                "ffmpeg", "-hide_banner", "-loglevel", "error",
+                "-f", "lavfi", "-i", "nullsrc=s=256x256",
+                "-frames:v", "1",
+                "-c:v", encoder,
+                "-f", "null", "-",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+            timeout=15,
+        )
+    except (subprocess.TimeoutExpired, FileNotFoundError):
+        return False
+    return result.returncode == 0
+
+
+def resolve_gpu_encoder(settings: Settings) -> str:
+    """
+    Encodeur matériel effectif: celui de la configuration, ou le premier utilisable pour ``auto``.
+    
+    Returns:
+        str: Nom de l'encodeur FFmpeg ("auto" si aucun n'est utilisable)
+    """
+    encoder = settings.gpu.encoder
+    if encoder == "auto":
+        available = list_hw_encoders()
+        return next(
+            (name for name in AUTO_HW_ENCODERS if name in available and hw_encoder_works(name)),
+            "auto"
+        )
+    return encoder
+
+
 def check_gpu_compatibility(settings: Settings) -> tuple[bool, str]:
     """
     VÃ©rifie la compatibilitÃ© GPU et retourne le statut.
@@ -58,10 +189,17 @@ def check_gpu_compatibility(settings: Settings) -> tuple[bool, str]:
     if not settings.gpu.enabled:
         return False, "GPU dÃ©sactivÃ© dans la configuration"
     
-    if not check_nvenc_availability():
-        return False, "NVENC non disponible (GPU NVIDIA requis ou driver manquant)"
+    encoder = resolve_gpu_encoder(settings)
+    if encoder == "auto":
+        return False, "Aucun encodeur matériel disponible (NVENC, QSV, VideoToolbox, AMF)"
+    
+    # Une seule lecture de ``ffmpeg -encoders`` puis une image de test (mémorisées)
+    if encoder not in list_hw_encoders() or not hw_encoder_works(encoder):
+        if encoder.endswith("_nvenc"):
+            return False, "NVENC non disponible (GPU NVIDIA requis ou driver manquant)"
+        return False, f"{encoder} non disponible (matériel, driver ou FFmpeg sans support)"
     
-    return True, f"GPU prÃªt: {settings.gpu.encoder} preset {settings.gpu.preset}"
+    return True, f"GPU prÃªt: {encoder} preset {settings.gpu.preset}"
 
 
 class FFmpegCutter:
@@ -69,17 +207,30 @@ class FFmpegCutter:
     
     def __init__(self, settings: Settings):
         self.settings = settings
-        self._validate_ffmpeg()
+        # Compatibilité GPU sondée au premier découpage puis réutilisée
+        self._gpu_status: Optional[tuple[bool, str]] = None
+        self._gpu_encoder: Optional[str] = None
+        # Arguments de filtrage/encodage par (source, GPU, preset): identiques
+        # pour tous les chapitres d'une vidéo, seuls -ss/-to et la sortie changent
+        self._encoding_cache: dict[tuple[str, bool, Optional[str]], tuple[str, ...]] = {}
+        # Répertoires de sortie déjà créés (un seul mkdir par répertoire, pas par chapitre)
+        self._ready_dirs: set[Path] = set()
+        # Filtre crop par source: une sonde et au plus un avertissement par vidéo
+        self._crop_filters: dict[str, Optional[str]] = {}
+        # Keyframes par source, échec compris (None): une seule sonde par vidéo,
+        # même si plusieurs workers la demandent en même temps
+        self._keyframes: dict[str, Optional[list[float]]] = {}
+        self._keyframes_lock = threading.Lock()
+        if not settings._tools_checked:
+            self._validate_ffmpeg()
     
     def _validate_ffmpeg(self) -> None:
         """VÃ©rifie que FFmpeg est disponible."""
         try:
             result = subprocess.run(
                 ["ffmpeg", "-version"],
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
                 timeout=10,
             )
             if result.returncode != 0:
@@ -87,11 +238,34 @@ class FFmpegCutter:
         except (subprocess.TimeoutExpired, FileNotFoundError) as e:
             raise FFmpegError(f"FFmpeg n'est pas disponible: {e}")
     
+    def _ensure_dir(self, directory: Path) -> None:
+        """Crée un répertoire de sortie au premier chapitre qui l'utilise."""
+        if directory not in self._ready_dirs:
+            directory.mkdir(parents=True, exist_ok=True)
+            self._ready_dirs.add(directory)
+    
+    def _gpu_compatibility(self) -> tuple[bool, str]:
+        """Compatibilité GPU, sondée une seule fois par découpeur (un seul ``ffmpeg -encoders``)."""
+        if self._gpu_status is None:
+            self._gpu_status = check_gpu_compatibility(self.settings)
+            self._gpu_encoder = resolve_gpu_encoder(self.settings)
+        return self._gpu_status
+    
+    def _hwaccel_args(self, use_gpu: bool) -> list[str]:
+        """Décodage matériel en entrée: CUDA pour NVENC, détection par FFmpeg sinon."""
+        if not use_gpu:
+            return []
+        if self._gpu_encoder.endswith("_nvenc"):
+            return ["-hwaccel", "cuda"]
+        return ["-hwaccel", "auto"]
+    
     def cut_precise(
         self,
         source_path: Path,
         plan_item: SplitPlanItem,
-        retry_count: int = 0
+        retry_count: int = 0,
+        x264_preset: Optional[str] = None,
+        threads: Optional[int] = None
     ) -> SplitResult:
         """
         DÃ©coupe prÃ©cise d'un segment vidÃ©o avec rÃ©-encodage.
@@ -100,6 +274,8 @@ class FFmpegCutter:
             source_path: Chemin du fichier vidÃ©o source
             plan_item: Plan de dÃ©coupage du segment
             retry_count: Nombre de tentatives (pour retry automatique)
+            x264_preset: Preset x264 à utiliser à la place de celui des settings
+            threads: Threads FFmpeg à utiliser à la place de ceux des settings
             
         Returns:
             SplitResult: RÃ©sultat du dÃ©coupage
@@ -112,18 +288,19 @@ class FFmpegCutter:
                 raise FFmpegError(f"Fichier source introuvable: {source_path}")
             
             # CrÃ©er le rÃ©pertoire de sortie si nÃ©cessaire
-            plan_item.output_path.parent.mkdir(parents=True, exist_ok=True)
+            self._ensure_dir(plan_item.output_path.parent)
             
             # Construire la commande FFmpeg
-            cmd = self._build_ffmpeg_command(source_path, plan_item)
+            # Le retry ré-encode toujours (la copie a pu échouer sur le conteneur)
+            cmd = self._build_ffmpeg_command(
+                source_path, plan_item, x264_preset, threads, stream_copy=retry_count == 0
+            )
             
-            # ExÃ©cuter FFmpeg
+            # ExÃ©cuter FFmpeg (stderr gardé en octets, décodé seulement en cas d'échec)
             result = subprocess.run(
                 cmd,
-                capture_output=True,
-                text=True,
-                encoding="utf-8",
-                errors="replace",
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.PIPE,
                 timeout=300,  # 5 minutes max par segment
             )
             
@@ -132,202 +309,322 @@ class FFmpegCutter:
             if result.returncode != 0:
                 error_msg = f"FFmpeg a Ã©chouÃ© (code {result.returncode})"
                 if result.stderr:
-                    error_msg += f": {result.stderr.strip()}"
+                    # Seule la fin de stderr est utile (FFmpeg y signale l'erreur fatale)
+                    stderr_tail = result.stderr[-STDERR_TAIL_BYTES:]
+                    error_msg += f": {stderr_tail.decode('utf-8', errors='replace').strip()}"
                 
                 # Retry automatique avec preset plus lent si c'est la premiÃ¨re tentative
                 if retry_count == 0 and self.settings.validation.max_retries > 0:
-                    return self._retry_with_slower_preset(source_path, plan_item)
+                    return self._retry_with_slower_preset(source_path, plan_item, threads)
                 
-                return SplitResult(
-                    output_path=plan_item.output_path,
-                    chapter_index=plan_item.chapter_index,
-                    chapter_title=plan_item.chapter_title,
-                    start_s=plan_item.start_s,
-                    end_s=plan_item.end_s,
-                    expected_duration_s=plan_item.expected_duration_s,
-                    obtained_duration_s=None,
-                    status="ERR",
-                    message=error_msg,
-                    processing_time_s=processing_time
-                )
+                return self._result(plan_item, "ERR", processing_time, message=error_msg)
             
             # VÃ©rifier que le fichier de sortie existe
             if not plan_item.output_path.exists():
-                return SplitResult(
-                    output_path=plan_item.output_path,
-                    chapter_index=plan_item.chapter_index,
-                    chapter_title=plan_item.chapter_title,
-                    start_s=plan_item.start_s,
-                    end_s=plan_item.end_s,
-                    expected_duration_s=plan_item.expected_duration_s,
-                    obtained_duration_s=None,
-                    status="ERR",
-                    message="Fichier de sortie non crÃ©Ã©",
-                    processing_time_s=processing_time
+                return self._result(
+                    plan_item, "ERR", processing_time,
+                    message="Fichier de sortie non crÃ©Ã©"
                 )
             
+            # Sans sonde: le code de sortie de FFmpeg et -ss/-to font foi (durée non mesurée)
+            if not self.settings.validation.probe_outputs:
+                markers.record_output(plan_item.output_path, plan_item.expected_duration_s)
+                return self._result(plan_item, "OK", processing_time)
+            
             # Valider la durÃ©e du fichier de sortie
-            from ..utils.ffprobe import get_video_duration
-            obtained_duration = get_video_duration(plan_item.output_path)
+            obtained_duration = ffprobe.get_video_duration(plan_item.output_path)
             
             # VÃ©rifier la tolÃ©rance
             duration_error = abs(plan_item.expected_duration_s - obtained_duration)
             is_valid = duration_error <= self.settings.validation.tolerance_seconds
+            if is_valid:
+                markers.record_output(plan_item.output_path, obtained_duration)
+            elif retry_count == 0 and self._stream_copy_start(source_path, plan_item) is not None:
+                # Copie depuis une keyframe jusqu'à la tolérance avant le chapitre: l'arrondi
+                # des paquets audio ou du conteneur peut la faire dépasser -> ré-encodage précis
+                result = self.cut_precise(source_path, plan_item, retry_count=1, threads=threads)
+                if result.status == "OK":
+                    result.message = "Ré-encodé (copie hors tolérance)"
+                return result
             
-            return SplitResult(
-                output_path=plan_item.output_path,
-                chapter_index=plan_item.chapter_index,
-                chapter_title=plan_item.chapter_title,
-                start_s=plan_item.start_s,
-                end_s=plan_item.end_s,
-                expected_duration_s=plan_item.expected_duration_s,
-                obtained_duration_s=obtained_duration,
-                status="OK" if is_valid else "ERR",
-                message=f"Erreur de durÃ©e: {duration_error:.2f}s" if not is_valid else None,
-                processing_time_s=processing_time
+            return self._result(
+                plan_item, "OK" if is_valid else "ERR", processing_time,
+                obtained=obtained_duration,
+                message=f"Erreur de durÃ©e: {duration_error:.2f}s" if not is_valid else None
             )
             
         except subprocess.TimeoutExpired:
             processing_time = time.time() - start_time
-            return SplitResult(
-                output_path=plan_item.output_path,
-                chapter_index=plan_item.chapter_index,
-                chapter_title=plan_item.chapter_title,
-                start_s=plan_item.start_s,
-                end_s=plan_item.end_s,
-                expected_duration_s=plan_item.expected_duration_s,
-                obtained_duration_s=None,
-                status="ERR",
-                message="Timeout FFmpeg (>5min)",
-                processing_time_s=processing_time
+            return self._result(
+                plan_item, "ERR", processing_time,
+                message="Timeout FFmpeg (>5min)"
             )
             
         except Exception as e:
             processing_time = time.time() - start_time
-            return SplitResult(
-                output_path=plan_item.output_path,
-                chapter_index=plan_item.chapter_index,
-                chapter_title=plan_item.chapter_title,
-                start_s=plan_item.start_s,
-                end_s=plan_item.end_s,
-                expected_duration_s=plan_item.expected_duration_s,
-                obtained_duration_s=None,
-                status="ERR",
-                message=f"Erreur inattendue: {str(e)}",
-                processing_time_s=processing_time
+            return self._result(
+                plan_item, "ERR", processing_time,
+                message=f"Erreur inattendue: {str(e)}"
             )
     
+    def _result(
+        self,
+        plan_item: SplitPlanItem,
+        status: str,
+        processing_time: float,
+        obtained: Optional[float] = None,
+        message: Optional[str] = None
+    ) -> SplitResult:
+        """Résultat d'un découpage; les champs invariants sont repris du plan."""
+        return SplitResult(
+            output_path=plan_item.output_path,
+            chapter_index=plan_item.chapter_index,
+            chapter_title=plan_item.chapter_title,
+            start_s=plan_item.start_s,
+            end_s=plan_item.end_s,
+            expected_duration_s=plan_item.expected_duration_s,
+            obtained_duration_s=obtained,
+            status=status,
+            message=message,
+            processing_time_s=processing_time
+        )
+    
     def _retry_with_slower_preset(
         self,
         source_path: Path,
-        plan_item: SplitPlanItem
+        plan_item: SplitPlanItem,
+        threads: Optional[int] = None
     ) -> SplitResult:
-        """Retry avec un preset plus lent pour plus de prÃ©cision."""
-        # Sauvegarder le preset original
-        original_preset = self.settings.x264.preset
+        """Retry avec un preset plus lent pour plus de prÃ©cision.
         
+        Le preset est passé à la commande sans modifier les settings partagés,
+        pour que les découpages exécutés en parallèle n'en soient pas affectés.
+        """
         # Mapper vers un preset plus lent
-        slower_presets = {
-            "ultrafast": "veryfast",
-            "superfast": "veryfast", 
-            "veryfast": "faster",
-            "faster": "fast",
-            "fast": "medium",
-            "medium": "slow",
-            "slow": "slower",
-            "slower": "veryslow"
-        }
-        
-        new_preset = slower_presets.get(original_preset, "medium")
-        self.settings.x264.preset = new_preset
+        new_preset = SLOWER_PRESETS.get(self.settings.x264.preset, "medium")
         
-        try:
-            result = self.cut_precise(source_path, plan_item, retry_count=1)
-            # Ajouter une note sur le retry
-            if result.status == "OK":
-                result.message = f"RÃ©ussi avec preset {new_preset} (retry)"
-            return result
-        finally:
-            # Restaurer le preset original
-            self.settings.x264.preset = original_preset
+        result = self.cut_precise(
+            source_path, plan_item, retry_count=1, x264_preset=new_preset, threads=threads
+        )
+        # Ajouter une note sur le retry
+        if result.status == "OK":
+            result.message = f"RÃ©ussi avec preset {new_preset} (retry)"
+        return result
     
-    def _build_ffmpeg_command(self, source_path: Path, plan_item: SplitPlanItem) -> list[str]:
+    def _build_ffmpeg_command(
+        self,
+        source_path: Path,
+        plan_item: SplitPlanItem,
+        x264_preset: Optional[str] = None,
+        threads: Optional[int] = None,
+        stream_copy: bool = True
+    ) -> list[str]:
         """Construit la commande FFmpeg pour le dÃ©coupage prÃ©cis."""
         
-        # Convertir les timestamps en format HH:MM:SS.mmm
-        start_time = seconds_to_timecode(plan_item.start_s, include_milliseconds=True)
-        end_time = seconds_to_timecode(plan_item.end_s, include_milliseconds=True)
+        # Copie sans ré-encodage si le chapitre débute sur une keyframe
+        if stream_copy:
+            keyframe = self._stream_copy_start(source_path, plan_item)
+            if keyframe is not None:
+                return self._build_copy_command(source_path, plan_item, keyframe)
+        
+        # Threads par job: évite que les FFmpeg parallèles se disputent les cœurs
+        threads = str(threads or self.settings.parallel.effective_threads_per_job)
+        
+        # Saut indexé dans le conteneur jusqu'à peu avant le chapitre, puis
+        # décodage des quelques secondes restantes (au lieu de tout le début)
+        fast_seek = max(0.0, plan_item.start_s - INPUT_SEEK_PREROLL_S)
+        fine_seek = plan_item.start_s - fast_seek
         
         # VÃ©rifier compatibilitÃ© GPU
-        gpu_compatible, gpu_message = check_gpu_compatibility(self.settings)
+        gpu_compatible, gpu_message = self._gpu_compatibility()
         use_gpu = gpu_compatible
         
         cmd = [
             "ffmpeg",
             "-hide_banner",
             "-loglevel", "error",
+            "-nostats",  # Pas de ligne de statistiques par image sur stderr
         ]
         
         # AccÃ©lÃ©ration matÃ©rielle si GPU disponible
-        if use_gpu:
-            cmd.extend(["-hwaccel", "cuda"])
+        cmd.extend(self._hwaccel_args(use_gpu))
         
         cmd.extend([
+            "-threads", threads,  # Décodage
+            "-ss", _ffmpeg_timestamp(fast_seek),
             "-i", str(source_path),
-            "-ss", start_time,
-            "-to", end_time,
+            "-ss", _ffmpeg_timestamp(fine_seek),
+            "-t", _ffmpeg_timestamp(plan_item.end_s - plan_item.start_s),
+        ])
+        
+        cmd.extend(self._encoding_args(source_path, use_gpu, x264_preset))
+        
+        cmd.extend([
+            "-movflags", "+faststart",
+            "-map", "0",
+            "-threads", threads,  # Encodage
+            "-y",  # Overwrite output files
+            str(plan_item.output_path)
         ])
         
+        return cmd
+    
+    def _encoding_args(self, source_path: Path, use_gpu: bool, x264_preset: Optional[str] = None) -> list[str]:
+        """Arguments FFmpeg de filtrage et d'encodage (vidéo puis audio), calculés une fois par source."""
+        key = (str(source_path), use_gpu, x264_preset)
+        args = self._encoding_cache.get(key)
+        if args is None:
+            args = self._encoding_cache[key] = tuple(
+                self._build_encoding_args(source_path, use_gpu, x264_preset)
+            )
+        return list(args)
+    
+    def _build_encoding_args(self, source_path: Path, use_gpu: bool, x264_preset: Optional[str]) -> list[str]:
+        """Construit les arguments de filtrage (crop) et d'encodage."""
+        args = []
+        
         # Gestion des filtres vidÃ©o (crop + GPU)
         video_filters = []
         
-        if use_gpu and self.settings.crop.enabled:
+        if use_gpu and self._gpu_encoder.endswith("_nvenc") and self.settings.crop.enabled:
             # Crop sur GPU : hwupload â†’ crop â†’ hwdownload
-            crop_filter = self._build_crop_filter(source_path)
+            crop_filter = self._crop_filter(source_path)
             if crop_filter:
                 video_filters.append(f"hwupload_cuda,{crop_filter},hwdownload")
         elif self.settings.crop.enabled:
             # Crop CPU uniquement
-            crop_filter = self._build_crop_filter(source_path)
+            crop_filter = self._crop_filter(source_path)
             if crop_filter:
                 video_filters.append(crop_filter)
         
         if video_filters:
-            cmd.extend(["-vf", ",".join(video_filters)])
+            args.extend(["-vf", ",".join(video_filters)])
         
         # Configuration encodage
         if use_gpu:
-            # Encodage GPU NVENC
-            cmd.extend([
-                "-c:v", self.settings.gpu.encoder,
-                "-preset", self.settings.gpu.preset,
-                "-cq", str(self.settings.gpu.cq),
-            ])
+            args.extend(self._hw_video_args())
         else:
             # Encodage CPU x264 (fallback)
-            cmd.extend([
+            x264 = self.settings.x264
+            args.extend([
                 "-c:v", "libx264",
-                "-crf", str(self.settings.x264.crf),
-                "-preset", self.settings.x264.preset,
+                "-crf", str(x264.crf),
+                "-preset", x264_preset or x264.preset,
             ])
         
-        # Audio (copy si GPU pour performance, sinon rÃ©-encode)
-        if use_gpu:
-            cmd.extend(["-c:a", "copy"])  # Plus rapide
+        # Audio copié (plus rapide), ré-encodé seulement si demandé en CPU
+        audio = self.settings.audio
+        if use_gpu or not audio.reencode:
+            args.extend(["-c:a", "copy"])  # Plus rapide
         else:
-            cmd.extend([
-                "-c:a", self.settings.audio.codec,
-                "-b:a", self.settings.audio.bitrate,
+            args.extend([
+                "-c:a", audio.codec,
+                "-b:a", audio.bitrate,
             ])
         
-        cmd.extend([
-            "-movflags", "+faststart",
+        # Sous-titres/données copiés tels quels avec -map 0 quand le conteneur
+        # ne change pas (sinon FFmpeg choisit l'encodeur adapté au conteneur)
+        if source_path.suffix.lstrip(".").lower() == self.settings.video_format:
+            args.extend(["-c:s", "copy", "-c:d", "copy"])
+        
+        return args
+    
+    def _hw_video_args(self) -> list[str]:
+        """Arguments de l'encodeur matériel; cq (échelle CRF) et preset p1..p7 convertis par famille."""
+        gpu = self.settings.gpu
+        encoder = self._gpu_encoder
+        
+        if encoder.endswith("_qsv"):
+            return [
+                "-c:v", encoder,
+                "-preset", QSV_PRESETS[gpu.preset],
+                "-global_quality", str(gpu.cq),
+            ]
+        if encoder.endswith("_videotoolbox"):
+            # Qualité 1-100 (100 = meilleure), approximativement inverse du CRF
+            return ["-c:v", encoder, "-q:v", str(max(1, 100 - 2 * gpu.cq))]
+        if encoder.endswith("_amf"):
+            return [
+                "-c:v", encoder,
+                "-quality", AMF_QUALITY[gpu.preset],
+                "-rc", "cqp",
+                "-qp_i", str(gpu.cq),
+                "-qp_p", str(gpu.cq),
+            ]
+        
+        # Encodage GPU NVENC
+        return [
+            "-c:v", encoder,
+            "-preset", gpu.preset,
+            "-cq", str(gpu.cq),
+            "-delay", "0",  # Pas de file d'attente de frames dans l'encodeur
+        ]
+    
+    def _stream_copy_start(self, source_path: Path, plan_item: SplitPlanItem) -> Optional[float]:
+        """
+        Keyframe de départ d'une copie sans ré-encodage, ou None si le ré-encodage est requis.
+        
+        Seuls les éléments en mode "copy" (décidé par le planificateur ou par
+        ``cut_batch``) sont copiés; sans crop (filtre vidéo) et si la dernière
+        keyframe avant le début du chapitre est à moins de la tolérance de validation.
+        """
+        if self.settings.crop.enabled or plan_item.mode != "copy":
+            return None
+        
+        keyframes = self._source_keyframes(source_path)
+        if keyframes is None:
+            return None
+        
+        return ffprobe.snap_to_keyframe(plan_item.start_s, keyframes, self.settings.validation.tolerance_seconds)
+    
+    def _with_cut_mode(self, source_path: Path, plan_item: SplitPlanItem) -> SplitPlanItem:
+        """Passe en mode "copy" un élément dont le début tombe sur une keyframe de la source."""
+        if plan_item.mode == "copy":
+            return plan_item
+        keyframes = self._source_keyframes(source_path)
+        if keyframes is None or ffprobe.snap_to_keyframe(
+            plan_item.start_s, keyframes, self.settings.validation.tolerance_seconds
+        ) is None:
+            return plan_item
+        return plan_item.model_copy(update={"mode": "copy"})
+    
+    def _source_keyframes(self, source_path: Path) -> Optional[list[float]]:
+        """Keyframes de la source, sondées une seule fois par découpeur (None si la sonde a échoué)."""
+        key = str(source_path)
+        with self._keyframes_lock:
+            if key not in self._keyframes:
+                try:
+                    self._keyframes[key] = ffprobe.get_keyframe_timestamps(source_path, max_keyframes=None)
+                except Exception:
+                    self._keyframes[key] = None  # Pas de nouvelle sonde: ré-encodage
+            return self._keyframes[key]
+    
+    def _build_copy_command(self, source_path: Path, plan_item: SplitPlanItem, keyframe: float) -> list[str]:
+        """Construit la commande FFmpeg de copie des flux à partir d'une keyframe."""
+        # Secondes à la microseconde: un timecode tronqué au millième pourrait
+        # tomber juste avant la keyframe et faire sauter à la précédente
+        return [
+            "ffmpeg",
+            "-hide_banner",
+            "-loglevel", "error",
+            "-nostats",
+            "-ss", f"{keyframe:.6f}",  # Avant -i: saut direct à la keyframe
+            "-i", str(source_path),
+            "-t", f"{plan_item.end_s - keyframe:.6f}",
             "-map", "0",
-            "-y",  # Overwrite output files
+            "-c", "copy",
+            "-avoid_negative_ts", "make_zero",
+            "-movflags", "+faststart",
+            "-y",
             str(plan_item.output_path)
-        ])
-        
-        return cmd
+        ]
+    
+    def _crop_filter(self, source_path: Path) -> Optional[str]:
+        """Filtre crop de la source, construit une seule fois quel que soit le preset ou l'encodeur."""
+        key = str(source_path)
+        if key not in self._crop_filters:
+            self._crop_filters[key] = self._build_crop_filter(source_path)
+        return self._crop_filters[key]
     
     def _build_crop_filter(self, source_path: Path) -> Optional[str]:
         """
@@ -339,30 +636,32 @@ class FFmpegCutter:
         Returns:
             str: Filtre crop au format "crop=width:height:x:y" ou None si invalid
         """
+        crop = self.settings.crop
+        top, bottom, left, right = crop.top, crop.bottom, crop.left, crop.right
+        
+        # Si pas de crop nÃ©cessaire (tous les paramÃ¨tres sont 0): pas de sonde ffprobe
+        if not (top or bottom or left or right):
+            return None
+        
         try:
             # Obtenir la rÃ©solution de la vidÃ©o source
-            from ..utils.ffprobe import get_video_resolution
-            source_width, source_height = get_video_resolution(source_path)
+            source_width, source_height = ffprobe.get_video_resolution(source_path)
             
             # Calculer les dimensions aprÃ¨s crop
-            crop_width = source_width - self.settings.crop.left - self.settings.crop.right
-            crop_height = source_height - self.settings.crop.top - self.settings.crop.bottom
+            crop_width = source_width - left - right
+            crop_height = source_height - top - bottom
             
             # Validation des dimensions minimales
-            if crop_width < self.settings.crop.min_width:
-                raise ValueError(f"Largeur aprÃ¨s crop ({crop_width}px) < minimum ({self.settings.crop.min_width}px)")
+            if crop_width < crop.min_width:
+                raise ValueError(f"Largeur aprÃ¨s crop ({crop_width}px) < minimum ({crop.min_width}px)")
             
-            if crop_height < self.settings.crop.min_height:
-                raise ValueError(f"Hauteur aprÃ¨s crop ({crop_height}px) < minimum ({self.settings.crop.min_height}px)")
-            
-            # Si pas de crop nÃ©cessaire (tous les paramÃ¨tres sont 0)
-            if all(getattr(self.settings.crop, side) == 0 for side in ['top', 'bottom', 'left', 'right']):
-                return None
+            if crop_height < crop.min_height:
+                raise ValueError(f"Hauteur aprÃ¨s crop ({crop_height}px) < minimum ({crop.min_height}px)")
             
             # Format FFmpeg: crop=width:height:x:y
             # x = position horizontale (left offset)
             # y = position verticale (top offset)
-            return f"crop={crop_width}:{crop_height}:{self.settings.crop.left}:{self.settings.crop.top}"
+            return f"crop={crop_width}:{crop_height}:{left}:{top}"
             
         except Exception as e:
             # En cas d'erreur, on log et on dÃ©sactive le crop
@@ -373,75 +672,319 @@ class FFmpegCutter:
         self,
         source_path: Path,
         plan_items: list[SplitPlanItem],
-        progress_callback: Optional[callable] = None
+        progress_callback: Optional[callable] = None,
+        stop_event: Optional[threading.Event] = None
     ) -> list[SplitResult]:
         """
         DÃ©coupe plusieurs segments en lot.
         
+        Les segments sont découpés en parallèle (``parallel.max_workers``), les
+        plus longs d'abord; les fichiers existants et valides sont ignorés sans
+        occuper de worker.
+        
         Args:
             source_path: Chemin du fichier source
             plan_items: Liste des plans de dÃ©coupage
-            progress_callback: Callback pour le suivi de progression (optionnel)
+            progress_callback: Callback ``(terminés, total, titre)`` appelé à la fin
+                de chaque segment, depuis le thread appelant (optionnel)
+            stop_event: Arrêt demandé: les segments pas encore lancés ne sont pas
+                découpés (résultat "ERR", optionnel)
             
         Returns:
-            list[SplitResult]: RÃ©sultats de tous les dÃ©coupages
+            list[SplitResult]: RÃ©sultats de tous les dÃ©coupages, dans l'ordre de ``plan_items``
         """
-        results = []
         total_items = len(plan_items)
+        results: list[Optional[SplitResult]] = [None] * total_items
+        pending = []
+        done = 0
+        
+        if self.settings.skip_existing:
+            # Durées des sorties existantes sondées ensemble (mises en cache pour la boucle),
+            # sauf celles déjà validées par un précédent découpage
+            ffprobe.batch_video_durations(
+                item.output_path for item in plan_items
+                if item.output_path.exists() and self._recorded_duration(item) is None
+            )
         
         for i, plan_item in enumerate(plan_items):
-            # Callback de progression
-            if progress_callback:
-                progress_callback(i, total_items, plan_item.chapter_title)
-            
-            # VÃ©rifier si le fichier existe dÃ©jÃ  et est valide
+            # VÃ©rifier si le fichier existe dÃ©jÃ  et est valide (sans occuper de worker)
             if (plan_item.output_path.exists() and 
                 self.settings.skip_existing and 
                 self._is_output_valid(plan_item)):
                 
                 # CrÃ©er un rÃ©sultat "skipped" 
-                from ..utils.ffprobe import get_video_duration
-                obtained_duration = get_video_duration(plan_item.output_path)
+                obtained_duration = self._existing_duration(plan_item)
                 
-                result = SplitResult(
-                    output_path=plan_item.output_path,
-                    chapter_index=plan_item.chapter_index,
-                    chapter_title=plan_item.chapter_title,
-                    start_s=plan_item.start_s,
-                    end_s=plan_item.end_s,
-                    expected_duration_s=plan_item.expected_duration_s,
-                    obtained_duration_s=obtained_duration,
-                    status="OK",
-                    message="Fichier existant (skipped)",
-                    processing_time_s=0.0
+                results[i] = self._result(
+                    plan_item, "OK", 0.0,
+                    obtained=obtained_duration,
+                    message="Fichier existant (skipped)"
                 )
+                done += 1
+                if progress_callback:
+                    progress_callback(done, total_items, plan_item.chapter_title)
             else:
-                # DÃ©couper le segment
-                result = self.cut_precise(source_path, plan_item)
+                pending.append(i)
+        
+        if pending:
+            # Mode de découpage: celui du plan, complété ici si la copie est activée
+            # (keyframes sondées une seule fois, avant de lancer les workers)
+            items = list(plan_items)
+            if self.settings.stream_copy and not self.settings.crop.enabled:
+                for i in pending:
+                    items[i] = self._with_cut_mode(source_path, items[i])
+            elif not self.settings.crop.enabled and any(items[i].mode == "copy" for i in pending):
+                self._source_keyframes(source_path)
+            
+            # Les copies n'occupent pas d'encodeur: arguments d'encodage et limite
+            # de sessions GPU seulement s'il reste des chapitres à ré-encoder
+            use_gpu = False
+            if any(items[i].mode != "copy" for i in pending):
+                use_gpu = self._gpu_compatibility()[0]
+                self._encoding_args(source_path, use_gpu)
+            
+            # Chaque segment est un processus FFmpeg indépendant: des threads suffisent
+            # à les piloter en parallèle (sessions NVENC simultanées limitées en GPU)
+            max_workers = min(self.settings.parallel.max_workers, len(pending))
+            if use_gpu:
+                # Sessions NVENC partagées entre les vidéos traitées simultanément
+                max_workers = min(max_workers, max(1, NVENC_MAX_SESSIONS // self.settings.parallel.max_videos))
+            # Threads fixés au lancement: le -threads d'un FFmpeg en cours ne peut plus
+            # changer, et chaque chapitre terminé est aussitôt remplacé par le suivant
+            # (même nombre de jobs en vol). Seule la fin du lot laisse des cœurs libres;
+            # l'ordre "plus longs d'abord" la réduit à des chapitres courts.
+            threads = self.settings.parallel.threads_for(max_workers * self.settings.parallel.max_videos)
+            
+            # Les chapitres les plus longs d'abord: la fin de file ne contient plus que des
+            # découpages courts, et les workers terminent à peu près ensemble
+            pending.sort(key=lambda i: items[i].end_s - items[i].start_s, reverse=True)
+            
+            # Exécuteur géré à la main: sur Ctrl-C, les chapitres encore en file sont
+            # annulés au lieu d'être découpés par la sortie d'un bloc ``with``
+            executor = ThreadPoolExecutor(max_workers=max_workers)
+            try:
+                futures = {
+                    executor.submit(self._cut_unless_stopped, source_path, items[i], threads, stop_event): i
+                    for i in pending
+                }
+                for future in as_completed(futures):
+                    i = futures[future]
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        results[i] = self._result(items[i], "ERR", 0.0, message=f"Erreur inattendue - {e}")
+                    done += 1
+                    
+                    # Callback de progression (thread appelant uniquement)
+                    if progress_callback:
+                        progress_callback(done, total_items, plan_items[i].chapter_title)
+            except KeyboardInterrupt:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+            executor.shutdown()
+        
+        return results
+    
+    def _cut_unless_stopped(
+        self,
+        source_path: Path,
+        plan_item: SplitPlanItem,
+        threads: int,
+        stop_event: Optional[threading.Event]
+    ) -> SplitResult:
+        """Découpe un segment, sauf si l'arrêt a été demandé avant son lancement."""
+        if stop_event is not None and stop_event.is_set():
+            return self._result(plan_item, "ERR", 0.0, message="Interrompu avant le découpage")
+        return self.cut_precise(source_path, plan_item, threads=threads)
+    
+    def cut_all_in_one(
+        self,
+        source_path: Path,
+        plan_items: list[SplitPlanItem],
+        progress_callback: Optional[callable] = None,
+        stop_event: Optional[threading.Event] = None
+    ) -> list[SplitResult]:
+        """
+        Découpe tous les segments en une seule passe FFmpeg (muxer ``segment``).
+        
+        La source n'est lue et décodée qu'une fois; des keyframes sont forcées
+        aux débuts de chapitres pour que les coupes restent précises. Tous les
+        segments sont (re)générés. Si les chapitres ne sont pas contigus ou si
+        la passe unique échoue, le découpage se fait segment par segment (``cut_batch``).
+        
+        Args:
+            source_path: Chemin du fichier source
+            plan_items: Liste des plans de découpage
+            progress_callback: Callback ``(terminés, total, titre)`` appelé quand la
+                position d'encodage (``-progress``) franchit la fin d'un segment (optionnel)
+            stop_event: Arrêt demandé: FFmpeg est tué et aucun segment n'est relancé (optionnel)
+            
+        Returns:
+            list[SplitResult]: Résultats de tous les découpages, dans l'ordre de ``plan_items``
+        """
+        order = sorted(range(len(plan_items)), key=lambda i: plan_items[i].start_s)
+        items = [plan_items[i] for i in order]
+        
+        contiguous = all(abs(nxt.start_s - cur.end_s) < 1e-3 for cur, nxt in zip(items, items[1:]))
+        if len(items) < 2 or not contiguous or not source_path.exists():
+            return self.cut_batch(source_path, plan_items, progress_callback, stop_event=stop_event)
+        
+        start_time = time.time()
+        use_gpu = self._gpu_compatibility()[0]
+        # Un seul FFmpeg pour la vidéo: il dispose de tous les cœurs qui lui reviennent
+        threads = str(self.settings.parallel.threads_for(self.settings.parallel.max_videos))
+        first = items[0].start_s
+        boundaries = ",".join(f"{item.start_s - first:.6f}" for item in items[1:])
+        output_dir = items[0].output_path.parent
+        self._ensure_dir(output_dir)
+        suffix = items[0].output_path.suffix
+        
+        # Segments écrits à côté des sorties puis renommés (même système de fichiers)
+        with tempfile.TemporaryDirectory(prefix=".segments_", dir=output_dir) as tmp:
+            segment_list = Path(tmp) / "segments.csv"
+            cmd = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+            cmd.extend(self._hwaccel_args(use_gpu))
+            # Même recherche en deux temps qu'un chapitre isolé: saut indexé puis
+            # décodage des quelques secondes restantes; la sortie démarre à ``first``
+            fast_seek = max(0.0, first - INPUT_SEEK_PREROLL_S)
+            cmd.extend([
+                "-threads", threads,  # Décodage
+                "-ss", _ffmpeg_timestamp(fast_seek),
+                "-i", str(source_path),
+                "-ss", _ffmpeg_timestamp(first - fast_seek),
+                "-t", _ffmpeg_timestamp(items[-1].end_s - first),
+            ])
+            cmd.extend(self._encoding_args(source_path, use_gpu))
+            cmd.extend([
+                "-force_key_frames", boundaries,  # Coupes exactes aux débuts de chapitres
+                "-map", "0",
+                "-threads", threads,  # Encodage
+                "-f", "segment",
+                "-segment_times", boundaries,
+                "-segment_time_delta", "0.05",
+                "-reset_timestamps", "1",
+                "-segment_list", str(segment_list),
+                "-segment_list_type", "csv",
+            ])
+            if suffix == ".mp4":
+                cmd.extend(["-segment_format_options", "movflags=+faststart"])
+            # Position d'encodage sur stdout (lignes clé=valeur) pour la progression
+            cmd.extend(["-progress", "pipe:1", "-nostats"])
+            cmd.extend(["-y", str(Path(tmp) / f"segment_%03d{suffix}")])
+            
+            try:
+                returncode = self._run_segment_pass(cmd, items, 300 * len(items), progress_callback, stop_event)
+                with open(segment_list, newline="", encoding="utf-8") as f:
+                    segments = [row for row in csv.reader(f) if row]
+            except OSError:
+                return self.cut_batch(source_path, plan_items, progress_callback, stop_event=stop_event)
+            
+            if returncode != 0 or len(segments) != len(items):
+                return self.cut_batch(source_path, plan_items, progress_callback, stop_event=stop_event)
             
-            results.append(result)
+            processing_time = (time.time() - start_time) / len(items)
+            results: list[Optional[SplitResult]] = [None] * len(plan_items)
+            
+            for i, plan_item, (filename, segment_start, segment_end) in zip(order, items, segments):
+                os.replace(Path(tmp) / filename, plan_item.output_path)
+                
+                obtained_duration = float(segment_end) - float(segment_start)
+                duration_error = abs(plan_item.expected_duration_s - obtained_duration)
+                is_valid = duration_error <= self.settings.validation.tolerance_seconds
+                if is_valid:
+                    markers.record_output(plan_item.output_path, obtained_duration)
+                
+                results[i] = self._result(
+                    plan_item, "OK" if is_valid else "ERR", processing_time,
+                    obtained=obtained_duration,
+                    message=f"Erreur de durée: {duration_error:.2f}s" if not is_valid else None
+                )
         
         return results
     
+    def _run_segment_pass(
+        self,
+        cmd: list[str],
+        items: list[SplitPlanItem],
+        timeout: float,
+        progress_callback: Optional[callable],
+        stop_event: Optional[threading.Event] = None
+    ) -> int:
+        """Exécute la passe unique en suivant ``out_time_us`` et retourne le code de sortie.
+        
+        FFmpeg est tué au-delà de ``timeout`` secondes, ou dès que ``stop_event``
+        est positionné (code de sortie négatif).
+        """
+        first = items[0].start_s
+        ends = [item.end_s - first for item in items]
+        done = 0
+        
+        process = subprocess.Popen(
+            cmd,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            encoding="utf-8",
+            errors="replace",
+        )
+        timer = threading.Timer(timeout, process.kill)
+        timer.start()
+        try:
+            for line in process.stdout:
+                # -progress écrit un bloc par demi-seconde: l'arrêt est vu rapidement
+                if stop_event is not None and stop_event.is_set():
+                    process.kill()
+                    break
+                key, _, value = line.strip().partition("=")
+                if key != "out_time_us" or not progress_callback:
+                    continue
+                try:
+                    position = int(value) / 1_000_000
+                except ValueError:
+                    continue  # out_time_us=N/A avant la première image
+                # Le dernier segment n'est complet qu'à la fin de FFmpeg
+                while done < len(items) - 1 and position >= ends[done]:
+                    done += 1
+                    progress_callback(done, len(items), items[done - 1].chapter_title)
+            returncode = process.wait()
+        finally:
+            timer.cancel()
+        
+        if returncode == 0 and progress_callback:
+            while done < len(items):
+                done += 1
+                progress_callback(done, len(items), items[done - 1].chapter_title)
+        
+        return returncode
+    
     def _is_output_valid(self, plan_item: SplitPlanItem) -> bool:
         """VÃ©rifie si un fichier de sortie existant est valide."""
         try:
-            if not plan_item.output_path.exists():
-                return False
-            
-            # VÃ©rifier que le fichier n'est pas vide
+            # VÃ©rifier que le fichier existe et n'est pas vide (un seul stat)
             if plan_item.output_path.stat().st_size == 0:
                 return False
             
             # VÃ©rifier la durÃ©e si possible
-            from ..utils.ffprobe import get_video_duration
-            obtained_duration = get_video_duration(plan_item.output_path)
+            obtained_duration = self._existing_duration(plan_item)
             duration_error = abs(plan_item.expected_duration_s - obtained_duration)
             
             return duration_error <= self.settings.validation.tolerance_seconds
             
         except Exception:
             return False
+    
+    def _recorded_duration(self, plan_item: SplitPlanItem) -> Optional[float]:
+        """Durée d'une sortie validée par un précédent découpage (None si à sonder)."""
+        if not self.settings.validation.trust_existing_by_size:
+            return None
+        return markers.recorded_duration(plan_item.output_path)
+    
+    def _existing_duration(self, plan_item: SplitPlanItem) -> float:
+        """Durée d'une sortie existante: celle du marqueur si le fichier est inchangé, sinon ffprobe."""
+        duration = self._recorded_duration(plan_item)
+        if duration is None:
+            duration = ffprobe.get_video_duration(plan_item.output_path)
+        return duration
 
 
 def create_ffmpeg_cutter(settings: Optional[Settings] = None) -> FFmpegCutter:
@@ -0,0 +1,98 @@
+"""Marqueurs des sorties validées, pour ignorer les fichiers existants sans ffprobe."""
+
+import functools
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+from ..utils.jsonio import json_dumps, json_loads
+
+
+# Un marqueur caché par répertoire de sortie: {nom: [taille, mtime_ns, durée]}
+MARKER_NAME = ".ytsplit-ok.json"
+
+# Les chapitres d'une vidéo sont écrits en parallèle dans le même répertoire
+_write_lock = threading.Lock()
+
+
+def _read_marker(marker_path: Path) -> dict:
+    """Contenu d'un marqueur (vide s'il est absent ou illisible)."""
+    try:
+        stat = marker_path.stat()
+    except OSError:
+        return {}
+    return _load_marker(str(marker_path), stat.st_mtime_ns, stat.st_size)
+
+
+@functools.lru_cache(maxsize=32)
+def _load_marker(path: str, mtime_ns: int, size: int) -> dict:
+    """Marqueur lu une fois par version du fichier (clé: chemin, mtime, taille)."""
+    return _parse_marker(path)
+
+
+def _parse_marker(path: str) -> dict:
+    """Lit un marqueur sur disque."""
+    try:
+        with open(path, "rb") as f:
+            data = json_loads(f.read())
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def record_output(output_path: Path, duration_s: float) -> None:
+    """
+    Enregistre une sortie validée dans le marqueur de son répertoire.
+    
+    La taille et la date de modification sont mémorisées: un fichier modifié
+    ou remplacé ensuite n'est plus considéré comme validé.
+    
+    Args:
+        output_path: Fichier de sortie
+        duration_s: Durée du fichier (mesurée, ou attendue si non sondée)
+    """
+    try:
+        stat = output_path.stat()
+    except OSError:
+        return
+    
+    marker_path = output_path.parent / MARKER_NAME
+    with _write_lock:
+        # Relecture directe: deux écritures rapprochées peuvent garder la même clé de cache
+        entries = _parse_marker(str(marker_path))
+        entries[output_path.name] = [stat.st_size, stat.st_mtime_ns, duration_s]
+        
+        # Écriture atomique: un marqueur tronqué serait ignoré, pas mal interprété
+        tmp_path = marker_path.with_name(f"{MARKER_NAME}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(json_dumps(entries))
+            os.replace(tmp_path, marker_path)
+        except OSError:
+            pass  # Le marqueur n'est qu'une optimisation: la sortie reste valide
+
+
+def recorded_duration(output_path: Path) -> Optional[float]:
+    """
+    Durée enregistrée pour une sortie inchangée depuis sa validation.
+    
+    Args:
+        output_path: Fichier de sortie
+    
+    Returns:
+        Optional[float]: Durée en secondes, ou None si la sortie doit être sondée
+    """
+    entry = _read_marker(output_path.parent / MARKER_NAME).get(output_path.name)
+    if not entry:
+        return None
+    
+    try:
+        stat = output_path.stat()
+        size, mtime_ns, duration_s = entry
+    except (OSError, TypeError, ValueError):
+        return None
+    
+    if stat.st_size != size or stat.st_mtime_ns != mtime_ns:
+        return None
+    return float(duration_s)
@@ -1,14 +1,90 @@
 """Module de génération de noms de fichiers sûrs."""
 
+import functools
+import os
 import re
 from pathlib import Path
-from typing import Dict, Optional
+from string import Formatter
+from types import MappingProxyType
+from typing import Callable, Dict, Mapping, Optional
+
+
+# Caractères problématiques sur Windows et leurs équivalents pleine chasse
+# (lecture seule: partagé par tous les appels et par les valeurs par défaut de la config)
+DEFAULT_REPLACE_CHARS: Mapping[str, str] = MappingProxyType({
+    "<": "＜", ">": "＞", ":": "：", "\"": "＂", "/": "／", 
+    "\\": "＼", "|": "｜", "?": "？", "*": "＊"
+})
+
+
+# Noms réservés par Windows (avec ou sans extension)
+_WINDOWS_RESERVED = frozenset({
+    'CON', 'PRN', 'AUX', 'NUL',
+    'COM1', 'COM2', 'COM3', 'COM4', 'COM5', 'COM6', 'COM7', 'COM8', 'COM9',
+    'LPT1', 'LPT2', 'LPT3', 'LPT4', 'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9'
+})
+
+# Caractères interdits dans un nom de fichier (ordre conservé pour le message d'erreur)
+_FORBIDDEN_CHARS = '<>:"/\\|?*'
+_FORBIDDEN_SET = frozenset(_FORBIDDEN_CHARS)
+
+_WS_RE = re.compile(r'\s+')
+_CTRL_RE = re.compile(r'[\x00-\x1f\x7f-\x9f]')
+_TEMPLATE_FIELD_NAME_RE = re.compile(r"[.\[]")
+
+
+# Variables disponibles dans le template de nommage des chapitres
+TEMPLATE_FIELDS = frozenset({"n", "title", "start", "end", "duration"})
+
+
+@functools.lru_cache(maxsize=32)
+def compile_template(template: str) -> Callable[..., str]:
+    """
+    Analyse une fois le template de nommage et retourne sa fonction de formatage.
+    
+    Un template invalide (syntaxe ou variable inconnue) est rejeté dès le
+    chargement de la configuration plutôt qu'au milieu d'un lot.
+    
+    Args:
+        template: Template str.format (ex: "{n:02d} - {title}")
+        
+    Returns:
+        Callable: Fonction appelée avec les variables de TEMPLATE_FIELDS
+        
+    Raises:
+        ValueError: Si le template est invalide
+    """
+    try:
+        fields = [field for _, field, _, _ in Formatter().parse(template) if field is not None]
+    except ValueError as e:
+        raise ValueError(f"Template de nommage invalide '{template}': {e}")
+    
+    for field in fields:
+        name = _TEMPLATE_FIELD_NAME_RE.split(field, maxsplit=1)[0]
+        if name not in TEMPLATE_FIELDS:
+            raise ValueError(
+                f"Variable inconnue dans le template de nommage: '{{{field}}}' "
+                f"(disponibles: {', '.join(sorted(TEMPLATE_FIELDS))})"
+            )
+    
+    return template.format
+
+
+@functools.lru_cache(maxsize=16)
+def _translation_table(replace_items: tuple[tuple[str, str], ...]) -> Optional[dict[int, str]]:
+    """Table ``str.translate`` des remplacements, construite une fois par mapping.
+    
+    None si une clé fait plus d'un caractère (remplacements successifs requis).
+    """
+    if not all(len(char) == 1 for char, _ in replace_items):
+        return None
+    return str.maketrans(dict(replace_items))
 
 
 def generate_safe_filename(
     name: str,
     max_length: int = 120,
-    replace_chars: Optional[Dict[str, str]] = None
+    replace_chars: Optional[Mapping[str, str]] = None
 ) -> str:
     """
     Génère un nom de fichier/répertoire sûr pour tous les OS.
@@ -22,20 +98,20 @@ def generate_safe_filename(
         str: Nom sûr et sanitisé
     """
     if replace_chars is None:
-        # Caractères par défaut problématiques sur Windows
-        replace_chars = {
-            "<": "＜", ">": "＞", ":": "：", "\"": "＂", "/": "／", 
-            "\\": "＼", "|": "｜", "?": "？", "*": "＊"
-        }
+        replace_chars = DEFAULT_REPLACE_CHARS
     
-    # Remplacer les caractères problématiques
-    safe_name = name
-    for char, replacement in replace_chars.items():
-        safe_name = safe_name.replace(char, replacement)
+    # Remplacer les caractères problématiques (une seule passe via str.translate)
+    table = _translation_table(tuple(replace_chars.items()))
+    if table is not None:
+        safe_name = name.translate(table)
+    else:
+        safe_name = name
+        for char, replacement in replace_chars.items():
+            safe_name = safe_name.replace(char, replacement)
     
     # Nettoyer les espaces multiples et les caractères de contrôle
-    safe_name = re.sub(r'\s+', ' ', safe_name)  # Espaces multiples -> un seul
-    safe_name = re.sub(r'[\x00-\x1f\x7f-\x9f]', '', safe_name)  # Caractères de contrôle
+    safe_name = _WS_RE.sub(' ', safe_name)  # Espaces multiples -> un seul
+    safe_name = _CTRL_RE.sub('', safe_name)  # Caractères de contrôle
     
     # Supprimer les espaces en début/fin
     safe_name = safe_name.strip()
@@ -44,13 +120,7 @@ def generate_safe_filename(
     safe_name = safe_name.rstrip('.')
     
     # Gérer les noms réservés Windows
-    windows_reserved = {
-        'CON', 'PRN', 'AUX', 'NUL',
-        'COM1', 'COM2', 'COM3', 'COM4', 'COM5', 'COM6', 'COM7', 'COM8', 'COM9',
-        'LPT1', 'LPT2', 'LPT3', 'LPT4', 'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9'
-    }
-    
-    if safe_name.upper() in windows_reserved:
+    if safe_name.upper() in _WINDOWS_RESERVED:
         safe_name = f"{safe_name}_file"
     
     # Limiter la longueur
@@ -64,16 +134,31 @@ def generate_safe_filename(
     return safe_name
 
 
+def _listdir_names(directory: Path) -> set[str]:
+    """Noms des entrées d'un répertoire, en un seul parcours (ensemble vide s'il n'existe pas)."""
+    try:
+        with os.scandir(directory) as entries:
+            return {entry.name for entry in entries}
+    except (FileNotFoundError, NotADirectoryError):
+        return set()
+
+
 def handle_filename_collision(
     base_path: Path,
-    max_attempts: int = 100
+    max_attempts: int = 100,
+    existing_names: Optional[set[str]] = None
 ) -> Path:
     """
     Gère les collisions de noms de fichier en ajoutant un suffixe numérique.
     
+    Le répertoire parent est lu une seule fois (``os.scandir``) au lieu d'un
+    ``stat`` par candidat, ce qui compte sur les partages réseau.
+    
     Args:
         base_path: Chemin de base souhaité
         max_attempts: Nombre maximum de tentatives
+        existing_names: Noms déjà présents dans le répertoire parent (évite
+            de le relire pour plusieurs fichiers voisins)
         
     Returns:
         Path: Chemin unique disponible
@@ -81,7 +166,11 @@ def handle_filename_collision(
     Raises:
         ValueError: Si aucun nom unique n'est trouvé
     """
-    if not base_path.exists():
+    if existing_names is None:
+        if not base_path.exists():
+            return base_path
+        existing_names = _listdir_names(base_path.parent)
+    elif base_path.name not in existing_names:
         return base_path
     
     # Séparer le nom et l'extension
@@ -91,10 +180,9 @@ def handle_filename_collision(
     
     for i in range(2, max_attempts + 2):
         new_name = f"{stem} ({i}){suffix}"
-        new_path = parent / new_name
         
-        if not new_path.exists():
-            return new_path
+        if new_name not in existing_names:
+            return parent / new_name
     
     raise ValueError(f"Impossible de trouver un nom unique après {max_attempts} tentatives")
 
@@ -103,7 +191,8 @@ def create_output_structure(
     video_title: str,
     video_id: str,
     base_output_dir: Path,
-    replace_chars: Optional[Dict[str, str]] = None
+    replace_chars: Optional[Dict[str, str]] = None,
+    existing_names: Optional[set[str]] = None
 ) -> Path:
     """
     Crée la structure de répertoire de sortie pour une vidéo.
@@ -113,6 +202,8 @@ def create_output_structure(
         video_id: ID unique de la vidéo
         base_output_dir: Répertoire de base
         replace_chars: Caractères à remplacer
+        existing_names: Noms déjà présents dans ``base_output_dir``; mis à jour
+            avec le répertoire créé pour servir aux appels suivants
         
     Returns:
         Path: Répertoire de sortie créé
@@ -124,7 +215,10 @@ def create_output_structure(
     output_dir = base_output_dir / dir_name
     
     # Gérer les collisions de répertoire
-    if output_dir.exists():
+    if existing_names is not None:
+        output_dir = handle_filename_collision(output_dir, existing_names=existing_names)
+        existing_names.add(output_dir.name)
+    elif output_dir.exists():
         output_dir = handle_filename_collision(output_dir)
     
     # Créer le répertoire
@@ -150,24 +244,17 @@ def validate_filename(name: str) -> tuple[bool, Optional[str]]:
         return False, f"Nom trop long ({len(name)} > 255 caractères)"
     
     # Caractères interdits
-    forbidden_chars = '<>:"/\\|?*'
-    for char in forbidden_chars:
-        if char in name:
-            return False, f"Caractère interdit: '{char}'"
+    if not _FORBIDDEN_SET.isdisjoint(name):
+        char = next(char for char in _FORBIDDEN_CHARS if char in name)
+        return False, f"Caractère interdit: '{char}'"
     
     # Caractères de contrôle
-    if re.search(r'[\x00-\x1f\x7f-\x9f]', name):
+    if _CTRL_RE.search(name):
         return False, "Contient des caractères de contrôle"
     
     # Noms réservés Windows
-    windows_reserved = {
-        'CON', 'PRN', 'AUX', 'NUL',
-        'COM1', 'COM2', 'COM3', 'COM4', 'COM5', 'COM6', 'COM7', 'COM8', 'COM9',
-        'LPT1', 'LPT2', 'LPT3', 'LPT4', 'LPT5', 'LPT6', 'LPT7', 'LPT8', 'LPT9'
-    }
-    
     name_upper = Path(name).stem.upper()
-    if name_upper in windows_reserved:
+    if name_upper in _WINDOWS_RESERVED:
         return False, f"Nom réservé Windows: '{name_upper}'"
     
     # Points en fin
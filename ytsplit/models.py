@@ -1,5 +1,7 @@
 """Modèles de données Pydantic pour le YouTube Chapter Splitter."""
 
+from itertools import pairwise
+from operator import attrgetter
 from typing import Literal, Optional, Union
 from pathlib import Path
 from pydantic import BaseModel, Field
@@ -34,13 +36,13 @@ class VideoMeta(BaseModel):
         if not self.chapters:
             raise ValueError("Une vidéo doit avoir au moins un chapitre")
         
-        # Trier les chapitres par start_s
-        self.chapters.sort(key=lambda c: c.start_s)
+        # Trier les chapitres par start_s (linéaire si déjà triés, le cas usuel)
+        self.chapters.sort(key=attrgetter("start_s"))
         
-        # Vérifier qu'il n'y a pas de chevauchements
-        for i in range(len(self.chapters) - 1):
-            if self.chapters[i].end_s > self.chapters[i + 1].start_s:
-                raise ValueError(f"Chevauchement détecté entre les chapitres {i+1} et {i+2}")
+        # Vérifier qu'il n'y a pas de chevauchements (une passe sur les paires voisines)
+        for i, (current, following) in enumerate(pairwise(self.chapters), start=1):
+            if current.end_s > following.start_s:
+                raise ValueError(f"Chevauchement détecté entre les chapitres {i} et {i+1}")
 
 
 class SplitPlanItem(BaseModel):
@@ -53,7 +55,9 @@ class SplitPlanItem(BaseModel):
     end_s: float = Field(..., ge=0, description="Timestamp de fin en secondes")
     expected_duration_s: float = Field(..., gt=0, description="Durée attendue en secondes")
     output_path: Path = Field(..., description="Chemin de sortie du fichier")
-    mode: Literal["reencode"] = Field(default="reencode", description="Mode de découpage")
+    mode: Literal["reencode", "copy"] = Field(
+        default="reencode", description="Mode de découpage (copy: copie des flux depuis une keyframe)"
+    )
     
     def model_post_init(self, __context) -> None:
         """Validation post-initialisation."""
@@ -113,6 +117,12 @@ class ProcessingStats(BaseModel):
             return 0.0
         return (self.successful_chapters / self.total_chapters) * 100.0
     
+    def __iadd__(self, other: "ProcessingStats") -> "ProcessingStats":
+        """Cumule en place les statistiques d'un autre traitement (tous les champs sont additifs)."""
+        for name in type(self).model_fields:
+            setattr(self, name, getattr(self, name) + getattr(other, name))
+        return self
+    
     def model_post_init(self, __context) -> None:
         """Validation post-initialisation."""
         if self.successful_chapters + self.failed_chapters != self.total_chapters:
@@ -1,9 +1,18 @@
 """Utilitaires pour le parsing et la manipulation des timecodes."""
 
+import functools
 import re
 from typing import Union
 
 
+# HH:MM:SS, MM:SS ou SS, millisecondes optionnelles: un seul motif précompilé
+# (les heures ne sont possibles qu'avec les minutes)
+_TIMECODE_RE = re.compile(
+    r'^(?:(?:(?P<hours>\d{1,2}):)?(?P<minutes>\d{1,2}):)?'
+    r'(?P<seconds>\d{1,2})(?:\.(?P<milliseconds>\d{1,3}))?$'
+)
+
+
 class TimecodeError(ValueError):
     """Exception levée lors d'erreurs de parsing de timecode."""
     pass
@@ -38,47 +47,43 @@ def parse_timecode(timecode_str: str) -> float:
     if not timecode_str:
         raise TimecodeError("Timecode vide")
     
-    # Patterns regex pour différents formats
-    patterns = [
-        # HH:MM:SS.mmm ou HH:MM:SS
-        r'^(?P<hours>\d{1,2}):(?P<minutes>\d{1,2}):(?P<seconds>\d{1,2})(?:\.(?P<milliseconds>\d{1,3}))?$',
-        # MM:SS.mmm ou MM:SS
-        r'^(?P<minutes>\d{1,2}):(?P<seconds>\d{1,2})(?:\.(?P<milliseconds>\d{1,3}))?$',
-        # SS.mmm ou SS
-        r'^(?P<seconds>\d{1,2})(?:\.(?P<milliseconds>\d{1,3}))?$'
-    ]
-    
-    for pattern in patterns:
-        match = re.match(pattern, timecode_str)
-        if match:
-            groups = match.groupdict()
-            
-            # Extraire les valeurs avec des défauts
-            hours = int(groups.get('hours', 0))
-            minutes = int(groups.get('minutes', 0))
-            seconds = int(groups.get('seconds', 0))
-            
-            # Gérer les millisecondes
-            milliseconds_str = groups.get('milliseconds', '0')
-            if milliseconds_str:
-                # Padding à droite pour avoir exactement 3 chiffres
-                milliseconds_str = milliseconds_str.ljust(3, '0')[:3]
-                milliseconds = int(milliseconds_str)
-            else:
-                milliseconds = 0
-            
-            # Validation des valeurs
-            if minutes >= 60:
-                raise TimecodeError(f"Minutes invalides: {minutes} (doit être < 60)")
-            if seconds >= 60:
-                raise TimecodeError(f"Secondes invalides: {seconds} (doit être < 60)")
-            if milliseconds >= 1000:
-                raise TimecodeError(f"Millisecondes invalides: {milliseconds} (doit être < 1000)")
-            
-            # Calcul du total en secondes
-            total_seconds = (hours * 3600) + (minutes * 60) + seconds + (milliseconds / 1000.0)
-            
-            return total_seconds
+    return _parse_timecode(timecode_str)
+
+
+@functools.lru_cache(maxsize=4096)
+def _parse_timecode(timecode_str: str) -> float:
+    """Conversion d'un timecode nettoyé, mémorisée (les mêmes timecodes reviennent d'une vidéo à l'autre).
+    
+    Les erreurs ne sont pas mises en cache: une entrée invalide est réanalysée.
+    """
+    match = _TIMECODE_RE.match(timecode_str)
+    if match:
+        hours, minutes, seconds, milliseconds_str = match.groups()
+        
+        # Extraire les valeurs avec des défauts (heures et minutes optionnelles)
+        hours = int(hours) if hours else 0
+        minutes = int(minutes) if minutes else 0
+        seconds = int(seconds)
+        
+        # Gérer les millisecondes
+        if milliseconds_str:
+            # Padding à droite pour avoir exactement 3 chiffres
+            milliseconds = int(milliseconds_str.ljust(3, '0')[:3])
+        else:
+            milliseconds = 0
+        
+        # Validation des valeurs
+        if minutes >= 60:
+            raise TimecodeError(f"Minutes invalides: {minutes} (doit être < 60)")
+        if seconds >= 60:
+            raise TimecodeError(f"Secondes invalides: {seconds} (doit être < 60)")
+        if milliseconds >= 1000:
+            raise TimecodeError(f"Millisecondes invalides: {milliseconds} (doit être < 1000)")
+        
+        # Calcul du total en secondes
+        total_seconds = (hours * 3600) + (minutes * 60) + seconds + (milliseconds / 1000.0)
+        
+        return total_seconds
     
     raise TimecodeError(f"Format de timecode non reconnu: '{timecode_str}'")
 
@@ -1,11 +1,14 @@
 """Module de planification des segments de découpage."""
 
+import os
 from pathlib import Path
 from typing import List, Optional
 
 from ..models import VideoMeta, Chapter, SplitPlanItem
 from ..config import Settings
-from ..io.naming import generate_safe_filename
+from ..io import markers
+from ..io.naming import compile_template, generate_safe_filename
+from ..utils import ffprobe
 
 
 class PlanningError(Exception):
@@ -108,8 +111,11 @@ class SplitPlanner:
         Returns:
             str: Nom de fichier avec extension
         """
-        # Utiliser le template de nommage depuis la configuration
-        template = self.settings.naming.template
+        # Template de nommage de la configuration, analysé une seule fois
+        try:
+            format_filename = compile_template(self.settings.naming.template)
+        except ValueError as e:
+            raise PlanningError(str(e))
         
         # Variables disponibles pour le template
         variables = {
@@ -121,7 +127,7 @@ class SplitPlanner:
         }
         
         # Appliquer le template
-        filename = template.format(**variables)
+        filename = format_filename(**variables)
         
         # Sanitiser le nom de fichier
         safe_filename = generate_safe_filename(
@@ -189,6 +195,37 @@ class SplitPlanner:
             
             raise PlanningError(f"Noms de fichiers en doublon: {', '.join(duplicates)}")
     
+    def outputs_present(self, meta: VideoMeta, output_dir: Optional[Path] = None) -> bool:
+        """
+        Vérifie rapidement si tous les fichiers de sortie attendus existent déjà.
+        
+        Un seul parcours du répertoire de la vidéo, sans construire le plan ni
+        valider les durées: sert de pré-filtre avant ``filter_existing_files``.
+        
+        Args:
+            meta: Métadonnées de la vidéo avec chapitres
+            output_dir: Répertoire de sortie (utilise settings.out_dir si None)
+            
+        Returns:
+            bool: True si chaque chapitre a déjà un fichier du nom attendu
+        """
+        if not meta.chapters:
+            return False
+        
+        if output_dir is None:
+            output_dir = self.settings.out_dir
+        
+        video_output_dir = output_dir / self._sanitize_video_title(meta.title, meta.video_id)
+        
+        try:
+            with os.scandir(video_output_dir) as entries:
+                found = {entry.name for entry in entries if entry.is_file()}
+        except OSError:
+            return False
+        
+        expected = {self._generate_chapter_filename(chapter) for chapter in meta.chapters}
+        return expected <= found
+    
     def filter_existing_files(self, plan_items: List[SplitPlanItem]) -> tuple[List[SplitPlanItem], List[SplitPlanItem]]:
         """
         Sépare les éléments du plan en fichiers à traiter et fichiers existants.
@@ -202,24 +239,63 @@ class SplitPlanner:
         items_to_process = []
         existing_items = []
         
+        # Durées des fichiers existants: celles des sorties validées par un précédent
+        # découpage sans ffprobe, les autres sondées ensemble (un fichier illisible est retraité)
+        durations = {}
+        if self.settings.skip_existing:
+            to_probe = []
+            for item in plan_items:
+                recorded = None
+                if self.settings.validation.trust_existing_by_size:
+                    recorded = markers.recorded_duration(item.output_path)
+                if recorded is not None:
+                    durations[item.output_path] = recorded
+                elif item.output_path.exists():
+                    to_probe.append(item.output_path)
+            durations.update(ffprobe.batch_video_durations(to_probe))
+        
         for item in plan_items:
-            if item.output_path.exists() and self.settings.skip_existing:
+            existing_duration = durations.get(item.output_path)
+            if existing_duration is not None:
                 # Vérifier que le fichier existant est valide
-                try:
-                    from ..utils.ffprobe import get_video_duration
-                    existing_duration = get_video_duration(item.output_path)
-                    duration_error = abs(item.expected_duration_s - existing_duration)
-                    
-                    if duration_error <= self.settings.validation.tolerance_seconds:
-                        existing_items.append(item)
-                        continue
-                except Exception:
-                    pass  # Si on ne peut pas valider, on retraite le fichier
+                duration_error = abs(item.expected_duration_s - existing_duration)
+                if duration_error <= self.settings.validation.tolerance_seconds:
+                    existing_items.append(item)
+                    continue
             
             items_to_process.append(item)
         
         return items_to_process, existing_items
     
+    def assign_cut_modes(self, plan_items: List[SplitPlanItem], source_path: Path) -> List[SplitPlanItem]:
+        """
+        Passe en mode "copy" les éléments dont le début tombe sur une keyframe de la source.
+        
+        Les keyframes sont lues une seule fois pour tout le plan. Avec le crop
+        activé (filtre vidéo, donc ré-encodage) ou si la sonde échoue, le plan
+        est retourné inchangé.
+        
+        Args:
+            plan_items: Plan de découpage
+            source_path: Fichier vidéo source
+            
+        Returns:
+            List[SplitPlanItem]: Plan avec le mode de découpage de chaque élément
+        """
+        if self.settings.crop.enabled:
+            return plan_items
+        
+        try:
+            keyframes = ffprobe.get_keyframe_timestamps(source_path, max_keyframes=None)
+        except ffprobe.FFprobeError:
+            return plan_items
+        
+        tolerance = self.settings.validation.tolerance_seconds
+        return [
+            item.model_copy(update={"mode": choose_mode(item, keyframes, tolerance)})
+            for item in plan_items
+        ]
+    
     def estimate_processing_time(self, plan_items: List[SplitPlanItem]) -> dict:
         """
         Estime le temps de traitement pour un plan.
@@ -265,6 +341,27 @@ class SplitPlanner:
         }
 
 
+def choose_mode(plan_item: SplitPlanItem, keyframes: List[float], tolerance_s: float) -> str:
+    """
+    Choisit le mode de découpage d'un élément du plan.
+    
+    La copie des flux démarre sur une keyframe: elle n'est retenue que si le
+    début du chapitre suit une keyframe de moins de ``tolerance_s`` secondes
+    (la fin d'une copie peut tomber sur n'importe quel paquet).
+    
+    Args:
+        plan_item: Élément du plan
+        keyframes: Timestamps triés des keyframes de la source
+        tolerance_s: Écart de durée toléré
+        
+    Returns:
+        str: "copy" ou "reencode"
+    """
+    if ffprobe.snap_to_keyframe(plan_item.start_s, keyframes, tolerance_s) is not None:
+        return "copy"
+    return "reencode"
+
+
 def create_split_planner(settings: Optional[Settings] = None) -> SplitPlanner:
     """Factory function pour créer un SplitPlanner."""
     if settings is None:
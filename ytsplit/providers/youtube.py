@@ -2,14 +2,113 @@
 
 from __future__ import annotations
 
-import json
+import os
+import re
 import subprocess
+import tempfile
+import threading
+import time
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Callable, Optional, Dict, Any, List
 from urllib.parse import urlparse, parse_qs
 
 from ..models import VideoMeta, Chapter
 from ..config import Settings
+from ..utils.jsonio import json_loads
+
+
+# Durée de validité du cache disque des métadonnées (work_dir/.meta_cache)
+META_CACHE_TTL_S = 24 * 3600
+
+# Code de langue en tête d'une ligne de --list-subs
+_SUB_LANG_RE = re.compile(r"^([a-zA-Z-]{2,10})")
+
+# Lignes de progression émises par yt-dlp (--progress-template), une par ligne
+_PROGRESS_PREFIX = "ytsplit-progress"
+_PROGRESS_TEMPLATE = (
+    f"download:{_PROGRESS_PREFIX} %(progress.downloaded_bytes)s "
+    "%(progress.total_bytes)s %(progress.total_bytes_estimate)s"
+)
+
+# Rappel de progression: (octets téléchargés, total en octets ou None si inconnu)
+ProgressHook = Callable[[int, Optional[int]], None]
+
+
+def _first_non_empty(directory: Path, names: List[str]) -> Optional[Path]:
+    """Premier fichier non vide parmi ``names`` (ordre de préférence), en un seul os.scandir.
+    
+    Seules les entrées dont le nom figure dans ``names`` sont stat()ées: un
+    échec de recherche coûte un parcours de répertoire au lieu d'un stat par candidat.
+    """
+    wanted = set(names)
+    sizes: Dict[str, int] = {}
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.name in wanted and entry.is_file():
+                    sizes[entry.name] = entry.stat().st_size
+    except OSError:
+        return None
+    for name in names:
+        if sizes.get(name, 0) > 0:
+            return directory / name
+    return None
+
+
+def _parse_progress_line(line: str) -> Optional[tuple[int, Optional[int]]]:
+    """Décode une ligne ``_PROGRESS_TEMPLATE`` en (téléchargé, total); None sinon."""
+    parts = line.split()
+    if len(parts) != 4 or parts[0] != _PROGRESS_PREFIX:
+        return None
+    
+    def _to_int(value: str) -> Optional[int]:
+        try:
+            return int(float(value))
+        except ValueError:  # "NA" quand yt-dlp ne connaît pas la valeur
+            return None
+    
+    downloaded = _to_int(parts[1])
+    if downloaded is None:
+        return None
+    return downloaded, _to_int(parts[2]) or _to_int(parts[3])
+
+
+def _run_with_progress(cmd: List[str], timeout: float, progress_hook: ProgressHook) -> subprocess.CompletedProcess:
+    """Exécute yt-dlp en lisant sa progression au fil de l'eau.
+    
+    stdout est lu ligne à ligne pour alimenter ``progress_hook``; stderr passe
+    par un fichier temporaire pour ne jamais bloquer le processus. Une exception
+    levée par ``progress_hook`` (arrêt demandé) tue yt-dlp avant d'être propagée.
+    """
+    timed_out = threading.Event()
+    with tempfile.TemporaryFile() as err_file, subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=err_file, text=True, encoding="utf-8", errors="replace"
+    ) as proc:
+        def _kill():
+            timed_out.set()
+            proc.kill()
+        
+        timer = threading.Timer(timeout, _kill)
+        timer.start()
+        try:
+            for line in proc.stdout:
+                parsed = _parse_progress_line(line)
+                if parsed is not None:
+                    progress_hook(*parsed)
+            returncode = proc.wait()
+        except BaseException:
+            proc.kill()
+            raise
+        finally:
+            timer.cancel()
+        
+        if timed_out.is_set():
+            raise subprocess.TimeoutExpired(cmd, timeout)
+        
+        err_file.seek(0)
+        stderr = err_file.read().decode("utf-8", errors="replace")
+    
+    return subprocess.CompletedProcess(cmd, returncode, "", stderr)
 
 
 class YouTubeError(Exception):
@@ -22,9 +121,34 @@ class YouTubeProvider:
 
     def __init__(self, settings: Settings):
         self.settings = settings
+        # Diagnostic yt-dlp propre à chaque thread: un provider partagé entre
+        # vidéos traitées en parallèle ne mélange pas leurs erreurs
+        self._last = threading.local()
         self.last_ytdlp_error: Optional[str] = None
         self.last_ytdlp_command: Optional[List[str]] = None
-        self._validate_ytdlp()
+        # Résultats yt-dlp mémorisés par URL (évite de ré-interroger YouTube)
+        self._info_cache: Dict[str, Dict[str, Any]] = {}
+        self._subtitles_cache: Dict[str, Dict[str, List[str]]] = {}
+        if not settings._tools_checked:
+            self._validate_ytdlp()
+
+    @property
+    def last_ytdlp_error(self) -> Optional[str]:
+        """Stderr du dernier appel yt-dlp en échec du thread courant."""
+        return getattr(self._last, "error", None)
+
+    @last_ytdlp_error.setter
+    def last_ytdlp_error(self, value: Optional[str]) -> None:
+        self._last.error = value
+
+    @property
+    def last_ytdlp_command(self) -> Optional[List[str]]:
+        """Dernière commande yt-dlp lancée par le thread courant."""
+        return getattr(self._last, "command", None)
+
+    @last_ytdlp_command.setter
+    def last_ytdlp_command(self, value: Optional[List[str]]) -> None:
+        self._last.command = value
 
     def _validate_ytdlp(self) -> None:
         try:
@@ -69,6 +193,12 @@ class YouTubeProvider:
     def get_video_info(self, url: str) -> VideoMeta:
         if not self.validate_youtube_url(url):
             raise YouTubeError(f"URL YouTube invalide: {url}")
+        if url in self._info_cache:
+            return self._convert_ytdlp_info_to_meta(self._info_cache[url], url)
+        cached = self._load_cached_info(url)
+        if cached is not None:
+            self._info_cache[url] = cached
+            return self._convert_ytdlp_info_to_meta(cached, url)
         try:
             cmd = ["yt-dlp", "--dump-json", "--no-download", "--no-warnings", url]
             self.last_ytdlp_command = cmd
@@ -83,13 +213,45 @@ class YouTubeProvider:
             if result.returncode != 0:
                 self.last_ytdlp_error = result.stderr
                 raise YouTubeError(f"Échec extraction métadonnées: {result.stderr}")
-            info = json.loads(result.stdout)
-            return self._convert_ytdlp_info_to_meta(info, url)
+            info = json_loads(result.stdout)
+            meta = self._convert_ytdlp_info_to_meta(info, url)
+            self._info_cache[url] = info
+            self._store_cached_info(url, result.stdout)
+            return meta
         except subprocess.TimeoutExpired:
             raise YouTubeError("Timeout lors de l'extraction des métadonnées")
         except Exception as e:
             raise YouTubeError(f"Erreur inattendue lors de l'extraction: {e}")
 
+    def _meta_cache_path(self, url: str) -> Path:
+        return self.settings.work_dir / ".meta_cache" / f"{self.extract_video_id(url)}.json"
+
+    def _load_cached_info(self, url: str) -> Optional[Dict[str, Any]]:
+        """Métadonnées yt-dlp du cache disque si elles ont moins de META_CACHE_TTL_S."""
+        cache_file = self._meta_cache_path(url)
+        try:
+            if time.time() - cache_file.stat().st_mtime > META_CACHE_TTL_S:
+                return None
+            return json_loads(cache_file.read_bytes())
+        except (OSError, ValueError):
+            return None
+
+    def _store_cached_info(self, url: str, raw_json: str) -> None:
+        # Écriture atomique (fichier temporaire voisin puis os.replace): une écriture
+        # interrompue ou concurrente ne laisse jamais de JSON tronqué dans le cache
+        cache_file = self._meta_cache_path(url)
+        tmp_name = None
+        try:
+            cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(dir=cache_file.parent, suffix=".tmp")
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(raw_json)
+            os.replace(tmp_name, cache_file)
+        except OSError:
+            # Le cache est facultatif
+            if tmp_name is not None and os.path.exists(tmp_name):
+                os.unlink(tmp_name)
+
     def _convert_ytdlp_info_to_meta(self, info: Dict[str, Any], original_url: str) -> VideoMeta:
         video_id = info.get("id", "")
         title = info.get("title", "Titre inconnu")
@@ -114,7 +276,12 @@ class YouTubeProvider:
         return out
 
     # ----------------------------- Download video -----------------------
-    def download_video(self, url: str, output_dir: Optional[Path] = None) -> Path:
+    def download_video(
+        self,
+        url: str,
+        output_dir: Optional[Path] = None,
+        progress_hook: Optional[ProgressHook] = None,
+    ) -> Path:
         if not self.validate_youtube_url(url):
             raise YouTubeError(f"URL YouTube invalide: {url}")
         output_dir = output_dir or self.settings.work_dir
@@ -145,7 +312,11 @@ class YouTubeProvider:
                     url,
                 ]
                 self.last_ytdlp_command = cmd
-                res = subprocess.run(cmd, capture_output=True, text=True, timeout=1800)
+                if progress_hook is None:
+                    res = subprocess.run(cmd, capture_output=True, text=True, timeout=1800)
+                else:
+                    cmd[-1:-1] = ["--newline", "--progress-template", _PROGRESS_TEMPLATE]
+                    res = _run_with_progress(cmd, 1800, progress_hook)
                 if res.returncode == 0:
                     ok = True
                     self.last_ytdlp_error = None
@@ -171,11 +342,7 @@ class YouTubeProvider:
 
     def get_video_file_path(self, video_id: str, output_dir: Optional[Path] = None) -> Optional[Path]:
         output_dir = output_dir or self.settings.work_dir
-        for ext in ("mp4", "mkv", "webm", "avi"):
-            p = output_dir / f"{video_id}.{ext}"
-            if p.exists() and p.stat().st_size > 0:
-                return p
-        return None
+        return _first_non_empty(output_dir, [f"{video_id}.{ext}" for ext in ("mp4", "mkv", "webm", "avi")])
 
     # ------------------------- yt-dlp resilient -------------------------
     def _run_ytdlp_with_auth(self, base_cmd: List[str], url: str, timeout: int = 180) -> subprocess.CompletedProcess:
@@ -312,6 +479,8 @@ class YouTubeProvider:
     def get_available_subtitles(self, url: str) -> Dict[str, List[str]]:
         if not self.validate_youtube_url(url):
             raise YouTubeError(f"URL YouTube invalide: {url}")
+        if url in self._subtitles_cache:
+            return self._subtitles_cache[url]
         base_cmd = ["yt-dlp", "--list-subs", "--no-warnings"]
         langs = None
         try:
@@ -320,7 +489,6 @@ class YouTubeProvider:
             pass
         res = self._run_ytdlp_resilient(base_cmd, url, timeout=45, languages=langs)
         available: Dict[str, List[str]] = {}
-        import re
         in_section = False
         for line in (res.stdout or "").splitlines():
             s = line.strip()
@@ -333,7 +501,7 @@ class YouTubeProvider:
                 continue
             if s.startswith("Language") or s.startswith("[") or s.startswith("="):
                 continue
-            m = re.match(r"^([a-zA-Z-]{2,10})", s)
+            m = _SUB_LANG_RE.match(s)
             if not m:
                 continue
             lang_code = m.group(1)
@@ -347,6 +515,7 @@ class YouTubeProvider:
                 available[simple] = fmts
                 if lang_code != simple:
                     available[lang_code] = fmts
+        self._subtitles_cache[url] = available
         return available
 
     def download_subtitles(
@@ -463,16 +632,9 @@ class YouTubeProvider:
 
     def get_subtitles_file_path(self, video_id: str, output_dir: Optional[Path] = None) -> Optional[Path]:
         output_dir = output_dir or self.settings.work_dir
-        for lang in ("fr", "en", "auto"):
-            for ext in ("srt", "vtt"):
-                p = output_dir / f"{video_id}.{lang}.{ext}"
-                if p.exists() and p.stat().st_size > 0:
-                    return p
-        for ext in ("srt", "vtt"):
-            p = output_dir / f"{video_id}.{ext}"
-            if p.exists() and p.stat().st_size > 0:
-                return p
-        return None
+        names = [f"{video_id}.{lang}.{ext}" for lang in ("fr", "en", "auto") for ext in ("srt", "vtt")]
+        names += [f"{video_id}.{ext}" for ext in ("srt", "vtt")]
+        return _first_non_empty(output_dir, names)
 
     # ------------------------------ Orchestration -----------------------
     def process_video(self, url: str, force_redownload: bool = False,
@@ -4,6 +4,8 @@ import pytest
 from unittest.mock import patch, MagicMock, Mock
 from pathlib import Path
 import subprocess
+import threading
+import time
 
 from ytsplit.cutting.ffmpeg import FFmpegCutter, FFmpegError, create_ffmpeg_cutter
 from ytsplit.config import Settings
@@ -79,15 +81,73 @@ class TestFFmpegCutter:
         assert cmd[0] == "ffmpeg"
         assert "-i" in cmd
         assert str(source_path) in cmd
-        assert "-ss" in cmd
-        assert "-to" in cmd
-        # Les timestamps sont dans la commande mais pas forcément exactement sous cette forme
-        assert any("00:00:10" in str(arg) for arg in cmd)  # start_s formaté
-        assert any("00:01:10" in str(arg) for arg in cmd)  # end_s formaté
+        # Saut rapide avant -i (2 s avant le chapitre), puis saut précis et durée après
+        seeks = [i for i, arg in enumerate(cmd) if arg == "-ss"]
+        assert len(seeks) == 2
+        assert seeks[0] < cmd.index("-i") < seeks[1]
+        assert cmd[seeks[0] + 1] == "00:00:08.000"
+        assert cmd[seeks[1] + 1] == "00:00:02.000"
+        assert cmd[cmd.index("-t") + 1] == "00:01:00.000"
+        assert "-to" not in cmd
         assert "-c:v" in cmd
         assert "libx264" in cmd
         assert str(plan_item.output_path) in cmd
-    
+
+    def test_build_ffmpeg_command_seek_from_start(self, cutter, plan_item):
+        """Un chapitre proche du début ne saute pas avant 0."""
+        first = plan_item.model_copy(update={'start_s': 0.5, 'expected_duration_s': 69.5})
+        
+        cmd = cutter._build_ffmpeg_command(Path("source.mp4"), first)
+        
+        seeks = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-ss"]
+        assert seeks == ["00:00:00.000", "00:00:00.500"]
+        assert cmd[cmd.index("-t") + 1] == "00:01:09.500"
+
+    def test_ffmpeg_timestamp(self):
+        """Test du formatage des horodatages FFmpeg."""
+        from ytsplit.cutting.ffmpeg import _ffmpeg_timestamp
+
+        assert _ffmpeg_timestamp(0) == "00:00:00.000"
+        assert _ffmpeg_timestamp(70.5) == "00:01:10.500"
+        assert _ffmpeg_timestamp(3725.0406) == "01:02:05.041"
+        assert _ffmpeg_timestamp(59.9996) == "00:01:00.000"
+
+    def test_build_ffmpeg_command_audio(self, cutter, plan_item):
+        """Audio copié par défaut, ré-encodé seulement sur demande."""
+        cmd = cutter._build_ffmpeg_command(Path("source.mp4"), plan_item)
+        assert cmd[cmd.index("-c:a") + 1] == "copy"
+        assert "-b:a" not in cmd
+        assert cmd[cmd.index("-c:s") + 1] == "copy"
+
+        # Conteneur différent: FFmpeg choisit l'encodeur de sous-titres
+        cmd = cutter._build_ffmpeg_command(Path("source.webm"), plan_item)
+        assert "-c:s" not in cmd
+
+        cutter.settings.audio.reencode = True
+        cmd = cutter._build_ffmpeg_command(Path("other.mp4"), plan_item)
+        assert cmd[cmd.index("-c:a") + 1] == "aac"
+        assert cmd[cmd.index("-b:a") + 1] == "128k"
+
+    @patch('ytsplit.config.os.cpu_count', return_value=8)
+    def test_build_ffmpeg_command_threads(self, mock_cpu_count, cutter, plan_item):
+        """Les cœurs sont répartis entre les workers, au décodage et à l'encodage."""
+        cutter.settings.parallel.max_workers = 4
+
+        cmd = cutter._build_ffmpeg_command(Path("source.mp4"), plan_item)
+
+        thread_args = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-threads"]
+        assert thread_args == ["2", "2"]
+        assert cmd.index("-threads") < cmd.index("-i")
+
+        # Fin de file: moins de découpages simultanés, plus de threads chacun
+        assert cutter.settings.parallel.threads_for(1) == 8
+        cmd = cutter._build_ffmpeg_command(Path("source.mp4"), plan_item, threads=8)
+        assert cmd[cmd.index("-threads") + 1] == "8"
+
+        cutter.settings.parallel.threads_per_job = 3
+        cmd = cutter._build_ffmpeg_command(Path("source.mp4"), plan_item)
+        assert cmd[cmd.index("-threads") + 1] == "3"
+
     @patch('ytsplit.utils.ffprobe.get_video_duration')
     @patch('subprocess.run')
     def test_cut_precise_success(self, mock_run, mock_duration, cutter, plan_item, tmp_path):
@@ -96,7 +156,7 @@ class TestFFmpegCutter:
         source_path = tmp_path / "source.mp4"
         source_path.write_text("fake video")
         
-        mock_run.return_value = Mock(returncode=0, stderr="")
+        mock_run.return_value = Mock(returncode=0, stderr=b"")
         mock_duration.return_value = 59.9  # Durée dans la tolérance de 0.2s
         
         # Créer le fichier de sortie simulé
@@ -112,6 +172,30 @@ class TestFFmpegCutter:
         assert result.obtained_duration_s == 59.9
         assert result.processing_time_s >= 0
     
+    @patch('ytsplit.utils.ffprobe.get_keyframe_timestamps')
+    @patch('ytsplit.utils.ffprobe.get_video_duration')
+    @patch('subprocess.run')
+    def test_cut_precise_copy_out_of_tolerance_reencodes(self, mock_run, mock_duration, mock_keyframes,
+                                                         cutter, plan_item, tmp_path):
+        """Copie hors tolérance après arrondi: nouveau découpage avec ré-encodage."""
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+        plan_item = plan_item.model_copy(update={'mode': 'copy'})
+        plan_item.output_path.parent.mkdir(parents=True, exist_ok=True)
+        plan_item.output_path.write_text("fake output")
+        
+        mock_keyframes.return_value = [9.85]
+        mock_run.return_value = Mock(returncode=0, stderr=b"")
+        mock_duration.side_effect = [60.25, 60.0]  # Copie: 0.25s de trop (> 0.2s)
+        
+        result = cutter.cut_precise(source_path, plan_item)
+        
+        assert result.status == "OK"
+        assert result.obtained_duration_s == 60.0
+        first_cmd, second_cmd = (call[0][0] for call in mock_run.call_args_list)
+        assert first_cmd[first_cmd.index("-c") + 1] == "copy"
+        assert "libx264" in second_cmd
+    
     @patch('subprocess.run')
     def test_cut_precise_ffmpeg_error(self, mock_run, cutter, plan_item, tmp_path):
         """Test d'erreur FFmpeg."""
@@ -119,7 +203,7 @@ class TestFFmpegCutter:
         source_path = tmp_path / "source.mp4"
         source_path.write_text("fake video")
         
-        mock_run.return_value = Mock(returncode=1, stderr="FFmpeg error")
+        mock_run.return_value = Mock(returncode=1, stderr=b"FFmpeg error")
         
         # Exécution
         result = cutter.cut_precise(source_path, plan_item)
@@ -146,7 +230,7 @@ class TestFFmpegCutter:
         source_path = tmp_path / "source.mp4"
         source_path.write_text("fake video")
         
-        mock_run.return_value = Mock(returncode=0, stderr="")
+        mock_run.return_value = Mock(returncode=0, stderr=b"")
         mock_duration.return_value = 58.0  # 2 secondes d'écart avec 60s attendu
         
         plan_item.output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -186,8 +270,8 @@ class TestFFmpegCutter:
         
         # Premier appel échoue, deuxième réussit
         mock_run.side_effect = [
-            Mock(returncode=1, stderr="First error"),  # Premier échec
-            Mock(returncode=0, stderr="")  # Retry réussi
+            Mock(returncode=1, stderr=b"First error"),  # Premier échec
+            Mock(returncode=0, stderr=b"")  # Retry réussi
         ]
         mock_duration.return_value = 60.0
         
@@ -200,7 +284,111 @@ class TestFFmpegCutter:
         # Vérifications
         assert result.status == "OK"
         assert "retry" in result.message.lower()
-    
+
+    @patch('ytsplit.utils.ffprobe.get_video_duration')
+    @patch('subprocess.run')
+    def test_retry_does_not_mutate_settings(self, mock_run, mock_duration, cutter, plan_item, tmp_path):
+        """Le retry passe le preset à la commande sans toucher aux settings partagés."""
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+
+        mock_run.side_effect = [
+            Mock(returncode=1, stderr=b"First error"),
+            Mock(returncode=0, stderr=b"")
+        ]
+        mock_duration.return_value = 60.0
+        plan_item.output_path.write_text("fake output")
+
+        cutter.cut_precise(source_path, plan_item)
+
+        retry_cmd = mock_run.call_args_list[-1][0][0]
+        assert retry_cmd[retry_cmd.index("-preset") + 1] == "faster"
+        assert cutter.settings.x264.preset == "veryfast"
+
+    @patch('ytsplit.utils.ffprobe.get_keyframe_timestamps')
+    def test_build_stream_copy_command(self, mock_keyframes, cutter, plan_item):
+        """Copie sans ré-encodage quand le début tombe sur une keyframe."""
+        source_path = Path("source.mp4")
+        mock_keyframes.return_value = [0.0, 5.0, 9.9, 14.0]
+
+        # Mode "reencode" (défaut du plan): ré-encodage, sans sonde
+        cutter.settings.stream_copy = True
+        cmd = cutter._build_ffmpeg_command(source_path, plan_item)
+        assert "libx264" in cmd
+        mock_keyframes.assert_not_called()
+
+        plan_item = plan_item.model_copy(update={'mode': 'copy'})
+        cmd = cutter._build_ffmpeg_command(source_path, plan_item)
+        assert cmd[cmd.index("-c") + 1] == "copy"
+        assert cmd[cmd.index("-ss") + 1] == "9.900000"
+        assert cmd[cmd.index("-t") + 1] == "60.100000"
+        assert cmd.index("-ss") < cmd.index("-i")
+        assert "libx264" not in cmd
+
+        # Keyframe trop éloignée du début (> tolérance): ré-encodage
+        mock_keyframes.return_value = [0.0, 9.5]
+        cutter._keyframes.clear()
+        cmd = cutter._build_ffmpeg_command(source_path, plan_item)
+        assert "libx264" in cmd
+
+        # Le retry ré-encode toujours
+        mock_keyframes.return_value = [10.0]
+        cmd = cutter._build_ffmpeg_command(source_path, plan_item, stream_copy=False)
+        assert "libx264" in cmd
+
+    @patch('ytsplit.utils.ffprobe.get_keyframe_timestamps')
+    def test_cut_batch_probes_keyframes_once(self, mock_keyframes, cutter, plan_item, tmp_path):
+        """Les keyframes sont sondées une fois avant les workers, échec compris."""
+        from ytsplit.utils.ffprobe import FFprobeError
+        
+        mock_keyframes.side_effect = FFprobeError("Timeout FFprobe (>300s)")
+        cutter.settings.stream_copy = True
+        items = [
+            plan_item.model_copy(update={'chapter_index': i, 'output_path': tmp_path / f"{i:02d}.mp4"})
+            for i in range(1, 5)
+        ]
+        commands = []
+        
+        def fake_run(cmd, **kwargs):
+            commands.append(cmd)
+            return Mock(returncode=1, stderr=b"")
+        
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+        cutter.settings.validation.max_retries = 0
+        with patch('subprocess.run', side_effect=fake_run):
+            cutter.cut_batch(source_path, items)
+        
+        assert mock_keyframes.call_count == 1
+        assert len(commands) == 4
+        assert all("libx264" in cmd for cmd in commands)
+
+    @patch('ytsplit.utils.ffprobe.get_keyframe_timestamps')
+    def test_cut_batch_branches_on_cut_mode(self, mock_keyframes, cutter, plan_item, tmp_path):
+        """cut_batch décide le mode de chaque chapitre puis copie ou ré-encode selon ce mode."""
+        mock_keyframes.return_value = [0.0, 9.9]
+        cutter.settings.stream_copy = True
+        cutter.settings.validation.max_retries = 0
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+        on_keyframe = plan_item.model_copy(update={'output_path': tmp_path / "01.mp4"})
+        off_keyframe = plan_item.model_copy(update={
+            'chapter_index': 2, 'start_s': 30.0, 'end_s': 90.0, 'output_path': tmp_path / "02.mp4"
+        })
+        commands = {}
+        
+        def fake_run(cmd, **kwargs):
+            commands[cmd[-1]] = cmd
+            return Mock(returncode=1, stderr=b"")
+        
+        with patch('subprocess.run', side_effect=fake_run):
+            cutter.cut_batch(source_path, [on_keyframe, off_keyframe])
+        
+        assert mock_keyframes.call_count == 1
+        copy_cmd = commands[str(on_keyframe.output_path)]
+        assert copy_cmd[copy_cmd.index("-c") + 1] == "copy"
+        assert "libx264" in commands[str(off_keyframe.output_path)]
+
     @patch('ytsplit.utils.ffprobe.get_video_duration')
     def test_is_output_valid(self, mock_duration, cutter, plan_item, tmp_path):
         """Test de validation de fichier de sortie."""
@@ -221,6 +409,250 @@ class TestFFmpegCutter:
         mock_duration.return_value = 50.0  # Hors tolérance
         assert cutter._is_output_valid(plan_item) == False
 
+    @patch('subprocess.run')
+    def test_cut_precise_error_keeps_stderr_tail(self, mock_run, cutter, plan_item, tmp_path):
+        """Seule la fin de stderr est reprise dans le message d'erreur."""
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+        mock_run.return_value = Mock(returncode=1, stderr=b"x" * 100_000 + b"\nfatal error")
+        cutter.settings.validation.max_retries = 0
+
+        result = cutter.cut_precise(source_path, plan_item)
+
+        assert result.status == "ERR"
+        assert result.message.endswith("fatal error")
+        assert len(result.message) < 40_000
+        assert "-nostats" in mock_run.call_args[0][0]
+
+    @patch('ytsplit.utils.ffprobe.get_video_duration')
+    @patch('subprocess.run')
+    def test_validated_output_skipped_without_probe(self, mock_run, mock_duration, cutter, plan_item, tmp_path):
+        """Une sortie validée puis inchangée est reconnue sans ffprobe au lancement suivant."""
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+        plan_item.output_path.write_text("fake output")
+        mock_run.return_value = Mock(returncode=0, stderr=b"")
+        mock_duration.return_value = 59.95
+        
+        assert cutter.cut_precise(source_path, plan_item).status == "OK"
+        mock_duration.reset_mock()
+        
+        assert cutter._is_output_valid(plan_item) == True
+        mock_duration.assert_not_called()
+        
+        # Fichier modifié depuis: de nouveau sondé
+        plan_item.output_path.write_text("rewritten output")
+        assert cutter._is_output_valid(plan_item) == True
+        mock_duration.assert_called_once()
+
+    @patch('ytsplit.utils.ffprobe.get_video_duration')
+    @patch('subprocess.run')
+    def test_cut_precise_without_output_probe(self, mock_run, mock_duration, cutter, plan_item, tmp_path):
+        """Sans sonde des sorties, un FFmpeg réussi suffit."""
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+        plan_item.output_path.write_text("fake output")
+        mock_run.return_value = Mock(returncode=0, stderr=b"")
+        cutter.settings.validation.probe_outputs = False
+
+        result = cutter.cut_precise(source_path, plan_item)
+
+        assert result.status == "OK"
+        assert result.obtained_duration_s is None
+        mock_duration.assert_not_called()
+
+    @patch('ytsplit.utils.ffprobe.get_video_duration')
+    @patch('subprocess.run')
+    def test_output_dir_created_once(self, mock_run, mock_duration, cutter, plan_item, tmp_path):
+        """Le répertoire de sortie n'est créé qu'une fois pour tous les chapitres."""
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+        plan_item = plan_item.model_copy(update={'output_path': tmp_path / "out" / "01.mp4"})
+        second = plan_item.model_copy(update={'chapter_index': 2, 'output_path': tmp_path / "out" / "02.mp4"})
+        mock_run.return_value = Mock(returncode=0, stderr=b"")
+        mock_duration.return_value = 60.0
+
+        with patch.object(Path, 'mkdir', autospec=True, side_effect=Path.mkdir) as mock_mkdir:
+            cutter.cut_precise(source_path, plan_item)
+            cutter.cut_precise(source_path, second)
+
+        mock_mkdir.assert_called_once_with(tmp_path / "out", parents=True, exist_ok=True)
+        assert (tmp_path / "out").is_dir()
+
+    @patch('ytsplit.utils.ffprobe.get_video_duration')
+    def test_cut_batch_parallel_keeps_order(self, mock_duration, cutter, plan_item, tmp_path):
+        """Le lot est découpé en parallèle, sans worker pour les fichiers existants."""
+        items = [
+            plan_item.model_copy(update={
+                'chapter_index': i,
+                'output_path': tmp_path / f"{i:02d}.mp4",
+            })
+            for i in range(1, 5)
+        ]
+        items[0].output_path.write_text("existing")
+        mock_duration.return_value = 60.0
+
+        def fake_cut(source_path, item, threads=None):
+            return SplitResult(
+                output_path=item.output_path,
+                chapter_index=item.chapter_index,
+                chapter_title=item.chapter_title,
+                start_s=item.start_s,
+                end_s=item.end_s,
+                expected_duration_s=item.expected_duration_s,
+                obtained_duration_s=60.0,
+                status="OK",
+                processing_time_s=0.1
+            )
+
+        calls = []
+        with patch.object(cutter, 'cut_precise', side_effect=fake_cut) as mock_cut:
+            results = cutter.cut_batch(
+                Path("source.mp4"), items,
+                progress_callback=lambda done, total, title: calls.append((done, total))
+            )
+
+        assert [r.chapter_index for r in results] == [1, 2, 3, 4]
+        assert results[0].message == "Fichier existant (skipped)"
+        assert mock_cut.call_count == 3
+        assert calls == [(1, 4), (2, 4), (3, 4), (4, 4)]
+
+    def test_cut_batch_longest_first(self, plan_item, tmp_path):
+        """Les chapitres les plus longs sont lancés en premier; résultats dans l'ordre du plan."""
+        with patch.object(FFmpegCutter, '_validate_ffmpeg'):
+            cutter = FFmpegCutter(Settings(parallel={'max_workers': 1}))
+        items = [
+            plan_item.model_copy(update={
+                'chapter_index': i + 1,
+                'start_s': start,
+                'end_s': end,
+                'expected_duration_s': end - start,
+                'output_path': tmp_path / f"{i + 1:02d}.mp4",
+            })
+            for i, (start, end) in enumerate([(0.0, 10.0), (10.0, 100.0), (100.0, 130.0)])
+        ]
+        started = []
+
+        def fake_cut(source_path, item, threads=None):
+            started.append(item.chapter_index)
+            return cutter._result(item, "OK", 0.1)
+
+        with patch.object(cutter, '_encoding_args'), \
+             patch.object(cutter, 'cut_precise', side_effect=fake_cut):
+            results = cutter.cut_batch(tmp_path / "source.mp4", items)
+
+        assert started == [2, 3, 1]
+        assert [r.chapter_index for r in results] == [1, 2, 3]
+
+    def test_cut_batch_interrupt_cancels_queued(self, plan_item, tmp_path):
+        """Ctrl-C pendant le lot: aucun chapitre encore en file n'est lancé."""
+        with patch.object(FFmpegCutter, '_validate_ffmpeg'):
+            cutter = FFmpegCutter(Settings(parallel={'max_workers': 1}))
+        items = [
+            plan_item.model_copy(update={'chapter_index': i, 'output_path': tmp_path / f"{i:02d}.mp4"})
+            for i in range(1, 5)
+        ]
+        started = []
+        release = threading.Event()
+
+        def fake_cut(source_path, item, threads=None):
+            started.append(item.chapter_index)
+            if len(started) > 1:
+                release.wait(5)  # Chapitre en cours au moment du Ctrl-C
+            return cutter._result(item, "OK", 0.1)
+
+        def interrupt(done, total, title):
+            raise KeyboardInterrupt
+
+        with patch.object(cutter, '_encoding_args'), \
+             patch.object(cutter, 'cut_precise', side_effect=fake_cut):
+            with pytest.raises(KeyboardInterrupt):
+                cutter.cut_batch(tmp_path / "source.mp4", items, progress_callback=interrupt)
+            release.set()
+            time.sleep(0.1)
+
+        assert len(started) <= 2
+
+    def test_cut_batch_stop_event_skips_pending(self, cutter, plan_item, tmp_path):
+        """Arrêt demandé: aucun segment n'est lancé."""
+        stop = threading.Event()
+        stop.set()
+
+        with patch.object(cutter, '_encoding_args'), \
+             patch.object(cutter, 'cut_precise') as mock_cut:
+            results = cutter.cut_batch(tmp_path / "source.mp4", [plan_item], stop_event=stop)
+
+        mock_cut.assert_not_called()
+        assert results[0].status == "ERR"
+        assert "Interrompu" in results[0].message
+
+    @patch('subprocess.Popen')
+    def test_cut_all_in_one_single_pass(self, mock_popen, cutter, plan_item, tmp_path):
+        """Tous les chapitres contigus sont découpés par un seul FFmpeg."""
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+        items = [
+            plan_item.model_copy(update={
+                'chapter_index': i + 1,
+                'start_s': start,
+                'end_s': end,
+                'expected_duration_s': end - start,
+                'output_path': tmp_path / "out" / f"{i + 1:02d}.mp4",
+            })
+            for i, (start, end) in enumerate([(10.0, 40.0), (40.0, 100.0), (100.0, 130.0)])
+        ]
+
+        def fake_popen(cmd, **kwargs):
+            # Simule le muxer segment: fichiers + liste CSV + progression sur stdout
+            pattern = Path(cmd[-1])
+            rows = []
+            for n, item in enumerate(items):
+                name = pattern.name.replace("%03d", f"{n:03d}")
+                (pattern.parent / name).write_text("segment")
+                rows.append(f"{name},{item.start_s - 10:.6f},{item.end_s - 10:.6f}")
+            Path(cmd[cmd.index("-segment_list") + 1]).write_text("\n".join(rows) + "\n")
+            process = Mock()
+            process.stdout = iter([
+                "out_time_us=N/A\n", "out_time_us=35000000\n", "progress=continue\n",
+                "out_time_us=120000000\n", "progress=end\n",
+            ])
+            process.wait.return_value = 0
+            return process
+
+        mock_popen.side_effect = fake_popen
+        calls = []
+        results = cutter.cut_all_in_one(
+            source_path, [items[1], items[0], items[2]],
+            progress_callback=lambda done, total, title: calls.append((done, total))
+        )
+
+        assert mock_popen.call_count == 1
+        cmd = mock_popen.call_args[0][0]
+        seeks = [i for i, arg in enumerate(cmd) if arg == "-ss"]
+        assert [cmd[i + 1] for i in seeks] == ["00:00:08.000", "00:00:02.000"]
+        assert seeks[0] < cmd.index("-i") < seeks[1]
+        assert cmd[cmd.index("-t") + 1] == "00:02:00.000"
+        assert "-to" not in cmd
+        assert cmd[cmd.index("-segment_times") + 1] == "30.000000,90.000000"
+        assert cmd[cmd.index("-force_key_frames") + 1] == "30.000000,90.000000"
+        assert [r.chapter_index for r in results] == [2, 1, 3]
+        assert calls == [(1, 3), (2, 3), (3, 3)]
+        assert all(r.status == "OK" for r in results)
+        assert all(item.output_path.exists() for item in items)
+        assert not [p for p in (tmp_path / "out").iterdir() if p.name.startswith(".segments_")]
+
+    def test_cut_all_in_one_non_contiguous_fallback(self, cutter, plan_item, tmp_path):
+        """Chapitres non contigus: découpage segment par segment."""
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+        gap = plan_item.model_copy(update={'chapter_index': 2, 'start_s': 80.0, 'end_s': 90.0,
+                                           'expected_duration_s': 10.0})
+
+        with patch.object(cutter, 'cut_batch', return_value=[]) as mock_batch:
+            cutter.cut_all_in_one(source_path, [plan_item, gap])
+
+        mock_batch.assert_called_once_with(source_path, [plan_item, gap], None, stop_event=None)
+
 
 class TestCreateFFmpegCutter:
     """Tests pour la factory function."""
@@ -359,6 +791,24 @@ class TestFFmpegCrop:
         assert cmd[crop_index + 1] == "crop=1920:1040:0:0"
         assert "libx264" in cmd  # S'assurer que les autres options sont toujours là
     
+    def test_crop_filter_built_once_per_source(self, cutter_with_crop, plan_item, tmp_path):
+        """Le filtre crop n'est construit qu'une fois pour tous les chapitres d'une source."""
+        source_path = tmp_path / "source.mp4"
+        source_path.write_text("fake video")
+        second = plan_item.model_copy(update={'chapter_index': 2, 'start_s': 70.0, 'end_s': 90.0})
+        
+        with patch.object(cutter_with_crop, '_build_crop_filter', return_value="crop=1920:1040:0:0") as mock_crop:
+            first_cmd = cutter_with_crop._build_ffmpeg_command(source_path, plan_item)
+            second_cmd = cutter_with_crop._build_ffmpeg_command(source_path, second)
+        
+            retry_cmd = cutter_with_crop._build_ffmpeg_command(source_path, second, x264_preset="faster")
+        
+        mock_crop.assert_called_once_with(source_path)
+        assert first_cmd[first_cmd.index("-vf") + 1] == second_cmd[second_cmd.index("-vf") + 1]
+        assert retry_cmd[retry_cmd.index("-vf") + 1] == "crop=1920:1040:0:0"
+        assert second_cmd[second_cmd.index("-ss") + 1] == "00:01:08.000"
+        assert second_cmd[-1] == str(second.output_path)
+    
     def test_build_ffmpeg_command_crop_disabled(self, plan_item, tmp_path):
         """Test que la commande ne contient pas -vf quand crop désactivé."""
         settings = Settings(crop={'enabled': False})
@@ -387,6 +837,64 @@ class TestFFmpegCrop:
         assert crop_filter is None  # Doit gérer l'erreur gracieusement
 
 
+class TestFFprobeCache:
+    """Tests du cache des sondes FFprobe."""
+    
+    @patch('subprocess.run')
+    def test_duration_probed_once_per_file_version(self, mock_run, tmp_path):
+        """Test qu'un fichier inchangé n'est sondé qu'une fois."""
+        from ytsplit.utils.ffprobe import get_video_duration
+        
+        video = tmp_path / "chapter.mp4"
+        video.write_bytes(b"x" * 10)
+        mock_run.return_value = Mock(returncode=0, stdout="60.0\n", stderr="")
+        
+        assert get_video_duration(video) == 60.0
+        assert get_video_duration(video) == 60.0
+        assert mock_run.call_count == 1
+        
+        # Fichier réécrit: nouvelle taille, nouvelle sonde
+        video.write_bytes(b"x" * 20)
+        mock_run.return_value = Mock(returncode=0, stdout="30.0\n", stderr="")
+        assert get_video_duration(video) == 30.0
+        assert mock_run.call_count == 2
+    
+    @patch('subprocess.run')
+    def test_keyframes_from_packet_flags(self, mock_run, tmp_path):
+        """Test que seules les keyframes (drapeau K) sont retenues."""
+        from ytsplit.utils.ffprobe import get_keyframe_timestamps
+        
+        video = tmp_path / "source.mp4"
+        video.write_bytes(b"x" * 10)
+        mock_run.return_value = Mock(
+            returncode=0,
+            stdout="0.000000,K__\n0.033000,___\nN/A,K__\n2.002000,K__\n",
+            stderr="",
+        )
+        
+        assert get_keyframe_timestamps(video) == [0.0, 2.002]
+        assert get_keyframe_timestamps(video, max_keyframes=1) == [0.0]
+        assert mock_run.call_count == 1
+    
+    @patch('ytsplit.utils.ffprobe.get_video_duration')
+    def test_batch_video_durations(self, mock_duration, tmp_path):
+        """Test des durées sondées en lot, fichiers illisibles omis."""
+        from ytsplit.utils.ffprobe import batch_video_durations, FFprobeError
+        
+        good, bad = tmp_path / "01.mp4", tmp_path / "02.mp4"
+        
+        def fake_duration(path):
+            if path == bad:
+                raise FFprobeError("Fichier corrompu")
+            return 60.0
+        
+        mock_duration.side_effect = fake_duration
+        
+        assert batch_video_durations([good, bad, good]) == {good: 60.0}
+        assert mock_duration.call_count == 2
+        assert batch_video_durations([]) == {}
+
+
 class TestFFmpegGPU:
     """Tests pour les fonctionnalités GPU."""
     
@@ -424,7 +932,7 @@ class TestFFmpegGPU:
         # Simuler ffmpeg avec NVENC disponible
         mock_run.return_value = Mock(
             returncode=0, 
-            stdout="V..... h264_nvenc         NVIDIA NVENC H.264 encoder"
+            stdout=b"V..... h264_nvenc         NVIDIA NVENC H.264 encoder"
         )
         
         result = check_nvenc_availability()
@@ -442,7 +950,7 @@ class TestFFmpegGPU:
         # Simuler ffmpeg sans NVENC
         mock_run.return_value = Mock(
             returncode=0,
-            stdout="V..... libx264           libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10"
+            stdout=b"V..... libx264           libx264 H.264 / AVC / MPEG-4 AVC / MPEG-4 part 10"
         )
         
         result = check_nvenc_availability()
@@ -493,12 +1001,12 @@ class TestFFmpegGPU:
         assert is_compatible == False
         assert "GPU désactivé" in message
     
-    @patch('ytsplit.cutting.ffmpeg.check_nvenc_availability')
-    def test_check_gpu_compatibility_nvenc_not_available(self, mock_nvenc):
+    @patch('ytsplit.cutting.ffmpeg.list_hw_encoders')
+    def test_check_gpu_compatibility_nvenc_not_available(self, mock_list):
         """Test NVENC non disponible."""
         from ytsplit.cutting.ffmpeg import check_gpu_compatibility
         
-        mock_nvenc.return_value = False
+        mock_list.return_value = frozenset()
         settings = Settings(gpu={'enabled': True})
         
         is_compatible, message = check_gpu_compatibility(settings)
@@ -506,12 +1014,12 @@ class TestFFmpegGPU:
         assert is_compatible == False
         assert "NVENC non disponible" in message
     
-    @patch('ytsplit.cutting.ffmpeg.check_nvenc_availability')
-    def test_check_gpu_compatibility_success(self, mock_nvenc):
+    @patch('ytsplit.cutting.ffmpeg.hw_encoder_works', return_value=True)
+    @patch('ytsplit.cutting.ffmpeg.list_hw_encoders', return_value=frozenset({"h264_nvenc"}))
+    def test_check_gpu_compatibility_success(self, mock_list, mock_works):
         """Test compatibilité GPU réussie."""
         from ytsplit.cutting.ffmpeg import check_gpu_compatibility
         
-        mock_nvenc.return_value = True
         settings = Settings(gpu={'enabled': True, 'encoder': 'h264_nvenc', 'preset': 'p7'})
         
         is_compatible, message = check_gpu_compatibility(settings)
@@ -542,6 +1050,110 @@ class TestFFmpegGPU:
         assert "-c:a" in cmd
         assert "copy" in cmd  # Audio en copy pour GPU
     
+    @patch('ytsplit.cutting.ffmpeg.hw_encoder_works', return_value=True)
+    @patch('ytsplit.cutting.ffmpeg.list_hw_encoders', return_value=frozenset({"h264_nvenc"}))
+    def test_gpu_probe_once_per_cutter(self, mock_list, mock_works, cutter_with_gpu, plan_item, tmp_path):
+        """Test que NVENC n'est sondé qu'une fois pour tous les chapitres."""
+        source_path = tmp_path / "source.mp4"
+        
+        for _ in range(3):
+            cmd = cutter_with_gpu._build_ffmpeg_command(source_path, plan_item)
+            assert "h264_nvenc" in cmd
+        
+        assert mock_list.call_count == 1
+        mock_works.assert_called_once_with("h264_nvenc")
+    
+    @patch('subprocess.run')
+    def test_auto_encoder_selects_available_backend(self, mock_run, plan_item, tmp_path):
+        """Test de la sélection automatique d'un encodeur matériel (QSV) et de ses options."""
+        from ytsplit.cutting.ffmpeg import hw_encoder_works, list_hw_encoders
+        
+        list_hw_encoders.cache_clear()
+        hw_encoder_works.cache_clear()
+        mock_run.return_value = Mock(
+            returncode=0,
+            stdout=b" V....D h264_qsv  H.264 (Intel Quick Sync Video acceleration)"
+        )
+        settings = Settings(gpu={'enabled': True, 'encoder': 'auto', 'preset': 'p4', 'cq': 22})
+        with patch.object(FFmpegCutter, '_validate_ffmpeg'):
+            cutter = FFmpegCutter(settings)
+        
+        try:
+            cmd = cutter._build_ffmpeg_command(tmp_path / "source.mp4", plan_item)
+        finally:
+            list_hw_encoders.cache_clear()
+            hw_encoder_works.cache_clear()
+        
+        assert cmd[cmd.index("-c:v") + 1] == "h264_qsv"
+        assert cmd[cmd.index("-preset") + 1] == "medium"
+        assert cmd[cmd.index("-global_quality") + 1] == "22"
+        assert cmd[cmd.index("-hwaccel") + 1] == "auto"
+        # Liste des encodeurs lue une seule fois, puis une image de test pour QSV
+        assert mock_run.call_count == 2
+        test_cmd = mock_run.call_args_list[1][0][0]
+        assert test_cmd[test_cmd.index("-c:v") + 1] == "h264_qsv"
+        assert "-frames:v" in test_cmd
+    
+    @patch('subprocess.run')
+    def test_auto_encoder_skips_unusable_backend(self, mock_run):
+        """Test qu'un encodeur compilé mais sans matériel n'est pas retenu."""
+        from ytsplit.cutting.ffmpeg import check_gpu_compatibility, hw_encoder_works, list_hw_encoders
+        
+        def fake_run(cmd, **kwargs):
+            if "-encoders" in cmd:
+                return Mock(returncode=0, stdout=b" V....D h264_nvenc  NVIDIA NVENC H.264 encoder")
+            return Mock(returncode=1)  # Échec de l'image de test: pas de GPU NVIDIA
+        
+        mock_run.side_effect = fake_run
+        list_hw_encoders.cache_clear()
+        hw_encoder_works.cache_clear()
+        try:
+            is_compatible, message = check_gpu_compatibility(Settings(gpu={'enabled': True, 'encoder': 'auto'}))
+        finally:
+            list_hw_encoders.cache_clear()
+            hw_encoder_works.cache_clear()
+        
+        assert is_compatible == False
+        assert "Aucun encodeur matériel" in message
+    
+    @patch('subprocess.run')
+    def test_auto_encoder_none_available(self, mock_run):
+        """Test sans aucun encodeur matériel disponible."""
+        from ytsplit.cutting.ffmpeg import check_gpu_compatibility, list_hw_encoders
+        
+        list_hw_encoders.cache_clear()
+        mock_run.return_value = Mock(returncode=0, stdout=b" V....D libx264  libx264 H.264")
+        try:
+            is_compatible, message = check_gpu_compatibility(Settings(gpu={'enabled': True, 'encoder': 'auto'}))
+        finally:
+            list_hw_encoders.cache_clear()
+        
+        assert is_compatible == False
+        assert "Aucun encodeur matériel" in message
+    
+    def test_cut_batch_shares_nvenc_sessions_between_videos(self, plan_item, tmp_path):
+        """Les sessions NVENC sont réparties entre les vidéos traitées simultanément."""
+        from concurrent.futures import ThreadPoolExecutor
+        
+        settings = Settings(
+            gpu={'enabled': True, 'encoder': 'h264_nvenc'},
+            parallel={'max_workers': 4, 'max_videos': 2}
+        )
+        with patch.object(FFmpegCutter, '_validate_ffmpeg'):
+            cutter = FFmpegCutter(settings)
+        items = [
+            plan_item.model_copy(update={'chapter_index': i, 'output_path': tmp_path / f"{i:02d}.mp4"})
+            for i in range(1, 4)
+        ]
+        
+        with patch.object(cutter, '_gpu_compatibility', return_value=(True, "GPU prêt")), \
+             patch.object(cutter, '_encoding_args'), \
+             patch.object(cutter, 'cut_precise'), \
+             patch('ytsplit.cutting.ffmpeg.ThreadPoolExecutor', side_effect=ThreadPoolExecutor) as mock_pool:
+            cutter.cut_batch(tmp_path / "source.mp4", items)
+        
+        assert mock_pool.call_args.kwargs['max_workers'] == 1
+    
     @patch('ytsplit.cutting.ffmpeg.check_gpu_compatibility')
     def test_build_ffmpeg_command_gpu_fallback_cpu(self, mock_gpu_check, cutter_with_gpu, plan_item, tmp_path):
         """Test fallback CPU quand GPU non compatible."""
@@ -561,8 +1173,7 @@ class TestFFmpegGPU:
         assert "-crf" in cmd
         assert "-preset" in cmd
         assert "veryfast" in cmd  # Preset x264
-        assert "-c:a" in cmd
-        assert "aac" in cmd  # Audio réencodé en CPU
+        assert cmd[cmd.index("-c:a") + 1] == "copy"  # Audio copié par défaut
     
     @patch('ytsplit.cutting.ffmpeg.check_gpu_compatibility')
     @patch('ytsplit.utils.ffprobe.get_video_resolution')
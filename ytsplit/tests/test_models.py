@@ -221,4 +221,29 @@ class TestProcessingStats:
             total_duration_s=1800.0,
             total_processing_time_s=120.0
         )
-        assert stats.success_rate == 100.0
\ No newline at end of file
+        assert stats.success_rate == 100.0
+    
+    def test_inplace_accumulation(self):
+        """Test du cumul en place de deux statistiques."""
+        total = ProcessingStats(
+            total_chapters=3,
+            successful_chapters=2,
+            failed_chapters=1,
+            total_duration_s=600.0,
+            total_processing_time_s=30.0
+        )
+        same = total
+        total += ProcessingStats(
+            total_chapters=2,
+            successful_chapters=2,
+            failed_chapters=0,
+            total_duration_s=300.0,
+            total_processing_time_s=15.0
+        )
+        
+        assert total is same
+        assert total.total_chapters == 5
+        assert total.successful_chapters == 4
+        assert total.failed_chapters == 1
+        assert total.total_duration_s == 900.0
+        assert total.total_processing_time_s == 45.0
\ No newline at end of file
@@ -4,8 +4,9 @@ import pytest
 from pathlib import Path
 from unittest.mock import patch
 
-from ytsplit.planning.plan import SplitPlanner, PlanningError, create_split_planner
-from ytsplit.config import Settings
+from ytsplit.planning.plan import SplitPlanner, PlanningError, choose_mode, create_split_planner
+from ytsplit.config import Settings, clear_settings_cache
+from ytsplit.io.naming import handle_filename_collision
 from ytsplit.models import VideoMeta, Chapter, SplitPlanItem
 
 
@@ -146,6 +147,38 @@ class TestSplitPlanner:
         # Note: " n'est pas dans les replace_chars par défaut du settings de test
         assert filename.endswith(".mp4")
     
+    def test_generate_safe_filename_replace_chars(self):
+        """Test des remplacements en une passe et des clés multi-caractères."""
+        from ytsplit.io.naming import generate_safe_filename
+        
+        assert generate_safe_filename('a<b>:c?') == "a＜b＞：c？"
+        assert generate_safe_filename("a:b", replace_chars={":": "-"}) == "a-b"
+        assert generate_safe_filename("a -> b", replace_chars={"->": "→"}) == "a → b"
+    
+    def test_handle_filename_collision(self, tmp_path):
+        """Test de résolution des collisions en une seule lecture du répertoire."""
+        base = tmp_path / "01 - Intro.mp4"
+        assert handle_filename_collision(base) == base
+        
+        base.write_text("x")
+        (tmp_path / "01 - Intro (2).mp4").write_text("x")
+        with patch.object(Path, 'exists', wraps=Path.exists, autospec=True) as mock_exists:
+            assert handle_filename_collision(base) == tmp_path / "01 - Intro (3).mp4"
+        assert mock_exists.call_count == 1
+        
+        names = {"01 - Intro.mp4", "01 - Intro (2).mp4", "01 - Intro (3).mp4"}
+        assert handle_filename_collision(base, existing_names=names).name == "01 - Intro (4).mp4"
+    
+    def test_invalid_naming_template(self, planner):
+        """Test de rejet d'un template de nommage invalide."""
+        with pytest.raises(ValueError, match="Variable inconnue"):
+            Settings(naming={'template': '{n:02d} - {chapter}'})
+        
+        planner.settings.naming.template = '{n:02d} - {title'
+        chapter = Chapter(index=1, title="Intro", start_s=0.0, end_s=60.0)
+        with pytest.raises(PlanningError, match="Template de nommage invalide"):
+            planner._generate_chapter_filename(chapter)
+    
     def test_validate_plan_success(self, planner, video_meta):
         """Test de validation de plan valide."""
         plan = planner.build_split_plan(video_meta)
@@ -260,6 +293,60 @@ class TestSplitPlanner:
         assert len(existing) == 1   # 1 existant valide
         assert existing[0].output_path == existing_file
     
+    @patch('ytsplit.utils.ffprobe.get_video_duration')
+    def test_filter_existing_files_trusts_markers(self, mock_duration, planner, video_meta, tmp_path):
+        """Test du filtrage sans ffprobe pour les sorties validées par un précédent découpage."""
+        from ytsplit.io.markers import record_output
+        
+        plan = planner.build_split_plan(video_meta, output_dir=tmp_path)
+        plan[0].output_path.parent.mkdir(parents=True, exist_ok=True)
+        plan[0].output_path.write_text("existing content")
+        record_output(plan[0].output_path, 60.0)
+        
+        to_process, existing = planner.filter_existing_files(plan)
+        
+        assert existing == [plan[0]]
+        assert len(to_process) == 2
+        mock_duration.assert_not_called()
+    
+    def test_outputs_present(self, planner, video_meta, tmp_path):
+        """Test du pré-filtre par noms de fichiers."""
+        assert not planner.outputs_present(video_meta, output_dir=tmp_path)
+        
+        plan = planner.build_split_plan(video_meta, output_dir=tmp_path)
+        plan[0].output_path.parent.mkdir(parents=True, exist_ok=True)
+        for item in plan[:-1]:
+            item.output_path.write_text("existing content")
+        assert not planner.outputs_present(video_meta, output_dir=tmp_path)
+        
+        plan[-1].output_path.write_text("existing content")
+        assert planner.outputs_present(video_meta, output_dir=tmp_path)
+    
+    def test_choose_mode(self, planner, video_meta):
+        """Test du choix copie/ré-encodage selon les keyframes."""
+        plan = planner.build_split_plan(video_meta)
+        keyframes = [0.0, 59.9, 150.0]
+        
+        assert choose_mode(plan[0], keyframes, 0.15) == "copy"
+        assert choose_mode(plan[1], keyframes, 0.15) == "copy"
+        assert choose_mode(plan[2], keyframes, 0.15) == "reencode"
+    
+    @patch('ytsplit.utils.ffprobe.get_keyframe_timestamps')
+    def test_assign_cut_modes(self, mock_keyframes, planner, video_meta, tmp_path):
+        """Test de l'attribution des modes avec une seule sonde des keyframes."""
+        plan = planner.build_split_plan(video_meta)
+        mock_keyframes.return_value = (0.0, 60.0, 175.0)
+        
+        assigned = planner.assign_cut_modes(plan, tmp_path / "source.mp4")
+        
+        assert [item.mode for item in assigned] == ["copy", "copy", "reencode"]
+        assert [item.mode for item in plan] == ["reencode"] * 3
+        mock_keyframes.assert_called_once()
+        
+        planner.settings.crop.enabled = True
+        assert planner.assign_cut_modes(plan, tmp_path / "source.mp4") is plan
+        mock_keyframes.assert_called_once()
+    
     def test_estimate_processing_time(self, planner, video_meta):
         """Test d'estimation du temps de traitement."""
         plan = planner.build_split_plan(video_meta)
@@ -294,4 +381,16 @@ class TestCreateSplitPlanner:
         planner = create_split_planner()
         
         assert isinstance(planner, SplitPlanner)
-        assert planner.settings.out_dir == Path("./output")
\ No newline at end of file
+        assert planner.settings.out_dir == Path("./output")
+        assert planner.settings.naming.replace_chars["<"] == "＜"
+        assert planner.settings.naming.replace_chars["/"] == "／"
+    
+    def test_default_settings_shared(self):
+        """Test du partage de la configuration par défaut entre factories."""
+        clear_settings_cache()
+        first = create_split_planner()
+        second = create_split_planner()
+        assert first.settings is second.settings
+        
+        clear_settings_cache()
+        assert create_split_planner().settings is not first.settings
\ No newline at end of file
@@ -70,6 +70,19 @@ class TestParseTimecode:
         """Test des cas limites."""
         assert parse_timecode("  01:23:45  ") == 5025.0  # Espaces
         assert parse_timecode("1:2:3") == 3723.0  # Sans zéros de padding
+    
+    def test_repeated_timecodes_cached(self):
+        """Test de la mémorisation des timecodes déjà convertis (erreurs non mémorisées)."""
+        from ytsplit.parsing.timecode import _parse_timecode
+        
+        _parse_timecode.cache_clear()
+        assert parse_timecode("01:00") == 60.0
+        assert parse_timecode(" 01:00 ") == 60.0
+        assert _parse_timecode.cache_info().hits == 1
+        
+        for _ in range(2):
+            with pytest.raises(TimecodeError):
+                parse_timecode("00:60")
 
 
 class TestSecondsToTimecode:
@@ -2,11 +2,12 @@
 
 import pytest
 import json
+import os
 from unittest.mock import patch, MagicMock, Mock
 from pathlib import Path
 import subprocess
 
-from ytsplit.providers.youtube import YouTubeProvider, YouTubeError, create_youtube_provider
+from ytsplit.providers.youtube import YouTubeProvider, YouTubeError, create_youtube_provider, _parse_progress_line
 from ytsplit.config import Settings
 from ytsplit.models import VideoMeta, Chapter
 
@@ -15,10 +16,10 @@ class TestYouTubeProvider:
     """Tests pour la classe YouTubeProvider."""
     
     @pytest.fixture
-    def settings(self):
+    def settings(self, tmp_path):
         """Settings de test."""
         return Settings(
-            work_dir=Path("./test_cache"),
+            work_dir=tmp_path / "test_cache",
             yt_dlp_format="best[height<=720]",
             video_format="mp4"
         )
@@ -228,6 +229,84 @@ class TestYouTubeProvider:
         with pytest.raises(YouTubeError, match="ID vidéo manquant"):
             provider.get_video_info("https://www.youtube.com/watch?v=missingdata")
     
+    @patch('subprocess.run')
+    def test_get_video_info_cached(self, mock_run, provider):
+        """Test que les métadonnées sont mémorisées par URL."""
+        mock_info = {"id": "dQw4w9WgXcQ", "title": "Test Video", "duration": 180}
+        
+        mock_run.return_value = Mock(
+            returncode=0,
+            stdout=json.dumps(mock_info),
+            stderr=""
+        )
+        
+        url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        first = provider.get_video_info(url)
+        second = provider.get_video_info(url)
+        
+        assert mock_run.call_count == 1
+        assert second == first
+
+    def test_last_ytdlp_error_per_thread(self, provider):
+        """Test que le diagnostic yt-dlp d'un thread n'écrase pas celui d'un autre."""
+        import threading
+        
+        provider.last_ytdlp_error = "erreur du thread principal"
+        seen = []
+        
+        def worker():
+            seen.append(provider.last_ytdlp_error)
+            provider.last_ytdlp_error = "erreur du worker"
+        
+        thread = threading.Thread(target=worker)
+        thread.start()
+        thread.join()
+        
+        assert seen == [None]
+        assert provider.last_ytdlp_error == "erreur du thread principal"
+
+    @patch('subprocess.run')
+    def test_get_video_info_disk_cache(self, mock_run, provider, settings):
+        """Test que les métadonnées sont relues depuis work_dir/.meta_cache."""
+        mock_info = {"id": "dQw4w9WgXcQ", "title": "Test Video", "duration": 180}
+        mock_run.return_value = Mock(returncode=0, stdout=json.dumps(mock_info), stderr="")
+
+        url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        provider.get_video_info(url)
+        cache_file = settings.work_dir / ".meta_cache" / "dQw4w9WgXcQ.json"
+        assert cache_file.exists()
+        # Écriture atomique: aucun fichier temporaire résiduel
+        assert [p.name for p in cache_file.parent.iterdir()] == [cache_file.name]
+
+        # Nouveau provider (nouvelle exécution): pas d'appel yt-dlp
+        with patch.object(YouTubeProvider, '_validate_ytdlp'):
+            fresh = YouTubeProvider(settings)
+        assert fresh.get_video_info(url).title == "Test Video"
+        assert mock_run.call_count == 1
+
+        # Cache expiré: nouvelle extraction
+        os.utime(cache_file, (0, 0))
+        with patch.object(YouTubeProvider, '_validate_ytdlp'):
+            YouTubeProvider(settings).get_video_info(url)
+        assert mock_run.call_count == 2
+
+    @patch('subprocess.run')
+    def test_get_available_subtitles_cached(self, mock_run, provider):
+        """Test que la liste des sous-titres est mémorisée par URL."""
+        mock_run.return_value = Mock(
+            returncode=0,
+            stdout="[info] Available subtitles for dQw4w9WgXcQ:\nLanguage Name Formats\nen English vtt, srt\n",
+            stderr=""
+        )
+        
+        url = "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        first = provider.get_available_subtitles(url)
+        second = provider.get_available_subtitles(url)
+        
+        assert first == {"en": ["srt", "vtt"]}
+        assert second == first
+        assert mock_run.call_count == 1
+    
     def test_get_video_file_path_exists(self, provider, tmp_path):
         """Test de recherche de fichier existant."""
         # Créer un fichier temporaire
@@ -251,6 +330,16 @@ class TestYouTubeProvider:
         result = provider.get_video_file_path("test123", tmp_path)
         assert result is None
     
+    def test_get_subtitles_file_path_preference(self, provider, tmp_path):
+        """Test de l'ordre de préférence des sous-titres (langue puis extension)."""
+        (tmp_path / "test123.en.srt").write_text("en")
+        (tmp_path / "test123.fr.vtt").write_text("fr")
+        (tmp_path / "test123.fr.srt").touch()  # vide: ignoré
+        
+        result = provider.get_subtitles_file_path("test123", tmp_path)
+        assert result == tmp_path / "test123.fr.vtt"
+        assert provider.get_subtitles_file_path("test123", tmp_path / "missing") is None
+    
     @patch('subprocess.run')
     def test_download_video_success(self, mock_run, provider, tmp_path):
         """Test de téléchargement réussi."""
@@ -276,6 +365,28 @@ class TestYouTubeProvider:
         
         with pytest.raises(YouTubeError, match="Échec du téléchargement"):
             provider.download_video("https://www.youtube.com/watch?v=invalidvid2")
+    
+    @patch('ytsplit.providers.youtube._run_with_progress')
+    def test_download_video_progress_hook(self, mock_run_progress, provider, tmp_path):
+        """Test du relais de progression yt-dlp vers le callback."""
+        (tmp_path / "dQw4w9WgXcQ.mp4").write_text("fake video content")
+        mock_run_progress.return_value = subprocess.CompletedProcess([], 0, "", "")
+        hook = Mock()
+        
+        with patch.object(provider.settings, 'work_dir', tmp_path):
+            provider.download_video("https://www.youtube.com/watch?v=dQw4w9WgXcQ", progress_hook=hook)
+        
+        cmd, timeout, passed_hook = mock_run_progress.call_args[0]
+        assert "--progress-template" in cmd
+        assert cmd[-1] == "https://www.youtube.com/watch?v=dQw4w9WgXcQ"
+        assert passed_hook is hook
+    
+    def test_parse_progress_line(self):
+        """Test du décodage des lignes de progression yt-dlp."""
+        assert _parse_progress_line("ytsplit-progress 1024 2048 NA\n") == (1024, 2048)
+        assert _parse_progress_line("ytsplit-progress 1024 NA 4096.5") == (1024, 4096)
+        assert _parse_progress_line("ytsplit-progress 1024 NA NA") == (1024, None)
+        assert _parse_progress_line("[download] Destination: x.mp4") is None
 
 
 class TestCreateYouTubeProvider:
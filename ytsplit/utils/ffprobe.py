@@ -1,9 +1,13 @@
 """Utilitaires FFprobe pour l'analyse des fichiers vidéo."""
 
+import bisect
+import functools
+import os
 import subprocess
 import json
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Iterable, Optional, Sequence
 
 
 class FFprobeError(Exception):
@@ -11,7 +15,11 @@ class FFprobeError(Exception):
     pass
 
 
-def _run_ffprobe_command(cmd: list[str]) -> str:
+# Lecture des paquets de tout le fichier: bien plus longue qu'une sonde d'en-tête
+KEYFRAME_PROBE_TIMEOUT_S = 300
+
+
+def _run_ffprobe_command(cmd: list[str], timeout: int = 30) -> str:
     """Exécute une commande FFprobe et retourne la sortie."""
     try:
         result = subprocess.run(
@@ -20,7 +28,7 @@ def _run_ffprobe_command(cmd: list[str]) -> str:
             text=True,
             encoding="utf-8",
             errors="replace",
-            timeout=30,
+            timeout=timeout,
         )
         
         if result.returncode != 0:
@@ -32,15 +40,30 @@ def _run_ffprobe_command(cmd: list[str]) -> str:
         return result.stdout.strip()
         
     except subprocess.TimeoutExpired:
-        raise FFprobeError("Timeout FFprobe (>30s)")
+        raise FFprobeError(f"Timeout FFprobe (>{timeout}s)")
     except FileNotFoundError:
         raise FFprobeError("FFprobe n'est pas installé ou pas dans le PATH")
 
 
+def _file_key(video_path: Path) -> tuple[str, int, int]:
+    """Clé de cache d'un fichier: chemin absolu, mtime et taille (un seul stat).
+    
+    Un fichier réécrit (nouveau découpage) change de clé: le cache ne sert
+    jamais de résultat périmé.
+    """
+    try:
+        stat = video_path.stat()
+    except OSError:
+        raise FFprobeError(f"Fichier introuvable: {video_path}")
+    return os.path.abspath(video_path), stat.st_mtime_ns, stat.st_size
+
+
 def get_video_duration(video_path: Path) -> float:
     """
     Obtient la durée d'un fichier vidéo en secondes.
     
+    Le résultat est mémorisé tant que le fichier n'est pas modifié.
+    
     Args:
         video_path: Chemin du fichier vidéo
         
@@ -50,15 +73,18 @@ def get_video_duration(video_path: Path) -> float:
     Raises:
         FFprobeError: Si l'analyse échoue
     """
-    if not video_path.exists():
-        raise FFprobeError(f"Fichier introuvable: {video_path}")
-    
+    return _probe_duration(*_file_key(video_path))
+
+
+@functools.lru_cache(maxsize=256)
+def _probe_duration(path: str, mtime_ns: int, size: int) -> float:
+    """Durée via ffprobe, mémorisée par (chemin, mtime, taille)."""
     cmd = [
         "ffprobe",
         "-v", "error",
         "-show_entries", "format=duration",
         "-of", "default=noprint_wrappers=1:nokey=1",
-        str(video_path)
+        path
     ]
     
     duration_str = _run_ffprobe_command(cmd)
@@ -69,6 +95,35 @@ def get_video_duration(video_path: Path) -> float:
         raise FFprobeError(f"Durée invalide retournée: '{duration_str}'")
 
 
+def batch_video_durations(video_paths: Iterable[Path], max_workers: int = 4) -> dict[Path, float]:
+    """
+    Obtient les durées de plusieurs fichiers vidéo en parallèle.
+    
+    FFprobe n'analyse qu'une entrée par appel: les sondes sont lancées dans un
+    petit pool de threads (chacune attend son processus) et alimentent le cache
+    de ``get_video_duration``.
+    
+    Args:
+        video_paths: Chemins des fichiers vidéo
+        max_workers: Nombre maximum de sondes simultanées
+        
+    Returns:
+        dict[Path, float]: Durée par chemin (fichiers illisibles absents)
+    """
+    paths = list(dict.fromkeys(video_paths))
+    if not paths:
+        return {}
+    
+    def probe(path: Path) -> tuple[Path, Optional[float]]:
+        try:
+            return path, get_video_duration(path)
+        except Exception:
+            return path, None
+    
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(paths))) as executor:
+        return {path: duration for path, duration in executor.map(probe, paths) if duration is not None}
+
+
 def get_video_info(video_path: Path) -> Dict[str, Any]:
     """
     Obtient les informations complètes d'un fichier vidéo.
@@ -106,6 +161,8 @@ def get_video_resolution(video_path: Path) -> tuple[int, int]:
     """
     Obtient la résolution (largeur, hauteur) d'un fichier vidéo.
     
+    Le résultat est mémorisé tant que le fichier n'est pas modifié.
+    
     Args:
         video_path: Chemin du fichier vidéo
         
@@ -115,7 +172,13 @@ def get_video_resolution(video_path: Path) -> tuple[int, int]:
     Raises:
         FFprobeError: Si l'analyse échoue
     """
-    info = get_video_info(video_path)
+    return _probe_resolution(*_file_key(video_path))
+
+
+@functools.lru_cache(maxsize=256)
+def _probe_resolution(path: str, mtime_ns: int, size: int) -> tuple[int, int]:
+    """Résolution via ffprobe, mémorisée par (chemin, mtime, taille)."""
+    info = get_video_info(Path(path))
     
     # Trouver le premier stream vidéo
     for stream in info.get("streams", []):
@@ -241,13 +304,16 @@ def validate_video_file(video_path: Path) -> Dict[str, Any]:
         raise FFprobeError(f"Erreur lors de la validation: {e}")
 
 
-def get_keyframe_timestamps(video_path: Path, max_keyframes: int = 1000) -> list[float]:
+def get_keyframe_timestamps(video_path: Path, max_keyframes: Optional[int] = 1000) -> list[float]:
     """
     Obtient les timestamps des keyframes d'un fichier vidéo.
     
+    Les keyframes sont lues dans les paquets (drapeau ``K``) sans décoder
+    la vidéo; le résultat est mémorisé tant que le fichier n'est pas modifié.
+    
     Args:
         video_path: Chemin du fichier vidéo
-        max_keyframes: Nombre maximum de keyframes à récupérer
+        max_keyframes: Nombre maximum de keyframes à récupérer (None: toutes)
         
     Returns:
         list[float]: Liste des timestamps en secondes
@@ -255,36 +321,56 @@ def get_keyframe_timestamps(video_path: Path, max_keyframes: int = 1000) -> list
     Raises:
         FFprobeError: Si l'analyse échoue
     """
-    if not video_path.exists():
-        raise FFprobeError(f"Fichier introuvable: {video_path}")
-    
+    keyframes = _probe_keyframes(*_file_key(video_path))
+    if max_keyframes is not None:
+        keyframes = keyframes[:max_keyframes]
+    return list(keyframes)
+
+
+@functools.lru_cache(maxsize=32)
+def _probe_keyframes(path: str, mtime_ns: int, size: int) -> tuple[float, ...]:
+    """Keyframes via ffprobe, mémorisées par (chemin, mtime, taille)."""
     cmd = [
         "ffprobe",
         "-v", "error",
         "-select_streams", "v:0",
-        "-show_entries", "frame=pkt_pts_time",
+        "-show_entries", "packet=pts_time,flags",
         "-of", "csv=p=0",
-        "-show_frames",
-        "-skip_frame", "nokey",  # Seulement les keyframes
-        str(video_path)
+        path
     ]
     
-    output = _run_ffprobe_command(cmd)
+    output = _run_ffprobe_command(cmd, timeout=KEYFRAME_PROBE_TIMEOUT_S)
     
     keyframes = []
     for line in output.split('\n'):
-        if line.strip():
-            try:
-                timestamp = float(line.strip())
-                keyframes.append(timestamp)
-                
-                if len(keyframes) >= max_keyframes:
-                    break
-                    
-            except ValueError:
-                continue  # Ignorer les lignes invalides
+        pts_time, _, flags = line.strip().partition(',')
+        if 'K' not in flags:
+            continue
+        try:
+            keyframes.append(float(pts_time))
+        except ValueError:
+            continue  # Ignorer les lignes invalides (pts N/A)
+    
+    return tuple(sorted(keyframes))
+
+
+def snap_to_keyframe(time_s: float, keyframes: Sequence[float], tolerance_s: float) -> Optional[float]:
+    """
+    Retourne la dernière keyframe précédant ``time_s`` d'au plus ``tolerance_s`` secondes.
     
-    return sorted(keyframes)
+    Args:
+        time_s: Instant visé en secondes
+        keyframes: Timestamps des keyframes, triés
+        tolerance_s: Écart maximum accepté
+        
+    Returns:
+        Optional[float]: Timestamp de la keyframe, ou None si aucune n'est assez proche
+    """
+    i = bisect.bisect_right(keyframes, time_s)
+    if i == 0:
+        return None
+    keyframe = keyframes[i - 1]
+    return keyframe if time_s - keyframe <= tolerance_s else None
 
 
 def check_ffprobe_availability() -> bool:
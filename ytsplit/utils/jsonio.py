@@ -0,0 +1,28 @@
+"""(Dé)sérialisation JSON, via orjson si disponible (extra "fast")."""
+
+import json
+from typing import Any
+
+try:
+    import orjson  # Optionnel (extra "fast"): (dé)sérialisation JSON plus rapide
+except ImportError:
+    orjson = None
+
+
+def json_loads(data: str | bytes) -> Any:
+    """Désérialise du JSON (str ou bytes) avec orjson si disponible, sinon avec la stdlib."""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps(obj: Any) -> bytes:
+    """
+    Sérialise en JSON UTF-8 (bytes) avec orjson si disponible, sinon avec la stdlib.
+
+    Raises:
+        TypeError: Si ``obj`` contient un type sans équivalent JSON
+    """
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")